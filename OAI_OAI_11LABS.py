@@ -22,6 +22,7 @@ import pyperclip
 import miniaudio
 import numpy as np
 import pathlib
+import time
 # import pydantic
 # from mcp.server.fastmcp import FastMCP
 import aiosqlite
@@ -44,7 +45,25 @@ from datetime import datetime
 # from pydub.playback import play
 # from ultimate_playback import play
 from functools import partial
-from portaudio_pcm_player import play
+from portaudio_pcm_player import CallbackPcmPlayer, PcmPlayer
+from audio_sinks import NullSink, WavFileSink
+from pcm_stream import PcmStream
+from earcons import EarconBank
+from pcm_dsp import leading_silence_bytes, trim_silence_and_fade
+from tts_websocket import ElevenLabsWebSocketSession
+from tts_cache import TtsAudioCache
+from tts_scheduler import TtsScheduler, BACKGROUND_ORDER
+from tts_providers import ElevenLabsProvider, HedgedTts, OpenAITtsProvider, TtsProviderError, TtsRequest
+from http_pool import ConnectionManager
+from llm_clients import LlmClientRegistry
+from sentence_coalescer import CoalescePolicy, SentenceCoalescer
+from first_clause import FirstClausePolicy, find_first_clause_cut
+from sentence_segmenter import SentenceSegmenter
+from sentence_boundaries import detector as boundary_detector
+from markdown_speech import MarkdownSpeechNormalizer
+from midi_tags import MidiEvent, SystemTagTokenizer
+from response_session import AudioArbiter
+from segment_playback import SegmentPlayback
 from db_helpers import list_modes, add_mode, delete_mode
 from termcolor import colored
 from openai import AsyncOpenAI
@@ -52,7 +71,7 @@ from whisper import WhisperTranscriber
 from elevenlabs.client import AsyncElevenLabs
 from cerebras.cloud.sdk import AsyncCerebras
 from filelock import AsyncFileLock
-from collections import defaultdict
+from collections import defaultdict, deque
 from dataclasses import dataclass
 from threading import Lock
 from typing import Optional, Literal, List, Dict, Any
@@ -69,57 +88,119 @@ logging.basicConfig(level=logging.CRITICAL, format='%(asctime)s - %(levelname)s
 async def initialize_http_session():
     global global_http_session
     
-    # Configure optimized TCP connector
-    connector = aiohttp.TCPConnector(
-        ttl_dns_cache=300,     # Cache DNS lookups for 5 minutes
-        force_close=False,     # Allow connection reuse
-        enable_cleanup_closed=True
-    )
-    
-    # Create the session with optimized settings
-    global_http_session = aiohttp.ClientSession(
-        connector=connector,
-        timeout=aiohttp.ClientTimeout(total=20)
-    )
+    # Shared keep-alive pools for every upstream host, warmed up in the background
+    global_http_session = await connection_manager.start()
+    # every LLM SDK client is built now, not on its first request
+    asyncio.create_task(llm_clients.build_all())
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 CEREBRAS_API_KEY = os.getenv("CEREBRAS_API_KEY")
 PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
+# Point at tts_standin_server.py (e.g. http://127.0.0.1:8765) to run without the real API
+ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io")
+# "http": one /stream POST per sentence (tts_request), "websocket": one input-streaming socket per turn
+TTS_ENGINE = os.getenv("TTS_ENGINE", "http")
+# Second TTS provider for hedged requests and failover ("openai", or "" for ElevenLabs only)
+TTS_HEDGE_PROVIDER = os.getenv("TTS_HEDGE_PROVIDER", "openai")
+OPENAI_TTS_MODEL = os.getenv("OPENAI_TTS_MODEL", "gpt-4o-mini-tts")
+OPENAI_TTS_VOICE = os.getenv("OPENAI_TTS_VOICE", "alloy")
+# "blocking": writer thread + Pa_WriteStream; "callback": PortAudio pulls from the ring buffer
+AUDIO_ENGINE = os.getenv("AUDIO_ENGINE", "blocking")
+AUDIO_CALLBACK_FRAMES = int(os.getenv("AUDIO_CALLBACK_FRAMES", "256"))   # ~10.7 ms @ 24 kHz
+AUDIO_LATENCY_MS = float(os.getenv("AUDIO_LATENCY_MS", "40"))
+# "portaudio" (sound card), "null" (discard in real time) or "wav" (record to AUDIO_WAV_PATH)
+AUDIO_OUTPUT = os.getenv("AUDIO_OUTPUT", "portaudio")
+AUDIO_WAV_PATH = os.getenv("AUDIO_WAV_PATH", "playback.wav")
+
+connection_manager = ConnectionManager({
+    "elevenlabs": ELEVENLABS_BASE_URL,
+    "openai": "https://api.openai.com",
+    "groq": "https://api.groq.com",
+    "perplexity": "https://api.perplexity.ai",
+    "obsidian": "http://127.0.0.1:5005",
+    "midi": "http://127.0.0.1:5000",
+})
+# one shared SDK client per LLM provider, on the pooled httpx clients above
+llm_clients = LlmClientRegistry(connection_manager, {
+    "openai": OPENAI_API_KEY, "groq": GROQ_API_KEY, "perplexity": PERPLEXITY_API_KEY})
 elevenlabs_client = AsyncElevenLabs(api_key=ELEVENLABS_API_KEY)
 
 model_audio = {}  # Will store AudioSegments for each model
-audio_order = 0
 total_response_time = 0
 response_count = 0
 request_start_time = 0
 
-tts_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
-audio_ready_event = asyncio.Event()
-segment_ready_events = defaultdict()
-tts_semaphore = asyncio.Semaphore(18)
-audio_segments = defaultdict(lambda: None)
-numbered_sentences = defaultdict(lambda: None)
-midi_commands = defaultdict(lambda: None)
+tts_client = llm_clients.get("openai")
+TTS_MAX_ATTEMPTS = 3                          # a 429 puts the sentence back in the queue
+TTS_RETRY_DELAY_S = 0.25
+# Raw (untrimmed) PCM of earlier syntheses: welcome sentence, model names, recurring short replies
+tts_cache = TtsAudioCache(os.path.join(os.path.dirname(os.path.abspath(__file__)), "tts_cache"))
+# every answer (main chat, agents, search, n8n) is a ResponseSession; the arbiter picks what plays
+AUDIO_ARBITER_POLICY = os.getenv("AUDIO_ARBITER_POLICY", "serial")   # "serial" or "interleave"
+# LLM deltas waiting for text_processor / tool_processor are merged; put() only waits beyond this many bytes
+CHUNK_QUEUE_MAX_BYTES = int(os.getenv("CHUNK_QUEUE_MAX_BYTES", "4096"))
+audio_arbiter = AudioArbiter(AUDIO_ARBITER_POLICY, queue_bytes=CHUNK_QUEUE_MAX_BYTES)
+# admits TTS requests by (session's playback position, order)
+tts_scheduler = TtsScheduler(max_limit=18, rank=audio_arbiter.rank)
 note_received = asyncio.Event()
 shutdown_event = asyncio.Event()
-text_finalized = asyncio.Event()
-tool_finalized = asyncio.Event()
 priority_input_event = asyncio.Event()   
 record_key_pressed = asyncio.Event()
 record_key_released = asyncio.Event()
-text_chunk_queue = asyncio.Queue(maxsize=1)
-tool_chunk_queue = asyncio.Queue(maxsize=1)
+text_queue_turns = deque(maxlen=50)   # (session name, producer stall counts) of the last answers
+tool_queue_turns = deque(maxlen=50)   # the same for the tool call deltas of answers with tools
+tts_sentences = deque(maxlen=100)     # provider, first byte and hedge outcome of the last TTS requests
+BARGE_IN = True                     # a record key pressed while the assistant speaks stops it
+barge_in_event = threading.Event()  # set until the next turn starts; the player thread checks it between writes
+tts_tasks = set()                   # in-flight tts_request tasks
+tts_ws_sessions = set()             # open TTS websocket sessions (TTS_ENGINE == "websocket")
+PLAYBACK_CROSSFADE_MS = 30          # consecutive sentences overlap by this much; the player fades a tail nothing follows
+# one output stream for the session, opened by manage_audio_playback
+if AUDIO_OUTPUT in ("null", "wav") and AUDIO_ENGINE == "callback":
+    # the null and wav sinks are fed by the blocking writer thread; there is no callback engine for them
+    # printed: logging is set to CRITICAL above, a logging.warning would not be seen
+    print(f"⚠️ AUDIO_ENGINE=callback is ignored with AUDIO_OUTPUT={AUDIO_OUTPUT}; using the blocking engine")
+if AUDIO_OUTPUT == "null":
+    audio_player = PcmPlayer(24_000, crossfade_ms=PLAYBACK_CROSSFADE_MS, output=NullSink())
+elif AUDIO_OUTPUT == "wav":
+    audio_player = PcmPlayer(24_000, crossfade_ms=PLAYBACK_CROSSFADE_MS,
+                             output=WavFileSink(AUDIO_WAV_PATH, realtime=True))
+elif AUDIO_ENGINE == "callback":
+    audio_player = CallbackPcmPlayer(24_000, callback_frames=AUDIO_CALLBACK_FRAMES,
+                                     latency_ms=AUDIO_LATENCY_MS, crossfade_ms=PLAYBACK_CROSSFADE_MS)
+else:
+    audio_player = PcmPlayer(24_000, crossfade_ms=PLAYBACK_CROSSFADE_MS)
+EARCONS_ENABLED = os.getenv("EARCONS", "on") != "off"
+PLAYBACK_LOW_WATER_MS = 150         # queue the next segment while this much of the current one is left
 DEFAULT_FADE_MS = 30
 DEFAULT_TRIM_MS = 180
+PCM_BYTES_PER_MS = 24_000 * 2 // 1000   # 24 kHz, 16-bit, mono
+TTS_CHUNKED_PLAYBACK = True             # start playing a sentence while its PCM is still downloading
+TTS_PREBUFFER_MS = 300                  # audio buffered before playback of a chunked segment may start
+TTS_HOLDBACK_MS = 400                   # tail kept back for trim_and_fade: window searched for trailing silence
+SILENCE_THRESHOLD_DBFS = -45.0          # 10 ms frames quieter than this at the edges of a segment are trimmed
+SILENCE_MAX_LEAD_MS = 500               # leading silence is only searched for in this much audio
+# status cues, decoded and trimmed once in initialize() and played from memory on audio_player
+earcons = EarconBank(audio_player, fade_ms=DEFAULT_FADE_MS, threshold_dbfs=SILENCE_THRESHOLD_DBFS)
 # SENTENCE_END_PATTERN = regex.compile(
 #     r'(?<=[^\d\s]{2}[.!?])(?= |$)|(?<=[^\n]{2})(?=\n)|(?<=:)(?=\n)'
 # )
-SENTENCE_END_PATTERN = regex.compile(
-    r'(?<=[^\d\s]{2}[.!?])(?=(?![*_])[\s$])|(?<=[^\n]{2})(?=\n)|(?<=:)(?=\n)')
-
-
-CLEAN_PATTERN = regex.compile(r'(- )|(#)|(\*)')
+# SENTENCE_END_PATTERN = regex.compile(
+#     r'(?<=[^\d\s]{2}[.!?])(?=(?![*_])[\s$])|(?<=[^\n]{2})(?=\n)|(?<=:)(?=\n)')
+# Same rules, but no cut after "bijv.", "o.a.", "d.w.z.", "Dr." ...: lexicons of the answer's language
+SENTENCE_LANGUAGE = os.getenv("SENTENCE_LANGUAGE", "nl+en")   # "nl", "en" or "nl+en"
+SENTENCE_LANGUAGE_BY_MODE = {}      # mode -> language, e.g. {"coding": "en"}
+SENTENCE_LANGUAGE_BY_VOICE = {}     # voice name -> language, checked after the mode
+
+
+# Markdown -> TTS text: code blocks and tables become a spoken placeholder (still printed), links their label
+speech_text = MarkdownSpeechNormalizer()
+# Short sentences (list items) wait up to window_ms to share one TTS request, up to max_chars
+SENTENCE_COALESCING = CoalescePolicy(max_chars=160, short_chars=60, window_ms=300)
+# Sentence 0 may be cut at a clause boundary, or after N words / ms, to start speaking sooner
+FIRST_CLAUSE_POLICY = FirstClausePolicy(min_words=4, max_words=12, max_wait_ms=700)
 HAS_ALNUM = regex.compile(r'[a-zA-Z0-9]')
 
 
@@ -342,6 +423,92 @@ async def get_voices():
     voices = await settings_manager.get_all_voices()
     return {"voices": voices}
 
+@fastapi_app.get("/tts_cache")
+async def get_tts_cache_stats():
+    """
+    Hit/miss counters and sizes of the TTS audio cache.
+    """
+    return tts_cache.stats()
+
+@fastapi_app.get("/tts_scheduler")
+async def get_tts_scheduler_stats():
+    """
+    Concurrency limit, queue depth and per-order wait times of the TTS scheduler.
+    """
+    return tts_scheduler.stats()
+
+@fastapi_app.get("/tts_providers")
+async def get_tts_provider_stats():
+    """
+    Hedge rate, wins per provider and first-byte p95 of the TTS providers;
+    per sentence of the last answers: which provider spoke it, its first byte and whether it was hedged.
+    """
+    return {**tts_providers.stats(), "sentences": list(tts_sentences)}
+
+@fastapi_app.get("/playback")
+async def get_playback_stats():
+    """
+    Measured gaps between spoken segments, underflows and queued audio of the output stream;
+    with AUDIO_ENGINE=callback also underruns and callback jitter.
+    """
+    return audio_player.stats()
+
+@fastapi_app.get("/earcons")
+async def get_earcon_stats():
+    """
+    Loaded status cues with their length, decode time at startup and memory use.
+    """
+    return earcons.stats()
+
+@fastapi_app.get("/speech_text")
+async def get_speech_text_stats():
+    """
+    Markdown characters kept out of TTS (code blocks, tables, links), since startup and in the last turn.
+    """
+    return speech_text.stats()
+
+@fastapi_app.get("/transcript")
+async def get_transcript():
+    """
+    The latest answer, as far as it has been segmented; `finished` once its turn is finalized.
+    """
+    session = audio_arbiter.latest
+    if session is None:
+        return {"session": None, "text": "", "segments": 0, "finished": False}
+    return {"session": session.name, "text": session.transcript.text,
+            "segments": len(session.transcript), "finished": session.transcript.finished}
+
+@fastapi_app.get("/llm_clients")
+async def get_llm_client_stats():
+    """
+    Per LLM provider: latency histograms per endpoint (chat, audio; request to response headers),
+    client build time and the startup prewarm's handshake time.
+    """
+    return llm_clients.stats()
+
+@fastapi_app.get("/chunk_queues")
+async def get_chunk_queue_stats():
+    """
+    LLM deltas merged while text_processor / tool_processor were behind, and how long the streaming loops waited.
+    """
+    return {"max_bytes": CHUNK_QUEUE_MAX_BYTES,
+            "text_turns": [{"session": name, **counts} for name, counts in text_queue_turns],
+            "tool_turns": [{"session": name, **counts} for name, counts in tool_queue_turns]}
+
+@fastapi_app.get("/sessions")
+async def get_session_stats():
+    """
+    Open response sessions, the arbiter policy and the wait from opening a session to its first audio.
+    """
+    return audio_arbiter.stats()
+
+@fastapi_app.get("/connections")
+async def get_connection_stats():
+    """
+    Per-host request counts, connection reuse and prewarms of the shared HTTP pools.
+    """
+    return connection_manager.stats()
+
 @fastapi_app.post('/reload_default_prompts')
 async def reload_default_prompts(request: ReloadRequest):
     print("verzoek tot reload")
@@ -529,6 +696,12 @@ async def handle_events(message: PromptsMessage):
 
 # MODEL_ID = "eleven_multilingual_v2"
 MODEL_ID = "eleven_flash_v2_5"
+# ElevenLabs first; the alternate is also asked when ElevenLabs' first byte is later than its p95
+tts_providers = HedgedTts(
+    ElevenLabsProvider(lambda: connection_manager.session, api_key=ELEVENLABS_API_KEY,
+                       model_id=MODEL_ID, base_url=ELEVENLABS_BASE_URL),
+    OpenAITtsProvider(tts_client, model=OPENAI_TTS_MODEL, voice=OPENAI_TTS_VOICE)
+    if TTS_HEDGE_PROVIDER == "openai" and OPENAI_API_KEY else None)
 # model_options = ["chatgpt-4o-latest","gpt-4o-2024-11-20", "gpt-4o-mini", "gpt-4.5-preview"]
 model_options = ["gpt-4o-2024-11-20", "chatgpt-4o-latest", "gpt-4.1", "gpt-4.1-mini", "gpt-4.5-preview"]
 
@@ -538,12 +711,12 @@ current_model_index = 0
 async def fetch_elevenlabs_audio(text: str) -> bytes | None:
     """
     Fetch 24 kHz / 16-bit / mono PCM from ElevenLabs.
-    Suitable for  `play(pcm_bytes, 24000)`.
+    Suitable for  `audio_player.enqueue(pcm_bytes)`.
     """
     voice_id            = communication_manager.voice_id
     PCM_OUTPUT_FORMAT   = "pcm_24000"          # 24 kHz, 16-bit, mono
     ELEVENLABS_ENDPOINT = (
-        f"https://api.elevenlabs.io/v1/text-to-speech/"
+        f"{ELEVENLABS_BASE_URL}/v1/text-to-speech/"
         f"{voice_id}/stream?output_format={PCM_OUTPUT_FORMAT}"
     )
 
@@ -553,18 +726,25 @@ async def fetch_elevenlabs_audio(text: str) -> bytes | None:
     }
     payload = {"text": text, "model_id": MODEL_ID}
 
+    cache_key = TtsAudioCache.make_key(voice_id, MODEL_ID, text, output_format=PCM_OUTPUT_FORMAT)
+    cached = await asyncio.to_thread(tts_cache.get, cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        async with tts_semaphore:                       # limit concurrency
-            async with aiohttp.ClientSession() as http: # throw-away session
-                async with http.post(
-                    ELEVENLABS_ENDPOINT,
-                    headers=headers,
-                    json=payload,
-                    timeout=30
-                ) as resp:
-                    resp.raise_for_status()
-                    pcm_bytes_from_elevenlabs = await resp.read()
-                    return pcm_bytes_from_elevenlabs   # <─ raw bytes only
+        async with tts_scheduler.slot(BACKGROUND_ORDER):  # behind every sentence of an answer
+            request_started = time.perf_counter()
+            async with global_http_session.post(        # pooled, already warm
+                ELEVENLABS_ENDPOINT,
+                headers=headers,
+                json=payload,
+                timeout=30
+            ) as resp:
+                tts_scheduler.report(time.perf_counter() - request_started, resp.status)
+                resp.raise_for_status()
+                pcm_bytes_from_elevenlabs = await resp.read()
+                await asyncio.to_thread(tts_cache.put, cache_key, pcm_bytes_from_elevenlabs)
+                return pcm_bytes_from_elevenlabs   # <─ raw bytes only
 
     except aiohttp.ClientError as err:
         print(f"ElevenLabs HTTP error for '{text}': {err}")
@@ -580,6 +760,7 @@ async def generate_model_audio_segments():
     async def load_model_segment(model_name):
         segment = await fetch_elevenlabs_audio(model_name)  # Await the async function directly
         model_audio[model_name] = segment  # No need for try-except here, handled within fetch_elevenlabs_audio
+        await asyncio.to_thread(earcons.add, f"model:{model_name}", segment)   # trimmed and faded like speech
 
     # Start all tasks in parallel
     tasks = [load_model_segment(m) for m in model_options]
@@ -895,8 +1076,6 @@ async def tasks_agent():
     with a database-backed tasks manager via a PydanticAI agent. Streams output chunks
     to a text queue for real-time TTS.
     """
-    global audio_order
-
     logging.info("\nStarting Tasks Agent event listener...")
 
     # Define dependencies
@@ -990,10 +1169,8 @@ Laat prioriteit alleen zien als het relevant is.
             logging.warning("TASKS_AGENT: Empty transcription received, skipping.")
             continue
 
-        audio_order = 0
-        audio_segments.clear()
-        numbered_sentences.clear()
-        midi_commands.clear()
+        barge_in_event.clear()   # a new answer may be spoken again
+        session = open_response_session("tasks")
 
         print("\r>>>>>> Receiving... <<<<<<", end="")
 
@@ -1001,19 +1178,18 @@ Laat prioriteit alleen zien als het relevant is.
             async with tasks_agent.run_stream(user_input, deps=deps) as result:
                 async for chunk in result.stream_text(delta=True):
                     if chunk:
-                        await text_chunk_queue.put({"type": "text", "content": chunk})
+                        await session.put_text(chunk)
 
             logging.info("TASKS_AGENT: Finished streaming response.")
 
         except Exception as e:
             logging.error(f"TASKS_AGENT: Error during agent run: {e}", exc_info=True)
-            await text_chunk_queue.put({"type": "text", "content": f"\n[Agent Error: {e}]"})
+            await session.put_text(f"\n[Agent Error: {e}]")
         finally:
             print("\r" + " " * 40 + "\r", end="")
-            await text_chunk_queue.put({"type": "finalize"})
+            await session.put_finalize()
             logging.debug("TASKS_AGENT: Sent finalize signal to text queue.")
-            await text_finalized.wait()
-            text_finalized.clear()
+            await session.wait_finalized()
             logging.debug("TASKS_AGENT: Text queue consumer finalized.")
 
 def cycle_llm():
@@ -1021,18 +1197,18 @@ def cycle_llm():
     current_model_index = (current_model_index + 1) % len(model_options)
     new_model = model_options[current_model_index]
 
-    # See if its AudioSegment is ready yet
-    segment = model_audio.get(new_model)
-    if segment:
-        print(f"Switched LLM to: {new_model}")
-        # If ready, play it (blocking, but short)
-        play(segment, 24000)
-    else:
-        # If not ready or an error happened, only print
-        print(f"Switched LLM to: {new_model}")
+    print(f"Switched LLM to: {new_model}")
+    # the spoken model name once it has been synthesized, a switch tone until then
+    if not earcons.play(f"model:{new_model}"):
+        play_cue("switch")
 
 keyboard.add_hotkey('ctrl+shift+l', cycle_llm)
 
+def play_cue(name):
+    """Queue a status earcon (never blocks; plays once no speech is queued)."""
+    if EARCONS_ENABLED:
+        earcons.play(name)
+
 # async def get_dynamic_context(filename="dynamic_context.txt"):
 #     summary = await communication_manager.get_summary()
 #     try:
@@ -1090,10 +1266,7 @@ keyboard.add_hotkey('ctrl+shift+l', cycle_llm)
 
 
 def reset_chat_history():
-    global audio_order, audio_segments, numbered_sentences
-    audio_order = 0
-    audio_segments.clear()
-    numbered_sentences.clear()
+    barge_in_event.clear()   # a new answer may be spoken again
     # empty_messages = []
     # communication_manager.set_messages_sync(empty_messages)
     communication_manager.set_messages_sync([])
@@ -1344,11 +1517,6 @@ link:: journal_{timestamp_id}.json
 
 
 async def perplexity_request(llm_request):
-    global audio_order
-    audio_order = 0
-    audio_segments.clear()
-    numbered_sentences.clear()
-
     SYSTEM_PROMPT = (
         "You are an artificial intelligence assistant and you need to engage in a helpful, polite conversation with a user. \n"
         "The information density should be 'to the point' and not too detailed.\n"
@@ -1358,7 +1526,7 @@ async def perplexity_request(llm_request):
         "Finally, translate your answer to the same language as the user's question."
     )
     
-    px_client = AsyncOpenAI(api_key=PERPLEXITY_API_KEY, base_url="https://api.perplexity.ai")
+    px_client = llm_clients.get("perplexity")
     
     perplexity_messages = [
         {"role": "system", "content": SYSTEM_PROMPT},
@@ -1370,6 +1538,8 @@ async def perplexity_request(llm_request):
         messages=perplexity_messages,
         stream=True
     )
+    # opened once the stream exists: a session that is never finalized would hold up playback
+    session = open_response_session("perplexity")
 
     try:
         chunks = perplexity_response.__aiter__()
@@ -1380,22 +1550,18 @@ async def perplexity_request(llm_request):
 
                 # Push text chunks to the universal queue
                 if delta.content:
-                    await text_chunk_queue.put({
-                        "type": "text",
-                        "content": delta.content
-                    })
-                    
+                    await session.put_text(delta.content)
 
             except StopAsyncIteration:
                 break
             except asyncio.TimeoutError:
                 break
     finally:
-        await text_chunk_queue.put({"type": "finalize"})
+        await session.put_finalize()
 
     # logging.debug("Completed receiving perplexity response.")
-    full_response = "".join(numbered_sentences[i] for i in sorted(numbered_sentences.keys()))
-    return full_response
+    await session.wait_finalized()
+    return session
 
 # async def get_system_prompt(filename):
 
@@ -1442,139 +1608,176 @@ async def perplexity_request(llm_request):
 #         return f"Failed to process {filename} content."
     
 async def initialize():
-    global audio_order
-    audio_order = 0
-
     print("\r>>>>>>  Initializing...  <<<<<<", end='\r', flush=True)
     
-    # Start playing the initialization sound in a separate task
+    # decode every cue once; from here on they play from memory
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    init_audio_path = os.path.join(script_dir, 'INITIALIZING.mp3')
-    # read the whole MP3 into memory (blocking is fine – the file is tiny)
-    with open(init_audio_path, 'rb') as mp3_file:
-        first_audio_bytes = mp3_file.read()
-    
+    decode_s = await asyncio.to_thread(
+        earcons.load, {"initializing": os.path.join(script_dir, 'INITIALIZING.mp3')},
+        os.path.join(script_dir, 'earcons'))
+    logging.info(f"Earcons decoded in {decode_s * 1000:.1f} ms")
+    print(f"\r>>>>>>  Initializing...  <<<<<<  (earcons: {len(earcons.pcm)} in {decode_s * 1000:.1f} ms)",
+          end='\r', flush=True)
+    play_cue("initializing")
+
     # Prepare and start the TTS request for the welcome sentence
     sentence_order = 0
     welcome_sentence = "Hallo Alexander, waar wil je mee beginnen?"
-    numbered_sentences[sentence_order] = welcome_sentence
-    
-
-    
-    # print("Playing initialization sound...")
-
-    # await asyncio.to_thread(play(first_audio_bytes))
-    # init_sound_task = asyncio.create_task(asyncio.to_thread(play, first_audio_bytes))    
+    session = audio_arbiter.open("welcome")
+    session.sentences[sentence_order] = welcome_sentence
+    session.end(sentence_order + 1)
     
-    # Ensure the initialization sound has finished playing
-    # await init_sound_task
     # Start the TTS request and wait for it to complete
-    asyncio.create_task(tts_request(welcome_sentence, sentence_order))
+    start_tts_request(session, welcome_sentence, sentence_order)
     # print("version:", miniaudio.__version__)
     # print("from:", pathlib.Path(miniaudio.__file__).resolve())
 
     # logging.info("Initialization complete.")
 
+def sentence_boundaries():
+    """The abbreviation-aware sentence end detector for the current mode, else voice, else SENTENCE_LANGUAGE."""
+    language = (SENTENCE_LANGUAGE_BY_MODE.get(communication_manager.get_current_mode())
+                or SENTENCE_LANGUAGE_BY_VOICE.get(communication_manager.voice_name)
+                or SENTENCE_LANGUAGE)
+    return boundary_detector(language)
+
+
 def split_into_sentences(text):
     """
-    Splits the given text into sentences using regex.
-    This can be replaced with more sophisticated methods if needed.
+    Splits the given text into sentences at the same ends as text_processor
+    (abbreviations and decimals are not cut).
     """
-    sentence_endings = regex.compile(
-        r'(?<=[^\d\s]{2}[.!?])(?= |$)|(?<=[^\n]{2})(?=\n)|(?<=:)(?=\n)'
-    )
-    sentences = sentence_endings.split(text)
-    return sentences
-
-
-def trim_and_fade(pcm_bytes: bytes,
-                  *, trim_ms: int = 195, fade_ms: int = 30,
-                  sr: int = 24_000) -> bytes:
-    BYTES_PER_SAMPLE = 2
-    trim = trim_ms * sr // 1000
-    fade = fade_ms * sr // 1000
-
-    samples = np.frombuffer(pcm_bytes, dtype='<i2').copy()   # writable
-    if trim:
-        samples = samples[:-trim]
+    # sentence_endings = regex.compile(
+    #     r'(?<=[^\d\s]{2}[.!?])(?= |$)|(?<=[^\n]{2})(?=\n)|(?<=:)(?=\n)'
+    # )
+    # sentences = sentence_endings.split(text)
+    return sentence_boundaries().split(text)
 
-    if fade:
-        ramp = np.linspace(1.0, 0.0, fade, endpoint=False, dtype=np.float32)
-        samples[-fade:] = (samples[-fade:] * ramp).astype(np.int16)
 
-    return samples.tobytes()
+def trim_and_fade(pcm, *, trim_leading: bool = True):
+    """
+    Energy-based trim of leading/trailing silence + tail fade (pcm_dsp), in place when `pcm` is writable.
+    With PLAYBACK_CROSSFADE_MS the tail is left unfaded: audio_player crossfades it or fades it out.
+    """
+    return trim_silence_and_fade(pcm, fade_ms=0 if PLAYBACK_CROSSFADE_MS else DEFAULT_FADE_MS,
+                                 threshold_dbfs=SILENCE_THRESHOLD_DBFS,
+                                 trim_leading=trim_leading)
 
-async def tts_request(sentence, order):
+async def tts_request(session, sentence, order):
     voice_id = communication_manager.voice_id
     PCM_FORMAT = "pcm_24000"  # raw 24 kHz 16-bit mono
     try:
-        async with tts_semaphore:
-            url = (
-                f"https://api.elevenlabs.io/v1/text-to-speech/"
-                f"{voice_id}/stream?output_format={PCM_FORMAT}"
-            )
-            headers = {
-                "xi-api-key": ELEVENLABS_API_KEY,
-                "Content-Type": "application/json",
-            }
-
-            # Base request data
-            data = {
-                "text": sentence,
-                "model_id": MODEL_ID
-            }
-
-            # More efficient collection of previous context
-            previous_sentences = []
-            for i in range(1, 5):
-                if order >= i:
-                    prev_sentence = numbered_sentences.get(order - i)
-                    if prev_sentence is not None and audio_segments.get(order - i) != "EMPTYLINE":
-                        previous_sentences.append(prev_sentence)
-                        if len(previous_sentences) == 2:
+        for attempt in range(TTS_MAX_ATTEMPTS):
+            if attempt:
+                # back off after a 429; the scheduler has already lowered its limit
+                await asyncio.sleep(TTS_RETRY_DELAY_S * attempt)
+            async with tts_scheduler.slot(order, session):
+                # More efficient collection of previous context
+                previous_sentences = []
+                for i in range(1, 5):
+                    if order >= i:
+                        prev_sentence = session.sentences.get(order - i)
+                        if prev_sentence is not None and session.segments.get(order - i) != "EMPTYLINE":
+                            previous_sentences.append(prev_sentence)
+                            if len(previous_sentences) == 2:
+                                break
+
+                previous_text = " ".join(previous_sentences[::-1]) or None
+
+                # More efficient collection of next context
+                next_sentences = []
+                for i in range(1, 5):
+                    next_sentence = session.sentences.get(order + i)
+                    if next_sentence is not None and session.segments.get(order + i) not in ("EMPTYLINE", "COALESCED"):
+                        next_sentences.append(next_sentence)
+                        if len(next_sentences) == 2:
                             break
 
-            if previous_sentences:
-                data["previous_text"] = " ".join(previous_sentences[::-1])
-
-            # More efficient collection of next context
-            next_sentences = []
-            for i in range(1, 5):
-                next_sentence = numbered_sentences.get(order + i)
-                if next_sentence is not None and audio_segments.get(order + i) != "EMPTYLINE":
-                    next_sentences.append(next_sentence)
-                    if len(next_sentences) == 2:
-                        break
-
-            if next_sentences:
-                data["next_text"] = " ".join(next_sentences)
+                next_text = " ".join(next_sentences) or None
 
-            # Encode data using orjson and pass as bytes to 'data' parameter
-            json_payload = orjson.dumps(data)
+                cache_key = TtsAudioCache.make_key(
+                    voice_id, MODEL_ID, sentence, previous_text, next_text, PCM_FORMAT)
+                cached = await asyncio.to_thread(tts_cache.get, cache_key)
+                if cached is not None:
+                    session.segments[order] = await asyncio.to_thread(trim_and_fade, cached)
+                    return
 
-            async with global_http_session.post(
-                url,
-                headers=headers,
-                data=json_payload,
-                timeout=30
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    print(f"ElevenLabs API error: Status {response.status}, Response: {error_text}")
-                    raise Exception(f"ElevenLabs API returned status {response.status}")
-
-                # ★ grab the whole PCM buffer at once
-                pcm_data: bytes = await response.read()
+                try:
+                    audio = await tts_providers.fetch(TtsRequest(sentence, voice_id, previous_text, next_text))
+                except TtsProviderError as e:
+                    tts_scheduler.report(status=e.status)
+                    if e.status == 429 and attempt + 1 < TTS_MAX_ATTEMPTS:
+                        continue
+                    raise
+                if audio.primary_error is not None:
+                    tts_scheduler.report(status=audio.primary_error.status)
+                tts_scheduler.report(audio.first_byte_s)
+                tts_sentences.append({
+                    "session": session.name, "order": order, "provider": audio.provider,
+                    "first_byte_ms": round(audio.first_byte_s * 1000, 1), "hedged": audio.hedged,
+                    "failover": audio.primary_error is not None and not audio.hedged})
+
+                # only ElevenLabs audio is cached under the ElevenLabs voice/model key
+                if audio.provider != tts_providers.primary.name:
+                    cache_key = None
+
+                if TTS_CHUNKED_PLAYBACK:
+                    await stream_pcm_response(session, audio.chunks, order, cache_key)
+                    return
+
+                # ★ grab the whole PCM buffer at once, into one writable buffer that is trimmed in place
+                pcm_data = bytearray()
+                async for chunk in audio.chunks:
+                    pcm_data += chunk
+                if cache_key:
+                    await asyncio.to_thread(tts_cache.put, cache_key, pcm_data)
                 # apply trim + fade off the event loop
                 # off-load the CPU work:
-                pcm_data = await asyncio.to_thread(trim_and_fade, pcm_data)              
-                audio_segments[order] = pcm_data
-
-                if order == 0:
-                    audio_ready_event.set()
+                pcm_data = await asyncio.to_thread(trim_and_fade, pcm_data)
+                session.segments[order] = pcm_data
+                return
 
     except Exception as e:
         print(f"TTS API error for sentence {order}: {e}")
+        if session.segments.get(order) is None:
+            # printed without audio, so the rest of the answer (and the next session) still plays
+            session.segments[order] = "EMPTYLINE"
+
+
+async def stream_pcm_response(session, chunks, order, cache_key=None):
+    """
+    Feed streamed TTS audio (async iterator of PCM chunks) into a PcmStream
+    and hand it to playback as soon as TTS_PREBUFFER_MS of audio is buffered. The held-back tail is
+    trimmed and faded once the last chunk has arrived. A complete body is
+    stored in tts_cache under `cache_key`.
+    """
+    pcm_stream = PcmStream(
+        prebuffer_bytes=TTS_PREBUFFER_MS * PCM_BYTES_PER_MS,
+        holdback_bytes=TTS_HOLDBACK_MS * PCM_BYTES_PER_MS)
+
+    def publish():
+        if session.segments.get(order) is None:
+            # nobody reads the stream yet, so leading silence can still be dropped
+            head = pcm_stream.head(SILENCE_MAX_LEAD_MS * PCM_BYTES_PER_MS)
+            pcm_stream.drop_head(leading_silence_bytes(head, threshold_dbfs=SILENCE_THRESHOLD_DBFS,
+                                                       max_lead_ms=SILENCE_MAX_LEAD_MS))
+            session.segments[order] = pcm_stream
+
+    raw_pcm = None
+    try:
+        async for chunk in chunks:
+            pcm_stream.feed(chunk)
+            if pcm_stream.ready:
+                publish()
+        # snapshot before finish() trims the tail; trimming again on a cache hit is harmless
+        raw_pcm = pcm_stream.getvalue() if cache_key else None
+    finally:
+        # also on a broken download, so the player never waits forever
+        pcm_stream.finish(partial(trim_and_fade, trim_leading=False))
+        publish()
+
+    if cache_key and raw_pcm:
+        await asyncio.to_thread(tts_cache.put, cache_key, raw_pcm)
 
 
 # async def manage_audio_playback() -> None:
@@ -1614,155 +1817,287 @@ async def tts_request(sentence, order):
 #         await asyncio.sleep(0.05)
 
 
-async def manage_audio_playback():
-    global audio_order
-    await audio_ready_event.wait()
-    audio_ready_event.clear()
-    
-    while True:
-        while audio_segments.get(audio_order) is not None:
-            content = audio_segments[audio_order]
-
-            if content == "MIDI_COMMAND":
-                # Process MIDI command
-                midi_command = midi_commands[audio_order]
-                await process_midi_command(midi_command)
-            elif content == "EMPTYLINE":
-                print(f"\r{numbered_sentences[audio_order]}")
-            else:
-                # Process regular audio
-                if audio_order == 0:
-                    print(f"\r" + f" "*len(">>>>>>  Receiving...  <<<<<<<") + f"\r{numbered_sentences[audio_order]}")
-                
-                else:
-                    sentence = numbered_sentences[audio_order]
-                    nospace = sentence[1:] if sentence.startswith(" ") else sentence
-                    nonewline = nospace[1:] if nospace.startswith("\n") else nospace
-                    
-                    print (nonewline)
+def assistant_is_speaking():
+    return segment_playback.current is not None or bool(tts_tasks) or audio_arbiter.has_queued_audio()
 
-                await asyncio.to_thread(play, content, 24_000)
-            
-            audio_order += 1
 
-        await asyncio.sleep(0.05)
+def spoken_text(session, order, fraction):
+    """The answer up to `fraction` of segment `order` (plus the sentences merged into it), cut at a word."""
+    sentences = {i: s for i, s in session.sentences.items() if s is not None}
+    heard = "".join(sentences[i] for i in sorted(sentences) if i < order)
+
+    current = [order]
+    while session.segments.get(current[-1] + 1) == "COALESCED":
+        current.append(current[-1] + 1)
+    segment_text = "".join(sentences.get(i, "") for i in current)
+    if fraction >= 1.0:
+        return heard + segment_text
+    partial = segment_text[:int(len(segment_text) * fraction)]
+    partial = partial[:partial.rfind(" ")] if " " in partial.strip() else ""
+    return (heard + partial).rstrip() + "…"
+
+
+async def add_answer_to_history(session, text):
+    """Store a session's answer in the chat history; an interrupted one only as far as it was heard."""
+    session.history_message = await communication_manager.add_assistant_message(
+        text if session.heard_text is None else session.heard_text)
+
+
+async def barge_in(key):
+    """
+    The user started talking: stop speaking now. Cancels TTS downloads, stops
+    the player at its next write and keeps what was heard for the chat history.
+    """
+    if not BARGE_IN or barge_in_event.is_set() or not assistant_is_speaking():
+        return
+    barge_in_event.set()
+    audio_player.flush()
+    session = audio_arbiter.playing()
+    order, fraction = (session.play_order if session else 0), 0.0
+    audio_arbiter.interrupt()   # every open answer stops; the playback loop waits for a new session
+
+    for task in list(tts_tasks):
+        task.cancel()
+    for ws_session in list(tts_ws_sessions):
+        await ws_session.aclose()
+
+    if segment_playback.current is not None:
+        session, order, total_frames, playback = segment_playback.current
+        done, _ = await asyncio.wait({playback}, timeout=1.0)
+        if done and playback.exception() is None and total_frames():
+            fraction = min(1.0, playback.result() / total_frames())
+
+    if session is not None:
+        # applied to the history entry of this answer only (agent and welcome answers have none)
+        session.heard_text = spoken_text(session, order, fraction)
+        if session.history_message is not None:
+            await communication_manager.replace_assistant_message(session.history_message, session.heard_text)
+    logging.info(f"Barge-in ({key}) at sentence {order} of {session.name if session else '-'}, {fraction:.0%} played")
+
+
+# manage_audio_playback: the arbiter's segments through audio_player, printed as they start (segment_playback.py)
+segment_playback = SegmentPlayback(audio_player, audio_arbiter,
+                                   low_water_bytes=PLAYBACK_LOW_WATER_MS * PCM_BYTES_PER_MS,
+                                   interrupt=barge_in_event,
+                                   on_midi=lambda event: process_midi_command(event))   # defined below
+
 
-async def process_midi_as_audio(midi_command, order):
-    audio_segments[order] = "MIDI_COMMAND"
-    # Store the actual command for processing during playback
-    midi_commands[order] = midi_command
-    if order == 0:
-        audio_ready_event.set()
+async def manage_audio_playback():
+    await asyncio.to_thread(audio_player.start)
+    await segment_playback.run()
+
+async def process_midi_as_audio(session, midi_event, order):
+    # Store the parsed MidiEvent before the marker wakes playback
+    session.midi_events[order] = midi_event
+    session.segments[order] = "MIDI_COMMAND"
 
-async def process_empty_sentence(order):
-    audio_segments[order] = "EMPTYLINE"
+async def process_empty_sentence(session, order):
+    session.segments[order] = "EMPTYLINE"
     # logging.debug(f"Order {order} flagged as EMPTYLINE.")
 
-async def text_processor():
-    text_buffer = ""
+def start_tts_request(session, sentence, order):
+    """tts_request as a task in tts_tasks, so barge_in() can cancel it."""
+    task = asyncio.create_task(tts_request(session, sentence, order))
+    tts_tasks.add(task)
+    task.add_done_callback(tts_tasks.discard)
+
+
+def open_response_session(name, tools=False):
+    """A new answer with its own text processor (and tool processor); the arbiter decides when its audio plays."""
+    session = audio_arbiter.open(name, interrupted=barge_in_event.is_set())
+    session.processor = asyncio.create_task(text_processor(session))
+    if tools:
+        session.tool_processor = asyncio.create_task(tool_processor(session))
+    return session
+
+async def text_processor(session):
+    """Segments one answer (a ResponseSession) into numbered sentences, TTS requests and MIDI events."""
+    boundaries = sentence_boundaries()                    # chosen once per answer (mode / voice)
+    segmenter = SentenceSegmenter(boundaries, boundaries.context_chars)   # text of the unfinished sentence
+    midi_tags = SystemTagTokenizer()                      # [SYSTEM] tags are cut out before segmentation
+    normalizer = MarkdownSpeechNormalizer()               # code block / table state of this answer
     sentence_order = 0
+    tts_ws_session = None   # only used when TTS_ENGINE == "websocket"
+    turn_started_at = None  # arrival of the turn's first delta, for the first-clause deadline
+    segment_lock = asyncio.Lock()  # the first-clause deadline task also cuts the segmenter's text
+
+    async def request_tts_group(clean_text, order, covered_orders):
+        # the audio of `order` also speaks these sentences; playback prints them with it
+        for covered in covered_orders:
+            session.segments[covered] = "COALESCED"
+        await request_tts(clean_text, order)
+
+    # the websocket engine already sends everything over one socket
+    coalescer = SentenceCoalescer(
+        request_tts_group,
+        SENTENCE_COALESCING if TTS_ENGINE != "websocket" else CoalescePolicy(enabled=False))
+
+    async def request_tts(clean_sentence, order):
+        nonlocal tts_ws_session
+        if barge_in_event.is_set() or session.interrupted:
+            return  # the user is talking; this answer is not spoken any further
+        if TTS_ENGINE != "websocket":
+            start_tts_request(session, clean_sentence, order)
+            return
+
+        if tts_ws_session is None:
+            open_tts_ws_session()
+        pcm_stream = PcmStream()
+        session.segments[order] = pcm_stream
+        # flush the first sentence so its audio starts without waiting for more text
+        await tts_ws_session.send_text(clean_sentence, pcm_stream, flush=order == 0)
+
+    def open_tts_ws_session():
+        nonlocal tts_ws_session
+        tts_ws_session = ElevenLabsWebSocketSession(
+            global_http_session,
+            voice_id=communication_manager.voice_id,
+            model_id=MODEL_ID,
+            api_key=ELEVENLABS_API_KEY,
+            base_url=ELEVENLABS_BASE_URL)
+        tts_ws_session.open()
+        ws_session = tts_ws_session
+        tts_ws_sessions.add(ws_session)
+        asyncio.create_task(ws_session.wait_closed()).add_done_callback(lambda _: tts_ws_sessions.discard(ws_session))
 
     async def handle_text_chunk(text_content):
-        nonlocal text_buffer, sentence_order
-        # Add the new chunk to the buffer
-        text_buffer += text_content
+        nonlocal turn_started_at
+        # Open the turn's TTS socket on the first delta, so the handshake overlaps the first sentence
+        if TTS_ENGINE == "websocket" and tts_ws_session is None:
+            open_tts_ws_session()
+
+        if turn_started_at is None:
+            turn_started_at = time.perf_counter()
+            if FIRST_CLAUSE_POLICY.enabled:
+                asyncio.create_task(first_clause_deadline(turn_started_at))
+
+        async with segment_lock:
+            # Plain text goes to the segmenter, complete MIDI tags take their place in the order
+            for item in midi_tags.feed(text_content):
+                if isinstance(item, MidiEvent):
+                    await handle_midi_event(item)
+                else:
+                    segmenter.append(item)
+            
+            # Now check for complete sentences (only the new text is scanned)
+            for sentence in segmenter.sentences():
+                await emit_sentence(sentence)
+
+            await try_first_clause_cut()
+
+    async def emit_sentence(sentence):
+        nonlocal sentence_order
+        session.transcript.append(sentence)
+        # Clean the sentence for TTS
+        clean_sentence = normalizer.normalize(sentence)
         
-        # Process any complete MIDI commands first
-        await extract_and_handle_midi_commands()
+        # Store the original sentence
+        if not HAS_ALNUM.search(sentence):
+            session.sentences[sentence_order] = sentence.strip()
+        else:
+            # code / table rows too: the line break and indent stay, the printing drops the break
+            session.sentences[sentence_order] = sentence
         
-        # Now check for complete sentences
-        match = SENTENCE_END_PATTERN.search(text_buffer)
-        while match:
-            # Extract the sentence
-            sentence = text_buffer[:match.end()]
-            text_buffer = text_buffer[match.end():]
-
-            # Clean the sentence for TTS
-            clean_sentence = CLEAN_PATTERN.sub(lambda m: "'" if m.group(0) == "*" else "", sentence).strip()
-            
-            # Store the original sentence
-            numbered_sentences[sentence_order] = sentence.strip() if not HAS_ALNUM.search(sentence) else sentence
-            # segment_ready_events[sentence_order] = asyncio.Event()
-            
-            # Process the sentence immediately - don't batch or delay
-            if not HAS_ALNUM.search(sentence):
-                # Empty line or non-alphanumeric
-                asyncio.create_task(process_empty_sentence(sentence_order))
-            else:
-                # Regular sentence - send for TTS
-                asyncio.create_task(tts_request(clean_sentence, sentence_order))
-                
-                # Special handling for first sentence (order 0)
-                if sentence_order == 0:
-                    # Look ahead for context
-                    numbered_sentences[sentence_order+1] = text_buffer
-            
-            # Move to next sentence
-            sentence_order += 1
-            
-            # Check for more sentences
-            match = SENTENCE_END_PATTERN.search(text_buffer)
+        # Process the sentence immediately - don't batch or delay
+        if not HAS_ALNUM.search(clean_sentence):
+            # Empty line, non-alphanumeric, or only printed (code block, table)
+            await coalescer.flush()
+            asyncio.create_task(process_empty_sentence(session, sentence_order))
+        else:
+            # Regular sentence - send for TTS (short ones may be merged with the next)
+            await coalescer.add(clean_sentence, sentence_order)
+        
+        # Move to next sentence
+        sentence_order += 1
+
+    async def try_first_clause_cut():
+        """Cut sentence 0 early when FIRST_CLAUSE_POLICY allows it; later sentences are never cut."""
+        if sentence_order != 0 or turn_started_at is None or not segmenter:
+            return
+        elapsed_ms = (time.perf_counter() - turn_started_at) * 1000
+        text_buffer = segmenter.text
+        cut = find_first_clause_cut(text_buffer, elapsed_ms, FIRST_CLAUSE_POLICY)
+        if cut:
+            segmenter.reset(text_buffer[cut:])
+            await emit_sentence(text_buffer[:cut])
+
+    async def first_clause_deadline(started_at):
+        # without this, a stalled stream would leave a half-written first sentence waiting
+        await asyncio.sleep(FIRST_CLAUSE_POLICY.max_wait_ms / 1000)
+        async with segment_lock:
+            if turn_started_at == started_at:   # still the same turn
+                await try_first_clause_cut()
 
     async def finalize_text_buffer():
-        nonlocal text_buffer, sentence_order
+        nonlocal sentence_order
+        segmenter.append(midi_tags.flush())   # an unfinished tag is spoken as text
+        for sentence in segmenter.sentences():
+            await emit_sentence(sentence)
+        text_buffer = segmenter.text
         if text_buffer.strip():
             # Process any remaining text in the buffer
-            numbered_sentences[sentence_order] = text_buffer
-            clean_sentence = CLEAN_PATTERN.sub(lambda m: "'" if m.group(0) == "*" else "", text_buffer).strip()
+            session.transcript.append(text_buffer)
+            session.sentences[sentence_order] = text_buffer
+            clean_sentence = normalizer.normalize(text_buffer)
             
-            if not HAS_ALNUM.search(text_buffer):
-                # If sentence starts with newline, trim it
-                numbered_sentences[sentence_order] = (
-                    numbered_sentences[sentence_order][1:]
-                    if numbered_sentences[sentence_order].startswith("\n")
-                    else numbered_sentences[sentence_order]
-                )
-                asyncio.create_task(process_empty_sentence(sentence_order))
+            if not HAS_ALNUM.search(clean_sentence):
+                await coalescer.flush()
+                asyncio.create_task(process_empty_sentence(session, sentence_order))
             else:
-                asyncio.create_task(tts_request(clean_sentence, sentence_order))
+                await coalescer.add(clean_sentence, sentence_order)
             sentence_order += 1
-        text_buffer = ""
-
-    async def extract_and_handle_midi_commands():
-        nonlocal text_buffer, sentence_order
-        while '[SYSTEM]' in text_buffer and '[/SYSTEM]' in text_buffer:
-            start_idx = text_buffer.find('[SYSTEM]')
-            end_idx = text_buffer.find('[/SYSTEM]') + len('[/SYSTEM]')
-            pre_text = text_buffer[:start_idx]
-            
-            # Process any text before the MIDI command
-            if pre_text:
-                numbered_sentences[sentence_order] = pre_text
-                clean_text = CLEAN_PATTERN.sub(lambda m: "'" if m.group(0) == "*" else "", pre_text).strip()
-                segment_ready_events[sentence_order] = asyncio.Event()
-                asyncio.create_task(tts_request(clean_text, sentence_order))
-                sentence_order += 1
-                
-            # Process the MIDI command
-            midi_command = text_buffer[start_idx:end_idx]
-            numbered_sentences[sentence_order] = midi_command
-            segment_ready_events[sentence_order] = asyncio.Event()
-            asyncio.create_task(process_midi_as_audio(midi_command, sentence_order))
-            sentence_order += 1
-            
-            # Update the buffer
-            text_buffer = text_buffer[end_idx:].lstrip()
+        await coalescer.flush()
+        segmenter.reset()
+        session.transcript.finish()
+
+    async def handle_midi_event(event):
+        nonlocal sentence_order
+        # the sentences before the tag go first, then the unfinished one as a segment of its own
+        for sentence in segmenter.sentences():
+            await emit_sentence(sentence)
+        pre_text = segmenter.text
+        segmenter.reset()
+        if pre_text.strip():
+            await emit_sentence(pre_text)
+        await coalescer.flush()  # the command must stay behind the sentences before it
+
+        session.transcript.append(event.raw)
+        session.sentences[sentence_order] = event.raw
+        asyncio.create_task(process_midi_as_audio(session, event, sentence_order))
+        sentence_order += 1
+
+    # Main loop: the deltas of this answer, until its finalize
+    try:
+        while True:
+            item = await session.text_queue.get()
+            if item["type"] == "finalize":
+                async with segment_lock:
+                    await finalize_text_buffer()
+                turn_started_at = None
+                sentences, requests = coalescer.reset_counts()
+                markdown = normalizer.end_turn()
+                speech_text.record_turn(markdown)
+                queue = session.text_queue.end_turn()
+                text_queue_turns.append((session.name, queue))
+                # not printed: playback is still writing this turn's sentences to the console
+                logging.info(f"Turn ({session.name}): {sentences} sentences in {requests} TTS requests, "
+                             f"{markdown['chars_saved']} of {markdown['chars_in']} characters not synthesized "
+                             f"({markdown['code_blocks']} code blocks, {markdown['tables']} tables, {markdown['links']} links), "
+                             f"{queue['merged']} of {queue['puts']} deltas merged, producer stalled {queue['stall_ms']:.1f} ms")
+                return
+            elif item["type"] == "text":
+                await handle_text_chunk(item["content"])
+    finally:
+        if tts_ws_session is not None:
+            # remaining audio keeps arriving; the socket closes after its final frame
+            await tts_ws_session.close_input()
+        # playback moves on to the next session after the last order of this one
+        session.end(sentence_order)
+        session.finalized.set()
 
-    # Main loop to process items from the queue
-    while True:
-        item = await text_chunk_queue.get()
-        if item["type"] == "finalize":
-            await finalize_text_buffer()
-            text_buffer = ""
-            sentence_order = 0
-            # Signal the finalization is complete
-            text_finalized.set()
-        elif item["type"] == "text":
-            await handle_text_chunk(item["content"])
-        text_chunk_queue.task_done()
-
-
-async def tool_processor():
+
+async def tool_processor(session):
+    """Assembles the tool calls of one answer (a ResponseSession) from their deltas and runs them."""
     tool_call_buffer = defaultdict(lambda: {"name": "", "arguments": ""})
     
     async def handle_tool_call(tool_calls, is_complete):
@@ -1837,20 +2172,22 @@ async def tool_processor():
                 
         tool_call_buffer.pop(call_index, None)
 
-    while True:
-        item = await tool_chunk_queue.get()
-        
-        if item["type"] == "finalize":
-            # Process and clear all remaining items in the buffer
-            for call_index in list(tool_call_buffer.keys()):
-                await finalize_tool_call(call_index)
-            tool_call_buffer.clear()  # More efficient than reassigning
-            tool_finalized.set()
-            
-        elif item["type"] == "tool":
-            await handle_tool_call(item["tool_calls"], item.get("is_complete", False))
-            
-        tool_chunk_queue.task_done()
+    try:
+        while True:
+            item = await session.tool_queue.get()
+
+            if item["type"] == "finalize":
+                # Process and clear all remaining items in the buffer
+                for call_index in list(tool_call_buffer.keys()):
+                    await finalize_tool_call(call_index)
+                tool_call_buffer.clear()
+                tool_queue_turns.append((session.name, session.tool_queue.end_turn()))
+                return
+
+            elif item["type"] == "tool":
+                await handle_tool_call(item["tool_calls"], item.get("is_complete", False))
+    finally:
+        session.tools_finalized.set()
 
 async def obsidian_agent():
     """
@@ -1860,13 +2197,13 @@ async def obsidian_agent():
     In the future I want to have the option to let the agent reload the system prompt just 
     after receiving user input and before doing the API call
     """
-    global audio_order, global_http_session
+    global global_http_session
     obsidian_agent_prompt = await prompt_manager.get_system_prompt("obsidian")
 
 
     logging.info("\nStarting idea event listener...")
     # obsidian_agent_client = AsyncCerebras(api_key=CEREBRAS_API_KEY)
-    obsidian_agent_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+    obsidian_agent_client = llm_clients.get("openai")
     while True:
         # Wait for transcription using obsidian_agent method
         user_input = await whisper_transcriber.transcript_to_obsidian_agent()
@@ -1878,10 +2215,7 @@ async def obsidian_agent():
             logging.error("Empty transcription received, skipping Obsidian agent")
             continue
 
-        audio_order = 0
-        audio_segments.clear()
-        numbered_sentences.clear()
-        midi_commands.clear()
+        barge_in_event.clear()   # a new answer may be spoken again
         messages = await communication_manager.get_messages()
 
         # take only up to the last 5 exchanges in the messages list
@@ -1911,6 +2245,7 @@ async def obsidian_agent():
         #         top_p=0,
         #         stream=True
         #     )
+        session = open_response_session("obsidian", tools=True)
 
         print("\r>>>>>>  Receiving...  <<<<<<", end="")
 
@@ -1928,36 +2263,22 @@ async def obsidian_agent():
                 finish_reason = chunk.choices[0].finish_reason
 
                 if delta.content:
-                    await text_chunk_queue.put({"type": "text", "content": delta.content})
+                    await session.put_text(delta.content)
 
                 if delta.tool_calls:
                     is_complete = bool(finish_reason and finish_reason == 'tool_call')
-                    await tool_chunk_queue.put({
-                        "type": "tool",
-                        "tool_calls": delta.tool_calls,
-                        "is_complete": is_complete
-                    })
+                    await session.put_tool(delta.tool_calls, is_complete)
 
                 if finish_reason is not None:
                     break
 
         finally:
-            # Instead of sending an 'end' that stops the consumer, send a 'finalize' message.
-            await asyncio.gather(
-                text_chunk_queue.put({"type": "finalize"}),
-                tool_chunk_queue.put({"type": "finalize"})
-            )
-            # Wait until the consumer signals finalization is complete
-            await asyncio.gather(text_finalized.wait(), tool_finalized.wait())
-            text_finalized.clear()
-            tool_finalized.clear()
+            # finalizes this answer's text and tool processors; waits until both are done
+            await session.put_finalize()
+            await session.wait_finalized()
 
 async def chat_with_llm(client, messages):
-    global audio_order
-    audio_order = 0
-    audio_segments.clear()
-    numbered_sentences.clear()
-    midi_commands.clear()
+    barge_in_event.clear()   # a new answer may be spoken again
 
     chosen_model = model_options[current_model_index]
     call_params = dict(params_no_tools) if chosen_model == "chatgpt-4o-latest" else dict(params_with_tools)
@@ -1971,6 +2292,7 @@ async def chat_with_llm(client, messages):
         messages=combined_messages,
         **call_params
     )
+    session = open_response_session("main", tools=True)
 
     print("\r>>>>>>  Receiving...  <<<<<<", end="")
 
@@ -1984,56 +2306,46 @@ async def chat_with_llm(client, messages):
             except asyncio.TimeoutError:
                 break
 
+            # a record key held while the answer streams in (the main loop is not recording yet)
+            if BARGE_IN and any(event.is_set() for event in whisper_transcriber.recording_events.values()):
+                await barge_in("record key")
+            if barge_in_event.is_set():
+                await chat_completion.close()   # stop generating what will not be spoken
+                break
+
             delta = chunk.choices[0].delta
             finish_reason = chunk.choices[0].finish_reason
 
             if delta.content:
-                await text_chunk_queue.put({"type": "text", "content": delta.content})
+                await session.put_text(delta.content)
 
             if delta.tool_calls:
                 is_complete = bool(finish_reason and finish_reason == 'tool_call')
-                await tool_chunk_queue.put({
-                    "type": "tool",
-                    "tool_calls": delta.tool_calls,
-                    "is_complete": is_complete
-                })
+                await session.put_tool(delta.tool_calls, is_complete)
 
             if finish_reason is not None:
                 break
 
     finally:
-        # Instead of sending an 'end' that stops the consumer, send a 'finalize' message.
-        await asyncio.gather(
-            text_chunk_queue.put({"type": "finalize"}),
-            tool_chunk_queue.put({"type": "finalize"})
-        )
-        # Wait until the consumer signals finalization is complete
-        await asyncio.gather(text_finalized.wait(), tool_finalized.wait())
-        text_finalized.clear()
-        tool_finalized.clear()
-        
-    full_response = "".join(
-        numbered_sentences[i] for i in sorted(numbered_sentences.keys()) if numbered_sentences[i] is not None
-        )
+        # finalizes this answer's text and tool processors; waits until both are done
+        await session.put_finalize()
+        await session.wait_finalized()
 
-    return full_response
+    await add_answer_to_history(session, session.transcript.text)   # finalized above
+    return session.transcript.text
 
 # --- Process Structured Output ---
 async def process_structured_output(function_name, function_args):
-    
-    global audio_order
-    audio_order = 0
-    audio_segments.clear()
-    numbered_sentences.clear()
-    
+    # the answers of these tools are response sessions of their own, played after the current one;
+    # barge_in_event is left alone: after a barge-in their session opens interrupted and stays silent
     if function_name == "perplexity_tool":
         print(f"\r{' ' * len('>>>>>>  Receiving...  <<<<<<<')}\r📡🌎🔍: Searching the web...", end="")
 
         if isinstance(function_args, str):
             function_args = json.loads(function_args)
         search_query = function_args.get("search_query", "")
-        response_text = await perplexity_request(search_query)
-        await communication_manager.add_assistant_message(response_text)
+        session = await perplexity_request(search_query)
+        await add_answer_to_history(session, session.transcript.text)
         return
 
     if function_name == "n8n_tool":
@@ -2050,17 +2362,17 @@ async def process_structured_output(function_name, function_args):
                     if resp.status == 200:
                         n8n_response = await resp.text()
                         sentences = split_into_sentences(n8n_response)
+                        session = audio_arbiter.open("n8n", interrupted=barge_in_event.is_set())
             
                         for sentence_order, sentence in enumerate(sentences):
 
-                            numbered_sentences[sentence_order] = sentence
+                            session.sentences[sentence_order] = sentence
                             clean_sentence = sentence.replace("- ", "").replace("#", "").replace("*", "'").strip()
                             if not any(char.isalnum() for char in sentence):
-                                segment_ready_events[sentence_order] = asyncio.Event()
-                                asyncio.create_task(process_empty_sentence(sentence_order))
-                            else:
-                                segment_ready_events[sentence_order] = asyncio.Event()
-                                asyncio.create_task(tts_request(clean_sentence, sentence_order))
+                                asyncio.create_task(process_empty_sentence(session, sentence_order))
+                            elif not session.interrupted:   # opened during a barge-in: never played
+                                start_tts_request(session, clean_sentence, sentence_order)
+                        session.end(len(sentences))
 
                     else:
                         logging.error(f"Webhook returned status code {resp.status}")
@@ -2102,71 +2414,30 @@ async def process_structured_output(function_name, function_args):
 
     return
 
-async def process_midi_command(midi_message):
+async def process_midi_command(event: MidiEvent):
     """
-    Extracts the MIDI note or command from the LLM response and sends it to the Flask server.
-
-    Args:
-        midi_message (str): The response text from the LLM containing the MIDI command.
+    Sends the MIDI note or command of a [SYSTEM] tag (parsed by midi_tags while it streamed in)
+    to the Flask server.
     """
     global midi_details
-    # Log the entire response for debugging
-    # logging.debug(f"Entire response: {midi_message}")
-
-    # Extract the note or command using regex
-    note_match = regex.search(r'\[SYSTEM\] \[MIDI\] \[note=(.*?)\] \[/SYSTEM\]', midi_message)
-    command_match = regex.search(r'\[SYSTEM\] \[MIDI\] \[command=(.*?)\] \[/SYSTEM\]', midi_message)
-
-    if note_match and note_match.group(1):
-        note = note_match.group(1)
-        # logging.debug(f"Extracted note: {note}")
-
-        # Prepare the query parameters
-        params = {
-            'note': note
-        }
-
-        # URL of the Flask server
-        flask_url = 'http://127.0.0.1:5000/play'
-
-        try:
-            async with global_http_session.post(flask_url, params=params) as resp:
-                print("\r🎵                               ", flush=True)
-                if resp.status == 200:
-                    midi_details = await resp.json()
-                    # logging.info(f"Successfully sent note '{note}' to Flask server.")
-                else:
-                    logging.error(f"Failed to send note to Flask server. Status code: {resp.status}")
-
-        except aiohttp.ClientError as e:
-            logging.error(f"HTTP request to Flask server failed: {e}")
-
-    elif command_match and command_match.group(1):
-        command = command_match.group(1)
-        # logging.debug(f"Extracted command: {command}")
-
-        # Prepare the query parameters
-        params = {
-            'command': command
-        }
-
-        # URL of the Flask server
-        flask_url = 'http://127.0.0.1:5000/play'
+    if event.kind is None:
+        logging.warning(f"No valid MIDI note or command found in the response: {event.raw}")
+        return
 
-        try:
-            async with global_http_session.post(flask_url, params=params) as resp:
-                print("\r🎵                               ", flush=True)
-                if resp.status == 200:
-                        midi_details = await resp.json()
-                        # logging.info(f"Successfully sent command '{command}' to Flask server.")
-                else:
-                    logging.error(f"Failed to send command to Flask server. Status code: {resp.status}")
+    # URL of the Flask server
+    flask_url = 'http://127.0.0.1:5000/play'
 
-        except aiohttp.ClientError as e:
-            logging.error(f"HTTP request to Flask server failed: {e}")
+    try:
+        async with global_http_session.post(flask_url, params={event.kind: event.value}) as resp:
+            print("\r🎵                               ", flush=True)
+            if resp.status == 200:
+                midi_details = await resp.json()
+                # logging.info(f"Successfully sent {event.kind} '{event.value}' to Flask server.")
+            else:
+                logging.error(f"Failed to send {event.kind} to Flask server. Status code: {resp.status}")
 
-    else:
-        logging.warning("No valid MIDI note or command found in the response.")
+    except aiohttp.ClientError as e:
+        logging.error(f"HTTP request to Flask server failed: {e}")
 
 class CommunicationManager:
     def __init__(self):
@@ -2236,9 +2507,17 @@ class CommunicationManager:
         async with self._lock:
             self.messages.append({"role": "user", "content": user_input})
 
-    async def add_assistant_message(self, assistant_output: str) -> None:
+    async def add_assistant_message(self, assistant_output: str) -> dict[str, str]:
+        async with self._lock:
+            message = {"role": "assistant", "content": assistant_output}
+            self.messages.append(message)
+            return message
+
+    async def replace_assistant_message(self, message: dict[str, str], assistant_output: str) -> None:
+        """Used after a barge-in: the stored answer becomes the part that was actually spoken."""
         async with self._lock:
-            self.messages.append({"role": "assistant", "content": assistant_output})
+            if any(m is message for m in self.messages):   # not if the conversation was replaced since
+                message["content"] = assistant_output
 
     async def get_messages(self) -> list[dict[str, str]]:
         async with self._lock:
@@ -2786,7 +3065,7 @@ async def main():
     
     # os.system("cls")
 
-    client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+    client = llm_clients.get("openai")
     
     # Start de taak bij het opstarten
     asyncio.create_task(generate_model_audio_segments())
@@ -2802,8 +3081,8 @@ async def main():
             await communication_manager.process_incoming_message()
 
             print("\n>>>>>>  Thinking...  <<<<<<", end='')
-            response_text = await chat_with_llm(client, await communication_manager.get_messages())
-            await communication_manager.add_assistant_message(response_text)
+            play_cue("thinking")
+            await chat_with_llm(client, await communication_manager.get_messages())   # adds its answer to the history
 
     finally:
         logging.warning("Main loop finished.")
@@ -2815,8 +3094,7 @@ async def start_uvicorn():
 
 # Add this near the end of your file, before the if __name__ == "__main__": block
 async def http_session_shutdown():
-    if 'global_http_session' in globals() and not global_http_session.closed:
-        await global_http_session.close()
+    await connection_manager.close()
 
 def start_voice_ui():
     global root
@@ -2826,7 +3104,20 @@ def start_voice_ui():
     
 if __name__ == "__main__":
     winloop.install()
-    whisper_transcriber = WhisperTranscriber()
+    whisper_transcriber = WhisperTranscriber(
+        openai_client=llm_clients.get("openai"),
+        groq_client=llm_clients.get("groq"))
+    # the user is talking: stop speaking, and make sure transcription, LLM and TTS connections
+    # are warm when they stop
+    async def on_recording_start(key):
+        async def listening_cue():
+            await barge_in(key)     # first: the cue plays once the flushed ring is empty
+            play_cue("listening")
+        await asyncio.gather(listening_cue(), connection_manager.prewarm_idle())
+    whisper_transcriber.on_recording_start = on_recording_start
+    async def on_transcribing():
+        play_cue("transcribing")
+    whisper_transcriber.on_transcribing = on_transcribing
     communication_manager = CommunicationManager()
     prompt_manager = PromptManager()
     prompt_manager.load_default_prompts_sync()
@@ -2844,8 +3135,6 @@ if __name__ == "__main__":
             obsidian_agent_task = asyncio.create_task(obsidian_agent())
             save_idea_event_task = asyncio.create_task(save_idea_event())
             save_journal_event_task = asyncio.create_task(save_journal_event())
-            text_consumer_task = asyncio.create_task(text_processor())
-            tool_consumer_task = asyncio.create_task(tool_processor())
             tasks_agent_task = asyncio.create_task(tasks_agent())
 
             async def shutdown_gui_when_done():
@@ -2865,11 +3154,13 @@ if __name__ == "__main__":
             # Cancel alle taken
             tasks = [
                 server, playback_task, obsidian_agent_task, tasks_agent_task, save_idea_event_task, save_journal_event_task,
-                main_task, text_consumer_task, tool_consumer_task, gui_shutdown_task]
+                main_task, gui_shutdown_task]
             for task in tasks:
                 task.cancel()
 
             await asyncio.gather(*tasks, return_exceptions=True)
+            audio_player.flush()
+            await asyncio.to_thread(audio_player.stop)
             await http_session_shutdown()
             sys.exit(0)
     asyncio.run(run_all())
@@ -0,0 +1,117 @@
+"""
+audio_sinks.py
+Output backends for PcmPlayer that need no audio hardware.
+
+A sink is what the player's writer thread hands blocks to:
+
+  open(sample_rate, channels)
+  write(view, frames) -> bool    a memoryview into the player's ring; blocks like a device
+                                 would; True if it ran dry before this write
+  abort()                        drop what the "device" still holds (flush)
+  close()
+
+PortAudioSink (portaudio_pcm_player) is the real device. NullSink consumes
+audio at the sample rate on a simulated clock, so the player behaves as it
+does against a sound card; WavFileSink also records what would have been
+heard, including the silence when the device ran dry.
+"""
+from __future__ import annotations
+
+import time
+import wave
+from collections import deque
+
+
+class NullSink:
+    """
+    Discards audio at real-time speed. `device_buffer_ms` is how far ahead
+    of the simulated playback position a write may run before it blocks,
+    like the buffer of a sound card. With realtime=False writes return at
+    once (fast offline rendering).
+    """
+
+    def __init__(self, *, realtime: bool = True, device_buffer_ms: float = 40.0):
+        self.realtime = realtime
+        self.device_buffer_s = device_buffer_ms / 1000
+        self.sample_rate = 24_000
+        self.frame_bytes = 2
+        self.frames = 0
+        self.underflows = 0
+        self.starved_s = 0.0                    # time the device played silence between writes
+        self.run_starts = deque(maxlen=1000)    # perf_counter() when audio became audible after silence
+        self._play_until: float | None = None   # when the audio written so far has been played
+
+    def open(self, sample_rate: int, channels: int) -> None:
+        self.sample_rate = sample_rate
+        self.frame_bytes = 2 * channels
+
+    def write(self, view: memoryview, frames: int) -> bool:
+        now = time.perf_counter()
+        underflowed = False
+        if self._play_until is None or now >= self._play_until:
+            if self._play_until is not None:
+                underflowed = True
+                self.underflows += 1
+                self.starved_s += now - self._play_until
+                self._silence(now - self._play_until)
+            self.run_starts.append(now)
+            self._play_until = now
+        self._play_until += frames / self.sample_rate
+        self.frames += frames
+        self._consume(view, frames)
+
+        if self.realtime:
+            wait = self._play_until - self.device_buffer_s - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+        return underflowed
+
+    def abort(self) -> None:
+        self._play_until = None
+
+    def close(self) -> None:
+        pass
+
+    def _consume(self, view: memoryview, frames: int) -> None:
+        pass
+
+    def _silence(self, seconds: float) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "frames": self.frames,
+            "underflows": self.underflows,
+            "starved_s": round(self.starved_s, 3),
+        }
+
+
+class WavFileSink(NullSink):
+    """
+    NullSink that writes what was played to a 16-bit WAV file. In realtime
+    mode the stretches where the device ran dry are written as silence.
+    """
+
+    def __init__(self, path: str, *, realtime: bool = False, device_buffer_ms: float = 40.0):
+        super().__init__(realtime=realtime, device_buffer_ms=device_buffer_ms)
+        self.path = path
+        self._wav: wave.Wave_write | None = None
+
+    def open(self, sample_rate: int, channels: int) -> None:
+        super().open(sample_rate, channels)
+        self._wav = wave.open(self.path, "wb")
+        self._wav.setnchannels(channels)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(sample_rate)
+
+    def _consume(self, view: memoryview, frames: int) -> None:
+        self._wav.writeframesraw(view[:frames * self.frame_bytes])
+
+    def _silence(self, seconds: float) -> None:
+        if self.realtime:
+            self._wav.writeframesraw(bytes(int(seconds * self.sample_rate) * self.frame_bytes))
+
+    def close(self) -> None:
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
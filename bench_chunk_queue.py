@@ -0,0 +1,83 @@
+"""
+bench_chunk_queue.py
+Producer stall of the LLM streaming loop: asyncio.Queue(maxsize=1) against
+CoalescingChunkQueue.
+
+Recorded assistant answers from events/states/ are replayed as LLM streams
+(one ~4-character delta every --interval-ms) into a queue. The consumer
+segments them like text_processor and spends --sentence-ms per sentence
+awaiting TTS hand-off (coalescer, websocket send). With maxsize=1 the
+stream is read only as fast as the consumer takes deltas; the coalescing
+queue merges the deltas that arrive meanwhile.
+
+  stall      total time `put` waited, per turn
+  read       first to last delta read off the "network"
+  done       until the consumer has segmented the last delta
+  items      queue items the consumer got (deltas after merging)
+
+Run:  python bench_chunk_queue.py --turns 6 --interval-ms 2 --sentence-ms 8
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from chunk_queue import CoalescingChunkQueue
+from recorded_corpus import iter_deltas, load_assistant_messages
+from sentence_boundaries import SentenceBoundaryDetector
+from sentence_segmenter import SentenceSegmenter
+
+
+async def run_turn(queue, text: str, interval_s: float, sentence_s: float) -> dict:
+    boundaries = SentenceBoundaryDetector()
+    items = 0
+
+    async def consume():
+        nonlocal items
+        segmenter = SentenceSegmenter(boundaries, boundaries.context_chars)
+        while True:
+            item = await queue.get()
+            items += 1
+            if item["type"] == "finalize":
+                return time.perf_counter()
+            segmenter.append(item["content"])
+            for _ in segmenter.sentences():
+                await asyncio.sleep(sentence_s)
+
+    consumer = asyncio.create_task(consume())
+    stall = 0.0
+    started = time.perf_counter()
+    for delta in iter_deltas(text):
+        await asyncio.sleep(interval_s)      # the network read
+        put_at = time.perf_counter()
+        await queue.put({"type": "text", "content": delta})
+        stall += time.perf_counter() - put_at
+    read = time.perf_counter() - started
+    await queue.put({"type": "finalize"})
+    done = await consumer - started
+    return {"stall": stall, "read": read, "done": done, "items": items}
+
+
+async def main(turns: int, interval_ms: float, sentence_ms: float, sizes: list[int]) -> None:
+    texts = [m for m in load_assistant_messages(min_chars=400)][:turns]
+    print(f"{len(texts)} turns, {sum(len(t) for t in texts) // len(texts)} characters on average, "
+          f"delta every {interval_ms} ms, {sentence_ms} ms per sentence\n")
+    queues = [("Queue(maxsize=1)", lambda: asyncio.Queue(maxsize=1))]
+    queues += [(f"coalescing {size} B", lambda size=size: CoalescingChunkQueue(size)) for size in sizes]
+    for name, make in queues:
+        results = [await run_turn(make(), text, interval_ms / 1000, sentence_ms / 1000) for text in texts]
+        median = {key: statistics.median(r[key] for r in results) for key in results[0]}
+        print(f"{name:<20} stall {median['stall'] * 1000:8.1f} ms   read {median['read'] * 1000:8.1f} ms   "
+              f"done {median['done'] * 1000:8.1f} ms   items {median['items']:6.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--interval-ms", type=float, default=2.0, help="between deltas from the LLM")
+    parser.add_argument("--sentence-ms", type=float, default=8.0, help="consumer time per sentence")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[256, 4096])
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.interval_ms, args.sentence_ms, args.sizes))
@@ -0,0 +1,109 @@
+"""
+bench_coalescing.py
+TTS requests per turn and synthesis wall time with and without sentence
+coalescing, against tts_standin_server.
+
+Recorded assistant answers from events/states/ are replayed as LLM streams
+and cut with the app's SentenceBoundaryDetector; every sentence is
+normalized with MarkdownSpeechNormalizer and goes through a
+SentenceCoalescer (disabled = previous behaviour) into one POST /stream per
+request, at most --concurrency at a time. Wall time runs from the first
+request to the last audio byte of the turn.
+
+Run:  python bench_coalescing.py --turns 4
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+import regex
+
+from markdown_speech import MarkdownSpeechNormalizer
+from recorded_corpus import load_assistant_messages, replay_stream
+from sentence_boundaries import SentenceBoundaryDetector
+from sentence_coalescer import CoalescePolicy, SentenceCoalescer
+from tts_standin_server import start_standin
+
+boundaries = SentenceBoundaryDetector()     # as text_processor cuts sentences
+HAS_ALNUM = regex.compile(r'[a-zA-Z0-9]')
+
+
+async def run_turn(http, base_url, text, policy, concurrency, delta_interval_s):
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = []
+    first_request = None
+
+    async def synthesize(clean_text):
+        nonlocal first_request
+        async with semaphore:
+            first_request = first_request or time.perf_counter()
+            async with http.post(f"{base_url}/v1/text-to-speech/bench/stream?output_format=pcm_24000",
+                                 json={"text": clean_text, "model_id": "bench"}) as response:
+                async for _ in response.content.iter_any():
+                    pass
+
+    async def send(clean_text, order, covered_orders):
+        tasks.append(asyncio.create_task(synthesize(clean_text)))
+
+    coalescer = SentenceCoalescer(send, policy)
+    normalizer = MarkdownSpeechNormalizer()
+    order = 0
+
+    async def emit(sentence):
+        nonlocal order
+        clean_sentence = normalizer.normalize(sentence)
+        if HAS_ALNUM.search(clean_sentence):
+            await coalescer.add(clean_sentence, order)
+        else:
+            await coalescer.flush()
+        order += 1
+
+    buffer = ""
+    async for delta in replay_stream(text, delta_interval_s=delta_interval_s):
+        buffer += delta
+        while match := boundaries.search(buffer):
+            sentence, buffer = buffer[:match.end()], buffer[match.end():]
+            await emit(sentence)
+    if buffer.strip():
+        await emit(buffer)
+    await coalescer.flush()
+    await asyncio.gather(*tasks)
+    return coalescer.sentences, coalescer.requests, time.perf_counter() - first_request
+
+
+async def main(turns: int, port: int, latency_ms: float, speedup: float, concurrency: int,
+               delta_interval_s: float) -> None:
+    standin, runner = await start_standin(port, latency_ms=latency_ms, speedup=speedup)
+    base_url = f"http://127.0.0.1:{port}"
+    # the longest answers: lists and multi-paragraph replies are where coalescing matters
+    texts = sorted(load_assistant_messages(min_chars=200), key=len, reverse=True)[:turns]
+    print(f"{len(texts)} turns, first byte after {latency_ms:.0f} ms, {concurrency} concurrent requests\n")
+
+    async with aiohttp.ClientSession() as http:
+        for name, policy in (("single", CoalescePolicy(enabled=False)),
+                             ("coalesce", CoalescePolicy(max_chars=160, short_chars=60, window_ms=300))):
+            results = [await run_turn(http, base_url, t, policy, concurrency, delta_interval_s) for t in texts]
+            sentences = sum(r[0] for r in results)
+            requests = sum(r[1] for r in results)
+            print(f"{name:<9} sentences={sentences:4d}  requests={requests:4d} "
+                  f"({requests / len(results):5.1f}/turn)  "
+                  f"synthesis wall time median={statistics.median(r[2] for r in results):5.2f} s  "
+                  f"total={sum(r[2] for r in results):6.2f} s")
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=250.0, help="stand-in ms before the first audio byte")
+    parser.add_argument("--speedup", type=float, default=20.0, help="stand-in synthesis speed vs real time")
+    parser.add_argument("--concurrency", type=int, default=6, help="TTS requests in flight (scheduler limit)")
+    parser.add_argument("--delta-ms", type=float, default=2.0, help="ms between replayed LLM deltas")
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.port, args.latency, args.speedup, args.concurrency,
+                     args.delta_ms / 1000))
@@ -0,0 +1,88 @@
+"""
+bench_crossfade.py
+Silence and total duration of multi-sentence answers, with segments played
+back to back vs crossfaded at the joins (PcmPlayer crossfade_ms).
+
+Sentences from tts_cache/ (or generated stand-ins, see
+recorded_corpus.load_pcm_segments) are trimmed with the app's settings and
+grouped into answers of --sentences segments. Each answer is joined the way
+PcmPlayer queues it: plain concatenation of faded segments, or unfaded
+segments with the last crossfade_ms of every one mixed with the first
+samples of the next (pcm_dsp.crossfade) and the last tail faded out.
+Silence is counted in 10 ms frames below -45 dBFS over the joined output.
+
+Run:  python bench_crossfade.py --sentences 6 --crossfade 30 60
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from pcm_dsp import crossfade, fade_out, trim_silence_and_fade
+from recorded_corpus import load_pcm_segments
+
+SR = 24_000
+FRAME = SR // 100                                   # 10 ms
+SILENCE_POWER = (32768.0 * 10 ** (-45.0 / 20)) ** 2
+
+
+def join(segments: list[bytes], crossfade_ms: int) -> np.ndarray:
+    """One answer as the player would output it."""
+    hold = SR * crossfade_ms // 1000 * 2
+    parts, tail = [], None
+    for pcm in segments:
+        if tail is not None:
+            mixed, used = crossfade(tail, pcm)
+            parts.append(mixed)
+            pcm = pcm[used:]
+        if hold and len(pcm) >= hold:
+            parts.append(np.frombuffer(pcm[:-hold], dtype="<i2"))
+            tail = pcm[-hold:]
+        else:
+            parts.append(np.frombuffer(pcm, dtype="<i2"))
+            tail = None
+    if tail is not None:
+        last = np.frombuffer(tail, dtype="<i2").copy()
+        fade_out(last, len(last))
+        parts.append(last)
+    return np.concatenate(parts)
+
+
+def silent_ms(samples: np.ndarray) -> float:
+    frames = samples[:len(samples) // FRAME * FRAME].reshape(-1, FRAME).astype(np.float32)
+    power = np.einsum("ij,ij->i", frames, frames) / FRAME
+    return float(np.count_nonzero(power <= SILENCE_POWER)) * 10
+
+
+def main(sentences: int, fades: list[int]) -> None:
+    raw = load_pcm_segments()
+    count = len(range(0, len(raw) - sentences + 1, sentences))
+    joins = count * (sentences - 1)
+    print(f"{count} answers x {sentences} sentences, {joins} joins\n")
+
+    baseline = None
+    for crossfade_ms in [0, *fades]:
+        # faded for plain concatenation; a crossfading player gets the tails unfaded
+        segments = [bytes(trim_silence_and_fade(bytearray(s), sr=SR, fade_ms=0 if crossfade_ms else 30))
+                    for s in raw]
+        answers = [segments[i:i + sentences] for i in range(0, len(segments) - sentences + 1, sentences)]
+        started = time.perf_counter()
+        outputs = [join(a, crossfade_ms) for a in answers]
+        elapsed = time.perf_counter() - started
+        duration_s = sum(len(o) for o in outputs) / SR
+        silence = sum(silent_ms(o) for o in outputs)
+        baseline = baseline or (duration_s, silence)
+        name = "concat" if not crossfade_ms else f"xfade {crossfade_ms} ms"
+        print(f"{name:<12} duration={duration_s:8.2f} s ({duration_s - baseline[0]:+6.2f})  "
+              f"silence={silence / 1000:6.2f} s ({(silence - baseline[1]) / joins:+6.1f} ms/join)  "
+              f"mixing={duration_s / elapsed:7.0f}x real time")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=6, help="segments per answer")
+    parser.add_argument("--crossfade", type=int, nargs="+", default=[30, 60], help="crossfade lengths (ms)")
+    args = parser.parse_args()
+    main(args.sentences, args.crossfade)
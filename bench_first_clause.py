@@ -0,0 +1,70 @@
+"""
+bench_first_clause.py
+Latency gain of the first-clause fast path on recorded LLM streams.
+
+Every recorded assistant answer in events/states/ is replayed as a stream of
+~4-character deltas on a virtual clock. For each answer we measure when the
+first utterance can be handed to TTS:
+
+  sentence  only SentenceBoundaryDetector sentence ends (no fast path)
+  clause    FirstClausePolicy as configured in OAI_OAI_11LABS.py, plus variants
+
+Run:  python bench_first_clause.py --delta-ms 25
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+
+import regex
+
+from first_clause import FirstClausePolicy, find_first_clause_cut
+from recorded_corpus import iter_deltas, load_assistant_messages
+from sentence_boundaries import SentenceBoundaryDetector
+
+boundaries = SentenceBoundaryDetector()     # as text_processor cuts sentences
+HAS_ALNUM = regex.compile(r'[a-zA-Z0-9]')
+
+
+def first_cut(text: str, delta_ms: float, policy: FirstClausePolicy | None):
+    """(virtual ms until the first speakable utterance is cut, its word count, fast path used)"""
+    buffer = ""
+    for i, delta in enumerate(iter_deltas(text)):
+        now_ms = i * delta_ms
+        buffer += delta
+        while match := boundaries.search(buffer):
+            sentence, buffer = buffer[:match.end()], buffer[match.end():]
+            if HAS_ALNUM.search(sentence):
+                return now_ms, len(sentence.split()), False
+        if policy is not None and buffer:
+            # the app also checks on a timer; on this clock that is the next delta at the latest
+            cut = find_first_clause_cut(buffer, now_ms, policy)
+            if cut:
+                return now_ms, len(buffer[:cut].split()), True
+    return len(text) / 4 * delta_ms, len(buffer.split()), False
+
+
+def report(name: str, results: list[tuple[float, int, bool]]) -> None:
+    times = sorted(r[0] for r in results)
+    p90 = times[int(len(times) * 0.9) - 1]
+    fast = sum(r[2] for r in results)
+    print(f"{name:<34} median={statistics.median(times):7.0f} ms  p90={p90:7.0f} ms  "
+          f"first-utterance words={statistics.median(r[1] for r in results):4.0f}  "
+          f"fast path={fast / len(results):4.0%}")
+
+
+def main(delta_ms: float) -> None:
+    texts = load_assistant_messages(min_chars=40)
+    print(f"{len(texts)} recorded answers, one delta per {delta_ms:.0f} ms\n")
+    report("sentence (baseline)", [first_cut(t, delta_ms, None) for t in texts])
+    for policy in (FirstClausePolicy(min_words=4, max_words=12, max_wait_ms=700),
+                   FirstClausePolicy(min_words=3, max_words=8, max_wait_ms=500),
+                   FirstClausePolicy(min_words=6, max_words=16, max_wait_ms=1000)):
+        name = f"clause {policy.min_words}/{policy.max_words} words, {policy.max_wait_ms:.0f} ms"
+        report(name, [first_cut(t, delta_ms, policy) for t in texts])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delta-ms", type=float, default=25.0, help="virtual ms between LLM deltas")
+    main(parser.parse_args().delta_ms)
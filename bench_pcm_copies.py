@@ -0,0 +1,145 @@
+"""
+bench_pcm_copies.py
+Bytes of PCM copied between the network and the audio device, per turn.
+
+Corpus segments (tts_cache/ or generated stand-ins) are cut into network
+chunks of random size, grouped into answers of --sentences segments and run
+through stream_pcm_response's path into a PcmPlayer with an offline
+NullSink (no real-time pacing):
+
+  before  the previous PcmStream (one growing bytearray: `+=` per chunk,
+          bytes(slice) per chunk read, tail sliced out and written back,
+          a raw snapshot of every segment) and the writer's memmove from the
+          ring into a separate block buffer
+  after   PcmStream keeping the chunks by reference and yielding views,
+          the tail trimmed in place, the device written straight from the
+          ring (PcmStream.bytes_copied + PcmPlayer.bytes_copied)
+
+The network chunks themselves are not counted: aiohttp allocates them either way.
+
+Run:  python bench_pcm_copies.py --sentences 6
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from functools import partial
+
+from audio_sinks import NullSink
+from pcm_dsp import leading_silence_bytes, trim_silence_and_fade
+from pcm_stream import PcmStream
+from portaudio_pcm_player import PcmPlayer
+from recorded_corpus import load_pcm_segments
+
+PCM_BYTES_PER_MS = 48
+TTS_HOLDBACK_MS = 400
+
+
+class LegacyPcmStream:
+    """The previous PcmStream, single-threaded, counting what it copies."""
+
+    def __init__(self, holdback_bytes: int):
+        self.buffer = bytearray()
+        self.holdback_bytes = holdback_bytes
+        self.bytes_copied = 0
+
+    def feed(self, data: bytes) -> None:
+        self.buffer += data
+        self.bytes_copied += len(data)
+
+    def drop_head(self, nbytes: int) -> None:
+        nbytes -= nbytes % 2
+        del self.buffer[:nbytes]
+        self.bytes_copied += len(self.buffer)       # bytearray shifts the rest down
+
+    def finish(self, tail_fn) -> None:
+        usable = len(self.buffer) - len(self.buffer) % 2
+        start = max(0, usable - self.holdback_bytes)
+        tail = self.buffer[start:usable]
+        processed = tail_fn(tail)
+        self.buffer[start:] = processed
+        self.bytes_copied += len(tail) + len(processed)
+
+    def chunks(self, read_size: int):
+        for position in range(0, len(self.buffer), read_size):
+            chunk = bytes(self.buffer[position:position + read_size])
+            self.bytes_copied += 2 * len(chunk)     # bytearray slice, then bytes()
+            yield chunk
+
+
+def network_chunks(pcm: bytes, rng: random.Random) -> list[bytes]:
+    chunks, i = [], 0
+    while i < len(pcm):
+        n = rng.randint(1024, 8192)
+        chunks.append(pcm[i:i + n])
+        i += n
+    return chunks
+
+
+def run_before(answer: list[list[bytes]], player: PcmPlayer) -> int:
+    copied = 0
+    for chunks in answer:
+        stream = LegacyPcmStream(TTS_HOLDBACK_MS * PCM_BYTES_PER_MS)
+        for chunk in chunks:
+            stream.feed(chunk)
+        stream.drop_head(leading_silence_bytes(stream.buffer))
+        raw = bytes(stream.buffer)                  # cache snapshot, taken for every segment
+        stream.finish(partial(trim_silence_and_fade, trim_leading=False))
+        copied += stream.bytes_copied + len(raw)
+        for chunk in stream.chunks(8192):
+            player.enqueue(chunk)
+        player.end_segment()
+    player.drain()
+    # the old writer also memmoved every block from the ring into its own buffer
+    return copied + player.bytes_copied + player.frames_written * player.frame_bytes
+
+
+def run_after(answer: list[list[bytes]], player: PcmPlayer, cache: bool) -> int:
+    copied = 0
+    for chunks in answer:
+        stream = PcmStream(holdback_bytes=TTS_HOLDBACK_MS * PCM_BYTES_PER_MS)
+        for chunk in chunks:
+            stream.feed(chunk)
+        stream.drop_head(leading_silence_bytes(stream.head(500 * PCM_BYTES_PER_MS)))
+        if cache:
+            stream.getvalue()
+        stream.finish(partial(trim_silence_and_fade, trim_leading=False))
+        for chunk in stream.chunks():
+            player.enqueue(chunk)
+        player.end_segment()
+        copied += stream.bytes_copied
+    player.drain()
+    return copied + player.bytes_copied
+
+
+def main(sentences: int, cache: bool) -> None:
+    rng = random.Random(0)
+    segments = [network_chunks(s, rng) for s in load_pcm_segments()]
+    answers = [segments[i:i + sentences] for i in range(0, len(segments) - sentences + 1, sentences)]
+    pcm_bytes = [sum(len(c) for seg in a for c in seg) for a in answers]
+    print(f"{len(answers)} turns x {sentences} segments, "
+          f"median {statistics.median(pcm_bytes) / 1e6:.2f} MB of PCM per turn\n")
+
+    for name, run in (("before", run_before), ("after", partial(run_after, cache=cache))):
+        copied, elapsed = [], 0.0
+        for answer in answers:
+            player = PcmPlayer(24_000, crossfade_ms=30,
+                               output=NullSink(realtime=False)).start()
+            started = time.perf_counter()
+            copied.append(run(answer, player))
+            elapsed += time.perf_counter() - started
+            player.stop()
+        ratio = statistics.median(c / b for c, b in zip(copied, pcm_bytes))
+        print(f"{name:<7} copied per turn median={statistics.median(copied) / 1e6:7.2f} MB "
+              f"({ratio:4.2f}x the PCM)  pipeline {sum(pcm_bytes) / elapsed / 1e6:7.0f} MB/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=6, help="segments per turn")
+    parser.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="after: skip the TTS cache snapshot (uncached providers)")
+    args = parser.parse_args()
+    main(args.sentences, args.cache)
@@ -0,0 +1,160 @@
+"""
+bench_playback_headless.py
+End-to-end latency and gaps of the speech pipeline without a sound card.
+
+Recorded answers from events/states/ are replayed as LLM streams and cut
+with the app's SentenceBoundaryDetector and MarkdownSpeechNormalizer.
+Every sentence is synthesized by
+tts_standin_server into a PcmStream (prebuffer, holdback, energy trim as in
+stream_pcm_response) and published in a SegmentQueue. A loop shaped like
+manage_audio_playback feeds a PcmPlayer whose output is an
+audio_sinks.NullSink, which consumes the audio at 24 kHz in real time.
+
+Per turn:
+  first audio  LLM stream start -> first sample reaching the (simulated) device
+  gaps         PcmPlayer: time the ring stood empty between segments
+  starved      NullSink: silence the device actually played mid-answer
+
+Run:  python bench_playback_headless.py --turns 3 --wav heard.wav
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from functools import partial
+
+import aiohttp
+import regex
+
+from audio_sinks import NullSink, WavFileSink
+from markdown_speech import MarkdownSpeechNormalizer
+from pcm_dsp import leading_silence_bytes, trim_silence_and_fade
+from pcm_stream import PcmStream
+from portaudio_pcm_player import PcmPlayer
+from recorded_corpus import load_assistant_messages, replay_stream
+from response_session import AudioArbiter
+from segment_playback import SegmentPlayback
+from sentence_boundaries import SentenceBoundaryDetector
+from tts_standin_server import start_standin
+
+# same settings as OAI_OAI_11LABS
+boundaries = SentenceBoundaryDetector()
+HAS_ALNUM = regex.compile(r'[a-zA-Z0-9]')
+PCM_BYTES_PER_MS = 48
+TTS_PREBUFFER_MS = 300
+TTS_HOLDBACK_MS = 400
+PLAYBACK_LOW_WATER_MS = 150
+
+
+async def synthesize(http, base_url, semaphore, segments, text, order):
+    """stream_pcm_response against the stand-in."""
+    pcm_stream = PcmStream(prebuffer_bytes=TTS_PREBUFFER_MS * PCM_BYTES_PER_MS,
+                           holdback_bytes=TTS_HOLDBACK_MS * PCM_BYTES_PER_MS)
+
+    def publish():
+        if segments.get(order) is None:
+            pcm_stream.drop_head(leading_silence_bytes(pcm_stream.head(500 * PCM_BYTES_PER_MS)))
+            segments[order] = pcm_stream
+
+    try:
+        async with semaphore:
+            async with http.post(f"{base_url}/v1/text-to-speech/bench/stream?output_format=pcm_24000",
+                                 json={"text": text, "model_id": "bench"}) as response:
+                async for chunk in response.content.iter_any():
+                    pcm_stream.feed(chunk)
+                    if pcm_stream.ready:
+                        publish()
+    finally:
+        pcm_stream.finish(partial(trim_silence_and_fade, trim_leading=False))
+        publish()
+
+
+async def run_turn(http, base_url, text, player, sink, concurrency, delta_interval_s):
+    arbiter = AudioArbiter()
+    session = arbiter.open("bench")
+    segments = session.segments
+    playback = SegmentPlayback(player, arbiter, low_water_bytes=PLAYBACK_LOW_WATER_MS * PCM_BYTES_PER_MS,
+                               echo=lambda line: None)
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = []
+    normalizer = MarkdownSpeechNormalizer()
+    order = 0
+    started = time.perf_counter()
+    player_task = asyncio.create_task(playback.run(until=session))
+
+    def emit(sentence):
+        nonlocal order
+        session.sentences[order] = sentence
+        clean_sentence = normalizer.normalize(sentence)
+        if HAS_ALNUM.search(clean_sentence):
+            tasks.append(asyncio.create_task(synthesize(
+                http, base_url, semaphore, segments, clean_sentence, order)))
+        else:
+            segments[order] = "EMPTYLINE"
+        order += 1
+
+    buffer = ""
+    async for delta in replay_stream(text, delta_interval_s=delta_interval_s):
+        buffer += delta
+        while match := boundaries.search(buffer):
+            sentence, buffer = buffer[:match.end()], buffer[match.end():]
+            emit(sentence)
+    if buffer.strip():
+        emit(buffer)
+    session.end(order)
+    await asyncio.gather(*tasks)
+    await player_task
+    await asyncio.to_thread(player.drain)
+
+    first_audio = next((t for t in sink.run_starts if t >= started), None)
+    return {
+        "first_audio_ms": (first_audio - started) * 1000 if first_audio else None,
+        "segments": order,
+        "player": player.stats(),
+        "starved_s": sink.starved_s,
+    }
+
+
+async def main(turns: int, port: int, latency_ms: float, speedup: float, concurrency: int,
+               delta_interval_s: float, crossfade_ms: int, wav_path: str | None) -> None:
+    standin, runner = await start_standin(port, latency_ms=latency_ms, speedup=speedup)
+    base_url = f"http://127.0.0.1:{port}"
+    texts = [t for t in load_assistant_messages(min_chars=150) if len(t) <= 600][:turns]
+    print(f"{len(texts)} turns, TTS first byte after {latency_ms:.0f} ms, "
+          f"crossfade {crossfade_ms} ms, output {'wav ' + wav_path if wav_path else 'null'}\n")
+
+    results = []
+    async with aiohttp.ClientSession() as http:
+        for i, text in enumerate(texts):
+            # a fresh sink per turn keeps the silence between turns out of the numbers
+            sink = WavFileSink(f"{wav_path[:-4]}_{i}.wav", realtime=True) if wav_path else NullSink()
+            player = PcmPlayer(24_000, crossfade_ms=crossfade_ms, output=sink).start()
+            result = await run_turn(http, base_url, text, player, sink, concurrency, delta_interval_s)
+            await asyncio.to_thread(player.stop)
+            p = result["player"]
+            print(f"turn {i}: {result['segments']:3d} segments  first audio={result['first_audio_ms']:6.0f} ms  "
+                  f"gaps median={p['gap_ms_median']} ms p95={p['gap_ms_p95']} ms max={p['gap_ms_max']} ms  "
+                  f"starved={result['starved_s'] * 1000:6.0f} ms  underflows={p['underflows']}")
+            results.append(result)
+    await runner.cleanup()
+
+    first = [r["first_audio_ms"] for r in results if r["first_audio_ms"] is not None]
+    print(f"\nfirst audio median={statistics.median(first):.0f} ms  "
+          f"starved total={sum(r['starved_s'] for r in results) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=250.0, help="stand-in ms before the first audio byte")
+    parser.add_argument("--speedup", type=float, default=8.0, help="stand-in synthesis speed vs real time")
+    parser.add_argument("--concurrency", type=int, default=6, help="TTS requests in flight")
+    parser.add_argument("--delta-ms", type=float, default=15.0, help="ms between replayed LLM deltas")
+    parser.add_argument("--crossfade", type=int, default=30, help="PcmPlayer crossfade_ms")
+    parser.add_argument("--wav", help="also record what was heard, one <name>_<turn>.wav per turn")
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.port, args.latency, args.speedup, args.concurrency,
+                     args.delta_ms / 1000, args.crossfade, args.wav))
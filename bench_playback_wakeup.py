@@ -0,0 +1,93 @@
+"""
+bench_playback_wakeup.py
+Readiness-to-play delay of the playback loop: 50 ms polling (previous
+manage_audio_playback) vs SegmentQueue.wait().
+
+Segments for orders 0..N-1 are assigned at random times (TTS finishing out
+of order); "playing" a segment takes its simulated duration. The delay is
+measured from the moment a segment is both assigned and next in line to the
+moment the loop picks it up. Idle wakeups count loop iterations that found
+nothing to play.
+
+Run:  python bench_playback_wakeup.py --turns 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from playback_queue import SegmentQueue
+
+POLL_S = 0.05           # the old loop's sleep
+
+
+async def produce(segments, arrivals, assigned_at):
+    start = time.perf_counter()
+    for order, at in sorted(enumerate(arrivals), key=lambda item: item[1]):
+        await asyncio.sleep(max(0.0, start + at - time.perf_counter()))
+        assigned_at[order] = time.perf_counter()
+        segments[order] = b"pcm"
+
+
+async def play_polling(segments, count, durations, assigned_at, delays):
+    order, idle, played_until = 0, 0, 0.0
+    while order < count:
+        if segments.get(order) is not None:
+            now = time.perf_counter()
+            delays.append(now - max(assigned_at[order], played_until))
+            await asyncio.sleep(durations[order])
+            played_until = time.perf_counter()
+            order += 1
+        else:
+            idle += 1
+        await asyncio.sleep(POLL_S)
+    return idle
+
+
+async def play_event(segments, count, durations, assigned_at, delays):
+    order, idle, played_until = 0, 0, 0.0
+    while order < count:
+        await segments.wait(order)      # woken by exactly this assignment: never idle
+        now = time.perf_counter()
+        delays.append(now - max(assigned_at[order], played_until))
+        await asyncio.sleep(durations[order])
+        played_until = time.perf_counter()
+        order += 1
+    return idle
+
+
+async def run(name, player, make_segments, turns, count, rng):
+    delays, idle, wall = [], 0, 0.0
+    for _ in range(turns):
+        segments = make_segments()      # one per answer, like ResponseSession.segments
+        # first byte 0.2-0.6 s, later sentences spread out and partly out of order
+        arrivals = [rng.uniform(0.2, 0.6) + i * rng.uniform(0.05, 0.4) for i in range(count)]
+        durations = [rng.uniform(0.05, 0.3) for _ in range(count)]
+        assigned_at = {}
+        start = time.perf_counter()
+        producer = asyncio.create_task(produce(segments, arrivals, assigned_at))
+        idle += await player(segments, count, durations, assigned_at, delays)
+        await producer
+        wall += time.perf_counter() - start
+    ms = sorted(d * 1000 for d in delays)
+    print(f"{name:<8} delay mean={statistics.mean(ms):6.2f} ms  median={statistics.median(ms):6.2f} ms  "
+          f"p95={ms[int(len(ms) * 0.95)]:6.2f} ms  max={ms[-1]:6.2f} ms  "
+          f"idle wakeups={idle:5d} ({idle / wall:5.1f}/s)  wall={wall:6.2f} s")
+
+
+async def main(turns: int, segments_per_turn: int, seed: int) -> None:
+    print(f"{turns} turns x {segments_per_turn} segments\n")
+    await run("polling", play_polling, dict, turns, segments_per_turn, random.Random(seed))
+    await run("event", play_event, SegmentQueue, turns, segments_per_turn, random.Random(seed))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--segments", type=int, default=12, help="segments per turn")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.segments, args.seed))
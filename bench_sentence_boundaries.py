@@ -0,0 +1,171 @@
+"""
+bench_sentence_boundaries.py
+Precision and throughput of sentence end detection: the previous
+SENTENCE_END_PATTERN regex (baseline) against SentenceBoundaryDetector
+(abbreviation lexicons), which the app uses now.
+
+Precision / recall: the recorded answers from events/states/ are cut into
+sentences with the baseline pattern. The gold labels do not use the lexicons: a cut
+after a "." is a real end unless the next word, on the same line, starts
+with a lowercase letter or a digit ("bijv. een", "ca. 3", "bijv. `code`").
+The heuristic errs one way: an abbreviation before a name or identifier
+("Dr. Jansen", "bijv. EventStore") counts as an end, so the detector's
+recall is a lower bound. Into --inserts of those sentences an
+abbreviation phrase is put at a word gap ("bijv.", "o.a.", "d.w.z.",
+"Dr. Jansen", "ca. 3.5", "e.g." ...); cuts inside an inserted phrase are
+false splits by construction. A false split costs one TTS request and a
+pause too many; a missed end merges two sentences into one request.
+
+HAND_LABELLED is a small set with the ends marked by hand, reported on
+its own, including the cases the lexicons get wrong.
+
+Throughput: characters per second through all boundaries of each answer
+(finditer) and through streamed segmentation as text_processor does it.
+
+Run:  python bench_sentence_boundaries.py --language nl+en --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+import regex
+
+from recorded_corpus import iter_deltas, load_assistant_messages
+from sentence_boundaries import SentenceBoundaryDetector
+from sentence_segmenter import SentenceSegmenter
+
+# "before" baseline: the regex OAI_OAI_11LABS.py cut sentences with until the detector replaced it
+SENTENCE_END_PATTERN = regex.compile(
+    r'(?<=[^\d\s]{2}[.!?])(?=(?![*_])[\s$])|(?<=[^\n]{2})(?=\n)|(?<=:)(?=\n)')
+PHRASES = {
+    "nl": ["bijv. een", "o.a. de", "d.w.z. dat", "Dr. Jansen", "ca. 3.5 uur", "m.b.t. het", "i.p.v. de",
+           "t.o.v. vorig jaar", "nr. 4", "blz. 12", "dhr. De Vries", "z.s.m. terug"],
+    "en": ["e.g. the", "i.e. that", "Dr. Smith", "Mr. Jones", "approx. 3.5 hours", "vs. last year", "no. 4"],
+}
+# "|" marks a sentence end
+HAND_LABELLED = [
+    "The answer is no.| He left.|",
+    "Dat kost ca. 3 euro, bijv. bij de bakker.| Morgen weer.|",
+    "Ask Dr. Smith or Mr. Jones.| They know.|",
+    "She lives on Baker St.| It is close.|",
+    "He works for Apple Inc.| It is in Cupertino.|",
+    "Boeken, tijdschriften e.d.| Alles mag mee.|",
+    "Zie blz. 12 en fig. 3 i.p.v. de bijlage.| Klaar.|",
+    "Use no. 4, i.e. the blue one.| Or vol. 2.|",
+    "Het gaat om o.a. prijs, d.w.z. de totale kosten.| Verder niets.|",
+    "We spraken op 3 mei jl.| Het was goed.|",
+]
+
+
+def hand_labelled() -> list[tuple[str, set[int]]]:
+    out = []
+    for marked in HAND_LABELLED:
+        text, ends = "", set()
+        for piece in marked.split("|"):
+            text += piece
+            ends.add(len(text))
+        ends.discard(len(text))
+        out.append((text, ends))
+    return out
+
+
+def is_real_end(text: str, pos: int) -> bool:
+    """Lexicon-free label of a cut: after a ".", a sentence goes on when the next word starts lowercase or with a digit."""
+    if text[pos - 1] != ".":
+        return True     # a line break, "!" or "?"
+    rest = text[pos:].lstrip(" \t").lstrip("`\"'(*_[")
+    return not rest or not (rest[0].islower() or rest[0].isdigit())
+
+
+def labelled_texts(language: str, inserts: int, seed: int) -> list[tuple[str, set[int]]]:
+    """Answers with abbreviation phrases inserted inside sentences, and the positions of their real ends."""
+    rng = random.Random(seed)
+    phrases = [p for lang in language.split("+") for p in PHRASES[lang]]
+    out = []
+    for message in load_assistant_messages(min_chars=1):
+        pieces, text, cuts = SENTENCE_END_PATTERN.split(message), "", []
+        for piece in pieces:
+            gaps = [i for i, c in enumerate(piece) if c == " " and 0 < i < len(piece) - 1]
+            if gaps and inserts > 0 and rng.random() < 0.5:
+                i = rng.choice(gaps)
+                piece = piece[:i + 1] + rng.choice(phrases) + " " + piece[i + 1:]
+                inserts -= 1
+            text += piece
+            cuts.append(len(text))
+        ends = {pos for pos in cuts if is_real_end(text, pos)}
+        ends.discard(len(text))     # the end of the answer is not a found boundary
+        out.append((text, ends))
+    return out
+
+
+def found(pattern, text: str) -> set[int]:
+    return {m.end() for m in pattern.finditer(text)}
+
+
+def precision_recall(pattern, texts) -> tuple[float, float, int, int]:
+    true_pos = false_pos = gold = 0
+    for text, ends in texts:
+        cuts = found(pattern, text)
+        true_pos += len(cuts & ends)
+        false_pos += len(cuts - ends)
+        gold += len(ends)
+    return true_pos / max(1, true_pos + false_pos), true_pos / max(1, gold), false_pos, gold - true_pos
+
+
+def throughput(texts: list[str], run, repeat: int) -> float:
+    chars = sum(len(t) for t in texts) * repeat
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            run(text)
+    return chars / (time.perf_counter() - started) / 1e6
+
+
+def segment(pattern, context_chars):
+    def run(text):
+        segmenter = SentenceSegmenter(pattern, context_chars)
+        for delta in iter_deltas(text):
+            segmenter.append(delta)
+            for _ in segmenter.sentences():
+                pass
+    return run
+
+
+def main(language: str, inserts: int, repeat: int, seed: int) -> None:
+    detector = SentenceBoundaryDetector(language)
+    messages = load_assistant_messages(min_chars=1)
+    texts = labelled_texts(language, inserts, seed)
+    print(f"{len(messages)} recorded answers, {sum(len(m) for m in messages)} characters, "
+          f"{inserts} abbreviation phrases inserted ({language})\n")
+
+    dropped = [(m, pos) for m in messages for pos in found(SENTENCE_END_PATTERN, m) - found(detector, m)]
+    lower = sum(not is_real_end(m, pos) for m, pos in dropped)
+    print(f"recorded answers: {len(dropped)} baseline cuts not made by the detector, "
+          f"{lower} of them before a lowercase word or a digit\n")
+
+    for label, data in (("recorded + inserts", texts), ("hand-labelled", hand_labelled())):
+        print(label)
+        for name, pattern in (("before", SENTENCE_END_PATTERN), ("detector", detector)):
+            precision, recall, false_pos, missed = precision_recall(pattern, data)
+            print(f"  {name:<9} precision {precision:6.1%}  recall {recall:6.1%}  "
+                  f"({false_pos} false splits, {missed} missed ends)")
+    print()
+
+    plain = [text for text, _ in texts]
+    for name, pattern, context in (("before", SENTENCE_END_PATTERN, 3),
+                                   ("detector", detector, detector.context_chars)):
+        whole = throughput(plain, lambda t: found(pattern, t), repeat)
+        streamed = throughput(plain, segment(pattern, context), repeat)
+        print(f"{name:<9} {whole:7.2f} M chars/s whole answers  {streamed:7.2f} M chars/s streamed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--language", default="nl+en", help="nl, en or nl+en")
+    parser.add_argument("--inserts", type=int, default=500, help="abbreviation phrases put inside sentences")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    main(args.language, args.inserts, args.repeat, args.seed)
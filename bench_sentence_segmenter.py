@@ -0,0 +1,90 @@
+"""
+bench_sentence_segmenter.py
+Characters per second through sentence segmentation of long LLM responses.
+
+Recorded assistant answers are concatenated into responses of --tokens
+~4-character deltas and segmented the way text_processor does it:
+
+  search   text_buffer += delta, then SentenceBoundaryDetector.search from
+           the start of the buffer and a reslice per sentence (previous behaviour)
+  stream   SentenceSegmenter: only the new characters are scanned
+
+Two shapes of text: "prose" as recorded, and "run-on" with every sentence
+end and line break replaced by a space (a long paragraph of code or list
+text without punctuation), which is the quadratic case for `search`.
+Both must produce the same sentences; the benchmark checks that.
+
+Run:  python bench_sentence_segmenter.py --tokens 4000 --responses 8
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import regex
+
+from recorded_corpus import iter_deltas, load_assistant_messages
+from sentence_boundaries import SentenceBoundaryDetector
+from sentence_segmenter import SentenceSegmenter
+
+boundaries = SentenceBoundaryDetector()     # as text_processor cuts sentences
+RUN_ON = regex.compile(r'[.!?:\n]')
+
+
+def segment_search(deltas: list[str]) -> list[str]:
+    sentences, text_buffer = [], ""
+    for delta in deltas:
+        text_buffer += delta
+        match = boundaries.search(text_buffer)
+        while match:
+            sentences.append(text_buffer[:match.end()])
+            text_buffer = text_buffer[match.end():]
+            match = boundaries.search(text_buffer)
+    return sentences + [text_buffer]
+
+
+def segment_stream(deltas: list[str]) -> list[str]:
+    sentences, segmenter = [], SentenceSegmenter(boundaries, boundaries.context_chars)
+    for delta in deltas:
+        segmenter.append(delta)
+        sentences.extend(segmenter.sentences())
+    return sentences + [segmenter.text]
+
+
+def responses(tokens: int) -> list[str]:
+    """Consecutive recorded answers joined until each response has about `tokens` deltas."""
+    out, current = [], ""
+    for message in load_assistant_messages(min_chars=1):
+        current += message + "\n\n"
+        if len(current) >= tokens * 4:
+            out.append(current[:tokens * 4])
+            current = ""
+    return out
+
+
+def main(tokens: int, count: int, repeat: int) -> None:
+    texts = responses(tokens)[:count]
+    print(f"{len(texts)} responses of {tokens} deltas (~{tokens * 4} characters)\n")
+    for shape, shaped in (("prose", texts), ("run-on", [RUN_ON.sub(" ", t) for t in texts])):
+        deltas = [list(iter_deltas(t)) for t in shaped]
+        chars = sum(len(t) for t in shaped) * repeat
+        results = {}
+        for name, segment in (("search", segment_search), ("stream", segment_stream)):
+            started = time.perf_counter()
+            for _ in range(repeat):
+                results[name] = [segment(d) for d in deltas]
+            elapsed = time.perf_counter() - started
+            sentences = sum(len(r) - 1 for r in results[name])
+            print(f"{shape:<7} {name:<7} {chars / elapsed / 1e6:7.2f} M chars/s  "
+                  f"({sentences} sentences, {elapsed / (len(deltas) * repeat) * 1000:7.2f} ms per response)")
+        assert results["search"] == results["stream"], "segmenters disagree"
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=4000, help="deltas per response")
+    parser.add_argument("--responses", type=int, default=8, help="run-on `search` takes seconds per response")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.tokens, args.responses, args.repeat)
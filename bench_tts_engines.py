@@ -0,0 +1,109 @@
+"""
+bench_tts_engines.py
+Offline comparison of the two TTS engines against tts_standin_server:
+
+  http       one POST to /stream per sentence (tts_request)
+  websocket  one input-streaming socket per turn (tts_websocket)
+
+Recorded assistant answers from events/states/ are replayed as LLM streams,
+cut into sentences with the app's SentenceBoundaryDetector and sent to the
+engine as soon as each sentence is complete.
+
+Run:  python bench_tts_engines.py --turns 10
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+import regex
+
+from pcm_stream import PcmStream
+from recorded_corpus import load_assistant_messages, replay_stream
+from sentence_boundaries import SentenceBoundaryDetector
+from tts_standin_server import start_standin
+from tts_websocket import ElevenLabsWebSocketSession
+
+boundaries = SentenceBoundaryDetector()     # as text_processor cuts sentences
+HAS_ALNUM = regex.compile(r'[a-zA-Z0-9]')
+
+
+async def sentences_from_stream(text: str, delta_interval_s: float):
+    buffer = ""
+    async for delta in replay_stream(text, delta_interval_s=delta_interval_s):
+        buffer += delta
+        while match := boundaries.search(buffer):
+            sentence, buffer = buffer[:match.end()], buffer[match.end():]
+            if HAS_ALNUM.search(sentence):
+                yield sentence.strip()
+    if HAS_ALNUM.search(buffer):
+        yield buffer.strip()
+
+
+async def run_http_turn(http, base_url, text, delta_interval_s):
+    start = time.perf_counter()
+    first_audio = None
+
+    async def one_sentence(sentence):
+        nonlocal first_audio
+        async with http.post(f"{base_url}/v1/text-to-speech/bench/stream?output_format=pcm_24000",
+                             json={"text": sentence, "model_id": "bench"}) as response:
+            async for _ in response.content.iter_any():
+                if first_audio is None:
+                    first_audio = time.perf_counter()
+
+    tasks = [asyncio.create_task(one_sentence(s)) async for s in sentences_from_stream(text, delta_interval_s)]
+    await asyncio.gather(*tasks)
+    return first_audio - start if first_audio else None, time.perf_counter() - start
+
+
+async def run_websocket_turn(http, base_url, text, delta_interval_s):
+    start = time.perf_counter()
+    session = ElevenLabsWebSocketSession(http, voice_id="bench", model_id="bench",
+                                         api_key="bench", base_url=base_url)
+    session.open()
+    order = 0
+    async for sentence in sentences_from_stream(text, delta_interval_s):
+        await session.send_text(sentence, PcmStream(), flush=order == 0)
+        order += 1
+    await session.close_input()
+    await session.wait_closed()
+    first_audio = session.first_audio_at
+    return first_audio - start if first_audio else None, time.perf_counter() - start
+
+
+async def main(turns: int, port: int, latency_ms: float, delta_interval_s: float) -> None:
+    standin, runner = await start_standin(port, latency_ms=latency_ms)
+    base_url = f"http://127.0.0.1:{port}"
+    texts = load_assistant_messages(limit=turns, min_chars=80)
+    try:
+        async with aiohttp.ClientSession() as http:
+            for engine, run_turn in (("http", run_http_turn), ("websocket", run_websocket_turn)):
+                standin.stats.clear()
+                first, total = [], []
+                for text in texts:
+                    first_audio_s, total_s = await run_turn(http, base_url, text, delta_interval_s)
+                    if first_audio_s is not None:
+                        first.append(first_audio_s * 1000)
+                    total.append(total_s * 1000)
+                requests = standin.stats["http_requests"] + standin.stats["ws_connections"]
+                print(f"{engine:<10} turns={len(texts)}  "
+                      f"first audio median={statistics.median(first):7.1f} ms  "
+                      f"turn median={statistics.median(total):8.1f} ms  "
+                      f"requests/turn={requests / len(texts):5.1f}  "
+                      f"ws messages/turn={standin.stats['ws_messages'] / len(texts):5.1f}")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=250.0, help="stand-in ms before first audio byte")
+    parser.add_argument("--delta-interval", type=float, default=0.01, help="seconds between LLM deltas")
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.port, args.latency, args.delta_interval))
@@ -0,0 +1,102 @@
+"""
+bench_tts_hedge.py
+First-byte latency of sentence TTS with and without hedging, offline.
+
+Two tts_standin_server instances play the providers: "ElevenLabs" answers
+in --latency ms but stalls for --stall ms on --stall-rate of the requests,
+"OpenAI" is slower but steady. Every sentence of the recorded answers in
+events/states/ is requested once per mode:
+
+  single   ElevenLabsProvider only (previous behaviour)
+  hedged   HedgedTts with OpenAITtsProvider as alternate
+
+Run:  python bench_tts_hedge.py --sentences 300
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+
+import aiohttp
+import openai
+import regex
+from aiohttp import web
+
+from recorded_corpus import load_assistant_messages
+from sentence_boundaries import SentenceBoundaryDetector
+from tts_providers import ElevenLabsProvider, HedgedTts, OpenAITtsProvider, TtsRequest
+from tts_standin_server import start_standin
+
+boundaries = SentenceBoundaryDetector()     # as text_processor cuts sentences
+HAS_ALNUM = regex.compile(r'[a-zA-Z0-9]')
+
+
+def load_sentences(limit: int) -> list[str]:
+    sentences = []
+    for text in load_assistant_messages():
+        for sentence in boundaries.split(text):
+            if HAS_ALNUM.search(sentence):
+                sentences.append(sentence.strip())
+                if len(sentences) >= limit:
+                    return sentences
+    return sentences
+
+
+async def run(name: str, tts: HedgedTts, sentences: list[str], concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(sentence):
+        async with semaphore:
+            audio = await tts.fetch(TtsRequest(sentence, voice_id="bench"))
+            latencies.append(audio.first_byte_s * 1000)
+            async for _ in audio.chunks:
+                pass
+
+    await asyncio.gather(*(one(s) for s in sentences))
+    latencies.sort()
+    stats = tts.stats()
+    print(f"{name:<7} first byte p50={statistics.median(latencies):5.0f} ms  "
+          f"p95={latencies[int(len(latencies) * 0.95) - 1]:5.0f} ms  "
+          f"p99={latencies[int(len(latencies) * 0.99) - 1]:5.0f} ms  max={latencies[-1]:5.0f} ms  "
+          f"hedge rate={stats['hedge_rate']:.1%}  wins={stats['wins']}")
+
+
+async def main(sentences: int, latency_ms: float, stall_rate: float, stall_ms: float,
+               alternate_latency_ms: float, concurrency: int) -> None:
+    runners: list[web.AppRunner] = []
+    _, runner = await start_standin(8766, latency_ms=latency_ms, stall_rate=stall_rate,
+                                    stall_ms=stall_ms, speedup=50.0, seed=1)
+    runners.append(runner)
+    _, runner = await start_standin(8767, latency_ms=alternate_latency_ms, speedup=50.0)
+    runners.append(runner)
+
+    texts = load_sentences(sentences)
+    print(f"{len(texts)} sentences, primary {latency_ms:.0f} ms ({stall_rate:.0%} stall {stall_ms:.0f} ms), "
+          f"alternate {alternate_latency_ms:.0f} ms\n")
+    async with aiohttp.ClientSession() as http:
+        client = openai.AsyncOpenAI(api_key="bench", base_url="http://127.0.0.1:8767/v1")
+
+        def primary():
+            return ElevenLabsProvider(lambda: http, api_key="bench", model_id="bench",
+                                      base_url="http://127.0.0.1:8766")
+
+        await run("single", HedgedTts(primary()), texts, concurrency)
+        await run("hedged", HedgedTts(primary(), OpenAITtsProvider(client)), texts, concurrency)
+        await client.close()
+    for runner in runners:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=250.0, help="primary ms before the first byte")
+    parser.add_argument("--stall-rate", type=float, default=0.08, help="fraction of primary requests that stall")
+    parser.add_argument("--stall", type=float, default=2500.0, help="ms before the first byte of a stall")
+    parser.add_argument("--alternate-latency", type=float, default=450.0)
+    parser.add_argument("--concurrency", type=int, default=6)
+    args = parser.parse_args()
+    asyncio.run(main(args.sentences, args.latency, args.stall_rate, args.stall,
+                     args.alternate_latency, args.concurrency))
@@ -0,0 +1,124 @@
+"""
+chunk_queue.py
+The queue between an LLM streaming loop and its consumer (text_processor,
+tool_processor).
+
+asyncio.Queue(maxsize=1) made the streaming loop wait on every delta until
+the consumer had segmented the previous one, so network reads and
+segmentation took turns. CoalescingChunkQueue never makes the producer
+wait for a slot: a delta put while the previous one is still queued (the
+consumer is behind) is merged into it, so the consumer gets one larger
+item. Only when more than `max_bytes` of text is waiting does `put` wait
+for the consumer; that wait is the producer stall, counted per turn.
+
+Items are the dicts the producers already send:
+
+  {"type": "text", "content": str}                           merged: content appended
+  {"type": "tool", "tool_calls": [...], "is_complete": bool}  never merged (counted towards max_bytes)
+  {"type": "finalize"}                                        never merged, never waits
+
+Tool deltas are kept apart: merged, the argument fragments of calls with
+the same index would be joined in one item, and a completion flag would
+move to deltas that came before it. They are few and small, so merging
+them saves little.
+
+Called on the event loop only.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+
+
+class CoalescingChunkQueue:
+    def __init__(self, max_bytes: int = 4096):
+        self.max_bytes = max_bytes
+        self._items: deque[list] = deque()     # [item, size]
+        self._bytes = 0
+        self._getter: asyncio.Future | None = None
+        self._putters: list[asyncio.Future] = []
+        self.turn = self._counts()
+        self.total = self._counts()
+        self.last_turn: dict | None = None
+
+    @staticmethod
+    def _counts() -> dict:
+        return {"puts": 0, "merged": 0, "stalls": 0, "stall_ms": 0.0, "max_pending_bytes": 0}
+
+    @staticmethod
+    def _size(item: dict) -> int:
+        if item["type"] == "text":
+            return len(item["content"].encode("utf-8"))
+        if item["type"] == "tool":
+            return sum(len(getattr(getattr(call, "function", None), "arguments", None) or "")
+                       for call in item["tool_calls"])
+        return 0
+
+    def _merge(self, item: dict, size: int) -> bool:
+        if not self._items:
+            return False
+        last = self._items[-1]
+        queued = last[0]
+        if item["type"] != "text" or queued["type"] != "text":
+            return False
+        queued["content"] += item["content"]
+        last[1] += size
+        return True
+
+    async def put(self, item: dict) -> None:
+        size = self._size(item)
+        if size and self._bytes and self._bytes + size > self.max_bytes:
+            started = time.perf_counter()
+            while self._bytes and self._bytes + size > self.max_bytes:
+                putter = asyncio.get_running_loop().create_future()
+                self._putters.append(putter)
+                try:
+                    await putter
+                finally:
+                    if putter in self._putters:
+                        self._putters.remove(putter)
+            self.turn["stalls"] += 1
+            self.turn["stall_ms"] += (time.perf_counter() - started) * 1000
+
+        self.turn["puts"] += 1
+        if self._merge(item, size):
+            self.turn["merged"] += 1
+        else:
+            self._items.append([item, size])
+        self._bytes += size
+        self.turn["max_pending_bytes"] = max(self.turn["max_pending_bytes"], self._bytes)
+        if self._getter is not None and not self._getter.done():
+            self._getter.set_result(None)
+
+    async def get(self) -> dict:
+        while not self._items:
+            self._getter = asyncio.get_running_loop().create_future()
+            try:
+                await self._getter
+            finally:
+                self._getter = None
+        item, size = self._items.popleft()
+        self._bytes -= size
+        for putter in self._putters:
+            if not putter.done():
+                putter.set_result(None)
+        return item
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def end_turn(self) -> dict:
+        """Counts of the turn that ended (stall_ms: time `put` waited for the consumer)."""
+        turn, self.turn = self.turn, self._counts()
+        for key, value in turn.items():
+            if key == "max_pending_bytes":
+                self.total[key] = max(self.total[key], value)
+            else:
+                self.total[key] += value
+        self.last_turn = {**turn, "stall_ms": round(turn["stall_ms"], 1)}
+        return self.last_turn
+
+    def stats(self) -> dict:
+        return {**self.total, "stall_ms": round(self.total["stall_ms"], 1),
+                "max_bytes": self.max_bytes, "last_turn": self.last_turn}
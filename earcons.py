@@ -0,0 +1,125 @@
+"""
+earcons.py
+Short status sounds, decoded once at startup and played from memory.
+
+Every cue is held as 24 kHz / 16-bit / mono PCM, so playing it is one
+PcmPlayer.play_cue: no file access, decoding or network, and no waiting.
+Cues do not go through the speech ring, so they are not crossfaded and
+do not count as segments. Decoded files and added PCM (the spoken model
+names) are trimmed and faded like speech (pcm_dsp.trim_silence_and_fade);
+the tones are built with their own fades.
+A file in `earcons/<name>.(mp3|wav|flac|ogg)` replaces the built-in tone of
+that name; other files there are loaded as extra cues. No such directory
+ships with the app, so apart from INITIALIZING.mp3 the tones are what plays.
+
+  initializing   INITIALIZING.mp3, played while the app starts
+  listening      a record key went down
+  transcribing   the recording is being sent to Whisper
+  thinking       the transcription went to the LLM
+  switch         cycle_llm, when the spoken model name is not there yet
+"""
+from __future__ import annotations
+
+import os
+import time
+
+import miniaudio
+import numpy as np
+
+from pcm_dsp import trim_silence_and_fade
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".flac", ".ogg")
+
+# name -> (frequency Hz, duration ms) per note; synthesized when no file replaces them
+TONES = {
+    "listening":    ((660, 60), (880, 80)),
+    "transcribing": ((740, 50),),
+    "thinking":     ((880, 60), (660, 80)),
+    "switch":       ((990, 40), (990, 40)),
+}
+TONE_LEVEL = 0.2            # of full scale
+TONE_FADE_MS = 8
+
+
+def synthesize_tone(notes, sample_rate: int = 24_000) -> bytes:
+    """Sine notes back to back, each faded in and out so it does not click."""
+    parts = []
+    for frequency, duration_ms in notes:
+        n = sample_rate * duration_ms // 1000
+        wave = np.sin(2 * np.pi * frequency * np.arange(n) / sample_rate) * TONE_LEVEL
+        fade = min(n // 2, sample_rate * TONE_FADE_MS // 1000)
+        ramp = np.linspace(0.0, 1.0, fade, endpoint=False)
+        wave[:fade] *= ramp
+        wave[n - fade:] *= ramp[::-1]
+        parts.append(wave)
+    return (np.concatenate(parts) * 32767).astype("<i2").tobytes()
+
+
+class EarconBank:
+    """
+    name -> PCM for the player. `load()` decodes the asset files (blocking;
+    run it once, off the event loop) and records how long that took.
+    `play()` never blocks and may be called from any thread, also before
+    the player has started.
+    """
+
+    def __init__(self, player, sample_rate: int = 24_000, *, fade_ms: int = 30,
+                 threshold_dbfs: float = -45.0):
+        self.player = player
+        self.sample_rate = sample_rate
+        self.fade_ms = fade_ms                  # trim_silence_and_fade settings for files and added PCM
+        self.threshold_dbfs = threshold_dbfs
+        self.pcm: dict[str, bytes] = {}
+        self.decode_ms: dict[str, float] = {}
+        self.plays = 0
+
+    def _trim(self, pcm) -> bytes:
+        return bytes(trim_silence_and_fade(bytearray(pcm), sr=self.sample_rate, fade_ms=self.fade_ms,
+                                           threshold_dbfs=self.threshold_dbfs))
+
+    def load(self, files: dict[str, str] | None = None, directory: str | None = None) -> float:
+        """Decode and trim `files` (name -> path) and every audio file in `directory`; returns the seconds spent."""
+        for name, notes in TONES.items():
+            self.pcm.setdefault(name, synthesize_tone(notes, self.sample_rate))
+        files = dict(files or {})
+        if directory and os.path.isdir(directory):
+            for filename in sorted(os.listdir(directory)):
+                name, extension = os.path.splitext(filename)
+                if extension.lower() in AUDIO_EXTENSIONS:
+                    files[name] = os.path.join(directory, filename)
+
+        started = time.perf_counter()
+        for name, path in files.items():
+            file_started = time.perf_counter()
+            try:
+                decoded = miniaudio.decode_file(path, output_format=miniaudio.SampleFormat.SIGNED16,
+                                                nchannels=1, sample_rate=self.sample_rate)
+            except (OSError, miniaudio.MiniaudioError) as e:
+                print(f"⚠️ Earcon '{name}' niet geladen ({path}): {e}")
+                continue
+            self.pcm[name] = self._trim(decoded.samples.tobytes())
+            self.decode_ms[name] = (time.perf_counter() - file_started) * 1000
+        return time.perf_counter() - started
+
+    def add(self, name: str, pcm: bytes | None) -> None:
+        """Register PCM that is already 24 kHz / 16-bit / mono, e.g. a synthesized model name (trimmed; blocking)."""
+        if pcm:
+            self.pcm[name] = self._trim(pcm)
+
+    def play(self, name: str) -> bool:
+        """Queue a cue on the player; False if there is no cue by that name."""
+        pcm = self.pcm.get(name)
+        if pcm is None:
+            return False
+        self.player.play_cue(pcm)
+        self.plays += 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "cues": {name: round(len(pcm) / 2 / self.sample_rate * 1000) for name, pcm in self.pcm.items()},
+            "decode_ms": {name: round(ms, 2) for name, ms in self.decode_ms.items()},
+            "decode_ms_total": round(sum(self.decode_ms.values()), 2),
+            "memory_kb": round(sum(len(pcm) for pcm in self.pcm.values()) / 1024, 1),
+            "plays": self.plays,
+        }
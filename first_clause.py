@@ -0,0 +1,57 @@
+"""
+first_clause.py
+Early flush for the first utterance of a turn.
+
+Time-to-first-audio is bounded by how long the LLM takes to finish its first
+sentence. For sentence 0 only, the text processor may cut at a clause
+boundary (comma, colon, semicolon, dash) or after a number of words or
+milliseconds, whichever comes first; everything after that is segmented in
+full sentences again.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import regex
+
+
+@dataclass
+class FirstClausePolicy:
+    enabled: bool = True
+    min_words: int = 4          # never cut before this many complete words
+    max_words: int = 12         # cut after this many words, even without a clause mark
+    max_wait_ms: float = 700.0  # cut at the last complete word once the turn's text is this old
+
+
+# a clause mark right after a word ("Ja, ", "Let op: ") or a free-standing dash ("nou - ", "nou — ")
+CLAUSE_BOUNDARY = regex.compile(r'(?<=[^\d\s][,:;])(?=\s)|(?<=\S)(?=\s+[-–—]\s)')
+COMPLETE_WORD = regex.compile(r'\S+(?=\s)')
+
+
+def find_first_clause_cut(text: str, elapsed_ms: float, policy: FirstClausePolicy) -> int | None:
+    """
+    Index at which the first utterance may be cut early, or None to keep
+    waiting for more text. `elapsed_ms` is the age of the turn's first delta.
+    """
+    if not policy.enabled:
+        return None
+
+    # never split a [SYSTEM] tag that is still streaming in
+    bracket = text.find("[")
+    if bracket != -1:
+        text = text[:bracket]
+
+    word_ends = [m.end() for m in COMPLETE_WORD.finditer(text)]
+    if len(word_ends) < policy.min_words:
+        return None
+
+    word_limit = word_ends[policy.max_words - 1] if len(word_ends) >= policy.max_words else None
+
+    clause = CLAUSE_BOUNDARY.search(text, word_ends[policy.min_words - 1] - 1, word_limit or len(text))
+    if clause:
+        return clause.end()
+    if word_limit:
+        return word_limit
+    if elapsed_ms >= policy.max_wait_ms:
+        return word_ends[-1]
+    return None
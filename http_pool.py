@@ -0,0 +1,208 @@
+"""
+http_pool.py
+One place for all outbound HTTP: keep-alive pools per upstream host, warmed
+up before they are needed.
+
+  * aiohttp session  - ElevenLabs, Obsidian plugin, MIDI Flask server, n8n
+  * httpx clients    - OpenAI, Groq and Perplexity (handed to the SDKs as http_client)
+
+Every origin is prewarmed (TCP + TLS handshake, connection parked in the
+pool) at startup, again when it has been idle longer than the keep-alive
+window while the app is in use, and whenever the user starts talking, so
+the request that follows a pause finds an open connection.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+import aiohttp
+import httpx
+
+HTTPX_ORIGINS = {"openai", "groq", "perplexity"}   # used through SDK clients
+
+
+def _origin(url) -> str:
+    parts = urlsplit(str(url))
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class ConnectionManager:
+    def __init__(self, origins: dict[str, str], *, keepalive_s: float = 75.0,
+                 idle_rewarm_s: float = 45.0, activity_window_s: float = 900.0,
+                 limit_per_host: int = 20):
+        """
+        origins: name -> base URL, e.g. {"elevenlabs": "https://api.elevenlabs.io"}
+        idle_rewarm_s: an origin unused for this long is warmed again ...
+        activity_window_s: ... but only while there was real traffic this recently
+        """
+        self.origins = {name: _origin(url) for name, url in origins.items()}
+        self._names_by_origin = {origin: name for name, origin in self.origins.items()}
+        self.keepalive_s = keepalive_s
+        self.idle_rewarm_s = idle_rewarm_s
+        self.activity_window_s = activity_window_s
+        self.limit_per_host = limit_per_host
+
+        self.session: aiohttp.ClientSession | None = None
+        self._httpx: dict[str, httpx.AsyncClient] = {
+            name: self._make_httpx_client() for name in self.origins if name in HTTPX_ORIGINS}
+        self._keepalive_task: asyncio.Task | None = None
+        self._startup_prewarm: asyncio.Task | None = None
+
+        self.counters = defaultdict(lambda: {"requests": 0, "new_connections": 0,
+                                             "reused_connections": 0, "prewarms": 0})
+        self.last_used: dict[str, float] = {}
+        self.last_activity = 0.0
+        self.prewarm_ms: dict[str, float] = {}      # last successful prewarm (TCP + TLS handshake) per origin
+
+    # ── lifecycle ───────────────────────────────────────────────────────
+    async def start(self) -> aiohttp.ClientSession:
+        """Create the shared aiohttp session and warm every origin in the background."""
+        if self.session is None:
+            connector = aiohttp.TCPConnector(
+                ttl_dns_cache=300,                  # Cache DNS lookups for 5 minutes
+                force_close=False,                  # Allow connection reuse
+                enable_cleanup_closed=True,
+                keepalive_timeout=self.keepalive_s,
+                limit_per_host=self.limit_per_host)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=20),
+                trace_configs=[self._make_trace_config()])
+            self._startup_prewarm = asyncio.create_task(self.prewarm())
+            self._keepalive_task = asyncio.create_task(self._keepalive_loop())
+        return self.session
+
+    async def close(self) -> None:
+        if self._keepalive_task:
+            self._keepalive_task.cancel()
+        for client in self._httpx.values():
+            await client.aclose()
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    def httpx_client(self, name: str) -> httpx.AsyncClient:
+        """Pooled client for an SDK, e.g. AsyncOpenAI(http_client=...)."""
+        return self._httpx[name]
+
+    # ── warming ─────────────────────────────────────────────────────────
+    async def wait_startup_prewarm(self) -> None:
+        """Wait for the prewarm start() began, without sending requests of its own."""
+        if self._startup_prewarm is not None:
+            await asyncio.shield(self._startup_prewarm)
+
+    async def prewarm(self, names=None) -> None:
+        names = list(names or self.origins)
+        await asyncio.gather(*(self._prewarm_one(name) for name in names))
+
+    async def _prewarm_one(self, name: str) -> None:
+        url = self.origins[name] + "/"
+        self.counters[name]["prewarms"] += 1
+        started = time.perf_counter()
+        try:
+            if name in self._httpx:
+                await self._httpx[name].head(url, timeout=5, extensions={"prewarm": True})
+            elif self.session is not None:
+                async with self.session.head(url, timeout=aiohttp.ClientTimeout(total=5),
+                                             trace_request_ctx={"prewarm": True}):
+                    pass
+            else:
+                return
+            self.prewarm_ms[name] = round((time.perf_counter() - started) * 1000, 1)
+        except Exception as e:
+            # local services (Obsidian, MIDI) are often simply not running
+            logging.debug(f"Prewarm of {name} failed: {e}")
+
+    async def prewarm_idle(self) -> None:
+        """Warm origins idle longer than idle_rewarm_s; call when the user starts an interaction."""
+        self.last_activity = time.monotonic()
+        now = time.monotonic()
+        idle = [name for name in self.origins
+                if now - self.last_used.get(name, 0.0) >= self.idle_rewarm_s]
+        if idle:
+            await self.prewarm(idle)
+
+    async def _keepalive_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.idle_rewarm_s / 3)
+            if time.monotonic() - self.last_activity > self.activity_window_s:
+                continue
+            now = time.monotonic()
+            idle = [name for name in self.origins
+                    if now - self.last_used.get(name, 0.0) >= self.idle_rewarm_s]
+            if idle:
+                await self.prewarm(idle)
+
+    # ── bookkeeping ─────────────────────────────────────────────────────
+    def _record(self, origin: str, *, new_connection: bool, prewarm: bool) -> None:
+        name = self._names_by_origin.get(origin, origin)
+        self.last_used[name] = time.monotonic()
+        if not prewarm:
+            self.last_activity = self.last_used[name]
+            self.counters[name]["requests"] += 1
+            key = "new_connections" if new_connection else "reused_connections"
+            self.counters[name][key] += 1
+
+    def _make_trace_config(self) -> aiohttp.TraceConfig:
+        async def on_request_start(session, ctx, params):
+            ctx.origin = _origin(params.url)
+            ctx.new_connection = False
+
+        async def on_connection_create_end(session, ctx, params):
+            ctx.new_connection = True
+
+        async def on_request_end(session, ctx, params):
+            prewarm = bool(ctx.trace_request_ctx and ctx.trace_request_ctx.get("prewarm"))
+            self._record(ctx.origin, new_connection=ctx.new_connection, prewarm=prewarm)
+
+        trace_config = aiohttp.TraceConfig(trace_config_ctx_factory=self._trace_ctx)
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_request_end.append(on_request_end)
+        return trace_config
+
+    @staticmethod
+    def _trace_ctx(trace_request_ctx=None):
+        return SimpleNamespace(trace_request_ctx=trace_request_ctx, origin="", new_connection=False)
+
+    def _make_httpx_client(self) -> httpx.AsyncClient:
+        async def on_request(request: httpx.Request):
+            state = {"new_connection": False}
+
+            # httpcore reports each connection step through the "trace" extension
+            async def trace(event_name: str, info: dict):
+                if event_name == "connection.connect_tcp.complete":
+                    state["new_connection"] = True
+
+            request.extensions["trace"] = trace
+            request.extensions["pool_state"] = state
+
+        async def on_response(response: httpx.Response):
+            request = response.request
+            self._record(_origin(request.url),
+                         new_connection=request.extensions["pool_state"]["new_connection"],
+                         prewarm=bool(request.extensions.get("prewarm")))
+
+        return httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.limit_per_host,
+                                max_keepalive_connections=self.limit_per_host,
+                                keepalive_expiry=self.keepalive_s),
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            event_hooks={"request": [on_request], "response": [on_response]})
+
+    # ── metrics ─────────────────────────────────────────────────────────
+    def stats(self) -> dict:
+        now = time.monotonic()
+        result = {}
+        for name in self.origins:
+            counters = dict(self.counters[name])
+            requests = counters["requests"]
+            counters["reuse_rate"] = round(counters["reused_connections"] / requests, 3) if requests else None
+            counters["idle_s"] = round(now - self.last_used[name], 1) if name in self.last_used else None
+            counters["prewarm_ms"] = self.prewarm_ms.get(name)
+            result[name] = counters
+        return result
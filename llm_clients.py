@@ -0,0 +1,130 @@
+"""
+llm_clients.py
+One SDK client per LLM provider, built once and shared.
+
+The main chat, the Obsidian agent, the OpenAI TTS fallback, Whisper
+transcription and web search all get their client here instead of each
+constructing their own (the Perplexity client was built for every search).
+All clients of a provider use the pooled httpx client of http_pool's
+ConnectionManager, so they share its keep-alive connections.
+
+Requests are timed from sending the request to the response headers
+(time to first byte of a stream), into a latency histogram per provider
+and endpoint: the OpenAI client serves chat completions as well as
+Whisper uploads and the TTS fallback, which would blur one histogram.
+`build_all()` builds every client at startup; the connections are warmed
+by ConnectionManager.start(), whose handshake time is reported here.
+"""
+from __future__ import annotations
+
+import bisect
+import time
+from collections import deque
+
+import httpx
+from groq import AsyncGroq
+from openai import AsyncOpenAI
+
+# provider -> (SDK client class, base_url or None for the SDK default)
+PROVIDERS = {
+    "openai": (AsyncOpenAI, None),
+    "groq": (AsyncGroq, None),
+    "perplexity": (AsyncOpenAI, "https://api.perplexity.ai"),
+}
+BUCKETS_MS = (50, 100, 200, 400, 800, 1600, 3200, 6400)   # upper bounds; the last bucket is open
+# URL path prefix -> histogram; requests to other paths go to "other"
+ENDPOINTS = (("/chat/completions", "chat"), ("/audio/", "audio"))
+
+
+def endpoint(path: str) -> str:
+    for prefix, name in ENDPOINTS:
+        if prefix in path:      # after the base URL's own path ("/v1", "/openai/v1")
+            return name
+    return "other"
+
+
+class LatencyHistogram:
+    def __init__(self, recent: int = 200):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.recent = deque(maxlen=recent)
+
+    def record(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.recent.append(ms)
+
+    def stats(self) -> dict:
+        recent = sorted(self.recent)
+        labels = [f"<={bound}ms" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "requests": sum(self.counts),
+            "buckets": dict(zip(labels, self.counts)),
+            "p50_ms": round(recent[len(recent) // 2], 1) if recent else None,
+            "p95_ms": round(recent[int(len(recent) * 0.95)], 1) if recent else None,
+        }
+
+
+class LlmClientRegistry:
+    """
+    get(provider)   the shared client, built on first use
+    build_all()     build every client that has an API key (startup)
+    stats()         per provider: latency histogram per endpoint, build and warm-up time
+    """
+
+    def __init__(self, connection_manager, api_keys: dict[str, str | None]):
+        self.connection_manager = connection_manager
+        self.api_keys = api_keys
+        self._clients: dict = {}
+        self.latency: dict[str, dict[str, LatencyHistogram]] = {name: {} for name in PROVIDERS}
+        self.build_ms: dict[str, float] = {}
+        self.warm_ms: dict[str, float] = {}
+        for name in PROVIDERS:
+            self._add_timing_hooks(name)
+
+    def get(self, name: str):
+        client = self._clients.get(name)
+        if client is None:
+            started = time.perf_counter()
+            sdk, base_url = PROVIDERS[name]
+            options = {"base_url": base_url} if base_url else {}
+            client = sdk(api_key=self.api_keys.get(name), http_client=self.connection_manager.httpx_client(name),
+                         **options)
+            self.build_ms[name] = round((time.perf_counter() - started) * 1000, 2)
+            self._clients[name] = client
+        return client
+
+    async def build_all(self) -> dict[str, float]:
+        """Build the clients of the providers that have an API key; warm_ms is the startup prewarm's."""
+        names = [name for name in PROVIDERS if self.api_keys.get(name)]
+        for name in names:
+            self.get(name)
+        await self.connection_manager.wait_startup_prewarm()
+        for name in names:
+            if name in self.connection_manager.prewarm_ms:
+                self.warm_ms[name] = self.connection_manager.prewarm_ms[name]
+        return self.warm_ms
+
+    def _add_timing_hooks(self, name: str) -> None:
+        http_client: httpx.AsyncClient = self.connection_manager.httpx_client(name)
+        histograms = self.latency[name]
+
+        async def on_request(request: httpx.Request):
+            request.extensions["sent_at"] = time.perf_counter()
+
+        async def on_response(response: httpx.Response):
+            request = response.request
+            if not request.extensions.get("prewarm") and "sent_at" in request.extensions:
+                key = endpoint(request.url.path)
+                if key not in histograms:
+                    histograms[key] = LatencyHistogram()
+                histograms[key].record((time.perf_counter() - request.extensions["sent_at"]) * 1000)
+
+        hooks = http_client.event_hooks
+        hooks["request"].append(on_request)
+        hooks["response"].append(on_response)
+        http_client.event_hooks = hooks
+
+    def stats(self) -> dict:
+        return {name: {"built": name in self._clients,
+                       "build_ms": self.build_ms.get(name), "warm_ms": self.warm_ms.get(name),
+                       "latency": {key: histogram.stats() for key, histogram in self.latency[name].items()}}
+                for name in PROVIDERS}
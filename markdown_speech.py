@@ -0,0 +1,106 @@
+"""
+markdown_speech.py
+What of a markdown answer is sent to TTS.
+
+The LLM answers in markdown. Everything is still printed, but code blocks
+and tables are not read out: the first line of each is replaced by a
+short spoken placeholder and the rest is silent. Links are spoken as their
+label, bare URLs as their host name, inline code without backticks, and
+the list dashes, headings and emphasis stars are handled as CLEAN_PATTERN
+did before. Inline markup is rewritten in one regex pass.
+
+Sentences arrive one at a time (a code line is usually a sentence of its
+own), so whether we are inside a fenced block or a table is kept across
+sentences until `end_turn()`.
+"""
+from __future__ import annotations
+
+import regex
+
+FENCE = regex.compile(r'\s*(```|~~~)')
+TABLE_ROW = regex.compile(r'\s*\|')
+INLINE = regex.compile(
+    r'\[(?P<label>[^\]\n]+)\]\([^)\s]+\)'                           # [label](url)
+    r'|(?P<url>https?://(?:www\.)?(?P<host>[^/\s)\]>]*[^/\s)\]>.,;:!?])'   # bare URL, without the
+    r'(?:/[^\s)\]>]*[^\s)\]>.,;:!?]|/)?)'                              # punctuation after it
+    r'|`(?P<code>[^`\n]*)`'                                         # inline code
+    r'|(?P<drop>- |#)'
+    r'|(?P<star>\*)')
+URL_HOST = regex.compile(r'https?://(?:www\.)?([^/\s]+)\S*')
+
+
+class MarkdownSpeechNormalizer:
+    def __init__(self, code_placeholder: str = "Zie de code op het scherm.",
+                 table_placeholder: str = "Zie de tabel op het scherm."):
+        self.code_placeholder = code_placeholder
+        self.table_placeholder = table_placeholder
+        self._line_start = True     # the next sentence begins a line
+        self._in_fence = False
+        self._in_table = False
+        self.turn = self._counts()
+        self.total = self._counts()
+        self.last_turn: dict | None = None
+
+    @staticmethod
+    def _counts() -> dict:
+        return {"chars_in": 0, "chars_spoken": 0, "code_blocks": 0, "tables": 0, "links": 0}
+
+    def normalize(self, text: str) -> str:
+        """The text to synthesize for one sentence (may be empty: print it, do not speak it)."""
+        spoken = []
+        for i, line in enumerate(text.split("\n")):
+            spoken.append(self._line(line, starts_line=i > 0 or self._line_start))
+        self._line_start = text.endswith("\n")
+        result = "\n".join(part for part in spoken if part).strip()
+        self.turn["chars_in"] += len(text.strip())
+        self.turn["chars_spoken"] += len(result)
+        return result
+
+    def _line(self, line: str, starts_line: bool) -> str:
+        if starts_line:
+            if FENCE.match(line):
+                self._in_fence = not self._in_fence
+                self._in_table = False
+                if self._in_fence:
+                    self.turn["code_blocks"] += 1
+                    return self.code_placeholder
+                return ""
+            if not self._in_fence:
+                entering = TABLE_ROW.match(line) is not None and not self._in_table
+                self._in_table = TABLE_ROW.match(line) is not None
+                if entering:
+                    self.turn["tables"] += 1
+                    return self.table_placeholder
+        if self._in_fence or self._in_table:
+            return ""
+        return INLINE.sub(self._inline, line)
+
+    def _inline(self, m: regex.Match) -> str:
+        if m.group("label") is not None:
+            self.turn["links"] += 1
+            return URL_HOST.sub(r'\1', m.group("label"))
+        if m.group("url") is not None:
+            self.turn["links"] += 1
+            return m.group("host")
+        if m.group("code") is not None:
+            return m.group("code")
+        if m.group("star") is not None:
+            return "'"
+        return ""
+
+    def end_turn(self) -> dict:
+        """Counts of the turn that ended (chars_saved included); the block state starts over."""
+        turn, self.turn = self.turn, self._counts()
+        self._line_start, self._in_fence, self._in_table = True, False, False
+        return self.record_turn({**turn, "chars_saved": turn["chars_in"] - turn["chars_spoken"]})
+
+    def record_turn(self, turn: dict) -> dict:
+        """Add a turn to the totals; also the counts of another normalizer (one per response session)."""
+        for key in self.total:
+            self.total[key] += turn[key]
+        self.last_turn = turn
+        return turn
+
+    def stats(self) -> dict:
+        return {**self.total, "chars_saved": self.total["chars_in"] - self.total["chars_spoken"],
+                "last_turn": self.last_turn}
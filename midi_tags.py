@@ -0,0 +1,165 @@
+"""
+midi_tags.py
+[SYSTEM] tags in the streamed LLM text, recognized as the characters arrive.
+
+  [SYSTEM] [MIDI] [note=C4] [/SYSTEM]
+  [SYSTEM] [MIDI] [command=stop] [/SYSTEM]
+
+SystemTagTokenizer splits the stream into plain text and MidiEvents, in
+order. Every character is looked at once: plain text is passed on as soon
+as it cannot be the start of a tag (at most the 7 characters of an
+unfinished "[SYSTEM" are held back), and a tag's bracket groups are
+collected while it streams in, so a complete tag is already parsed.
+
+A tag must close within MAX_TAG_CHARS and on the same line. Otherwise
+"[SYSTEM]" was only mentioned. It is released as text and the characters
+held after it are tokenized again, so the rest of the answer is not
+silenced until the end of the turn.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+OPEN_TAG = "[SYSTEM]"
+CLOSE_GROUP = "/SYSTEM"
+MAX_TAG_CHARS = 100         # "[SYSTEM] [MIDI] [command=stop] [/SYSTEM]" is 40
+
+
+@dataclass
+class MidiEvent:
+    kind: str | None        # "note", "command", or None for a tag without either
+    value: str | None
+    raw: str                # the tag as the LLM wrote it (printed and kept in the history)
+    groups: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_groups(cls, groups: list[str], raw: str) -> "MidiEvent":
+        for group in groups:
+            key, _, value = group.partition("=")
+            if key in ("note", "command") and value:
+                return cls(key, value, raw, groups)
+        return cls(None, None, raw, groups)
+
+
+class SystemTagTokenizer:
+    """
+    feed(text) -> [str | MidiEvent, ...]   what can be decided so far
+    flush()    -> str                      end of the stream: whatever is still held, as text
+
+    `strip_after_tag` drops the whitespace that follows a tag, as the text
+    processor did when it cut a tag out of its buffer.
+    """
+
+    def __init__(self, strip_after_tag: bool = True):
+        self.strip_after_tag = strip_after_tag
+        self.reset()
+
+    def reset(self) -> None:
+        self._partial = ""          # a prefix of OPEN_TAG, not yet decided
+        self._raw: list[str] | None = None   # inside a tag: its text so far
+        self._group: list[str] | None = None   # inside a [...] group of the tag
+        self._groups: list[str] = []
+        self._raw_len = 0
+        self._unclosed = False      # the open tag hit a newline or MAX_TAG_CHARS
+        self._strip = False         # whitespace after a tag is still being dropped
+
+    def feed(self, text: str) -> list:
+        out: list = []
+        plain: list[str] = []
+        i, n = 0, len(text)
+        while i < n:
+            if self._raw is not None:
+                i = self._feed_tag(text, i, out)
+                if self._unclosed:
+                    # not a tag: "[SYSTEM]" is text, what followed it is tokenized again
+                    held = "".join(self._raw)[len(OPEN_TAG):]
+                    self._raw, self._group, self._unclosed = None, None, False
+                    plain.append(OPEN_TAG)
+                    text, i, n = held + text[i:], 0, len(held) + n - i
+                continue
+            if self._strip:
+                j = i
+                while j < n and text[j].isspace():
+                    j += 1
+                i = j
+                if i == n:
+                    break
+                self._strip = False
+            if self._partial:
+                c = text[i]
+                if c == OPEN_TAG[len(self._partial)]:
+                    self._partial += c
+                    i += 1
+                    if self._partial == OPEN_TAG:
+                        self._start_tag(plain, out)
+                    continue
+                # not a tag after all; a new "[" may start one
+                plain.append(self._partial)
+                self._partial = ""
+                if c != "[":
+                    plain.append(c)
+                    i += 1
+                continue
+            j = text.find("[", i)
+            if j == -1:
+                plain.append(text[i:])
+                break
+            plain.append(text[i:j])
+            self._partial = "["
+            i = j + 1
+        if plain:
+            out.append("".join(plain))
+        return [item for item in out if item != ""]
+
+    def _start_tag(self, plain: list[str], out: list) -> None:
+        if plain:
+            out.append("".join(plain))
+            plain.clear()
+        self._raw = [OPEN_TAG]
+        self._raw_len = len(OPEN_TAG)
+        self._partial = ""
+        self._groups = []
+
+    def _feed_tag(self, text: str, i: int, out: list) -> int:
+        """Consume tag characters from text[i:]; returns where the tag (or the text) ends."""
+        # the tag may only use what is left of MAX_TAG_CHARS, up to the first newline
+        limit = min(len(text), i + MAX_TAG_CHARS - self._raw_len)
+        newline = text.find("\n", i, limit)
+        n = newline if newline != -1 else limit
+        start = i
+        while i < n:
+            if self._group is None:
+                j = text.find("[", i, n)
+                if j == -1:
+                    self._raw.append(text[i:n])
+                    i = n
+                    break
+                self._raw.append(text[i:j + 1])
+                self._group = []
+                i = j + 1
+            j = text.find("]", i, n)
+            if j == -1:
+                self._group.append(text[i:n])
+                self._raw.append(text[i:n])
+                i = n
+                break
+            self._group.append(text[i:j])
+            self._raw.append(text[i:j + 1])
+            group, self._group = "".join(self._group).strip(), None
+            i = j + 1
+            if group == CLOSE_GROUP:
+                out.append(MidiEvent.from_groups(self._groups, "".join(self._raw)))
+                self._raw = None
+                self._strip = self.strip_after_tag
+                return i
+            self._groups.append(group)
+        self._raw_len += i - start
+        if n < len(text):
+            self._unclosed = True   # a newline, or no room left: the next character cannot be part of it
+        return i
+
+    def flush(self) -> str:
+        """An unfinished tag, or the start of one, is plain text after all."""
+        text = self._partial + ("".join(self._raw) if self._raw is not None else "")
+        self.reset()
+        return text
@@ -0,0 +1,145 @@
+"""
+pcm_dsp.py
+Sample-level processing of 16-bit mono PCM segments (24 kHz by default).
+
+trim_silence_and_fade() finds leading and trailing silence from per-frame
+energy, only looking at the edges of the segment, and fades the new tail in
+place. Nothing is copied when the input is writable (bytearray); the result
+is a memoryview into the same buffer.
+
+crossfade() overlaps the end of one segment with the start of the next, for
+gapless joins in the player. It expects a tail that was not faded out
+(trim_silence_and_fade with fade_ms=0): a faded tail under a crossfade is
+faded twice and the join dips in level.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+FULL_SCALE = 32768.0
+
+
+def _writable(pcm) -> bytearray | memoryview:
+    if isinstance(pcm, bytearray):
+        return pcm
+    if isinstance(pcm, memoryview) and not pcm.readonly:
+        return pcm
+    return bytearray(pcm)          # read-only input (bytes): one copy is unavoidable
+
+
+def _loud_frames(window: np.ndarray, frame_len: int, threshold_power: float) -> np.ndarray:
+    """Boolean per frame: mean power above the threshold. `window` length is a multiple of frame_len."""
+    frames = window.reshape(-1, frame_len).astype(np.float32)
+    power = np.einsum("ij,ij->i", frames, frames) / frame_len
+    return power > threshold_power
+
+
+def silence_bounds(samples: np.ndarray, *, sr: int = 24_000, threshold_dbfs: float = -45.0,
+                   frame_ms: int = 10, lead_pad_ms: int = 10, tail_pad_ms: int = 60,
+                   max_lead_ms: int = 500, max_tail_ms: int = 1000,
+                   trim_leading: bool = True) -> tuple[int, int]:
+    """
+    (start, end) sample indices of the part worth playing. Only the first
+    `max_lead_ms` and last `max_tail_ms` are inspected; silence further in is
+    part of the speech.
+    """
+    n = len(samples)
+    frame_len = max(1, sr * frame_ms // 1000)
+    threshold_power = (FULL_SCALE * 10 ** (threshold_dbfs / 20)) ** 2
+
+    # trailing: frames aligned to the end of the segment
+    tail_frames = min(n, sr * max_tail_ms // 1000) // frame_len
+    end = n
+    if tail_frames:
+        window_start = n - tail_frames * frame_len
+        loud = _loud_frames(samples[window_start:], frame_len, threshold_power)
+        hits = np.flatnonzero(loud)
+        last_loud_end = window_start + (hits[-1] + 1) * frame_len if hits.size else window_start
+        end = min(n, last_loud_end + sr * tail_pad_ms // 1000)
+
+    start = 0
+    if trim_leading:
+        lead_frames = min(end, sr * max_lead_ms // 1000) // frame_len
+        if lead_frames:
+            loud = _loud_frames(samples[:lead_frames * frame_len], frame_len, threshold_power)
+            hits = np.flatnonzero(loud)
+            first_loud = hits[0] * frame_len if hits.size else lead_frames * frame_len
+            start = max(0, first_loud - sr * lead_pad_ms // 1000)
+    return start, max(start, end)
+
+
+def fade_out(samples: np.ndarray, fade_len: int) -> None:
+    """Linear fade over the last `fade_len` samples, in place."""
+    fade_len = min(fade_len, len(samples))
+    if fade_len <= 0:
+        return
+    tail = samples[-fade_len:]
+    ramp = np.linspace(1.0, 0.0, fade_len, endpoint=False, dtype=np.float32)
+    np.multiply(tail, ramp, out=tail, casting="unsafe")
+
+
+def crossfade(tail, head) -> tuple[np.ndarray, int]:
+    """
+    Mix the end of `tail` with the start of `head` (16-bit PCM, bytes-like):
+    equal-power fade-out of one and fade-in of the other (cos / sin gains, so
+    two unrelated voices keep their level through the join) over min(len) samples.
+    Returns (the samples of `tail` with the overlap mixed in, bytes of `head`
+    consumed); the rest of `head` follows unchanged.
+    """
+    a = np.frombuffer(tail, dtype="<i2")
+    head_view = memoryview(head).cast("B")
+    n = min(len(a), len(head_view) // 2)
+    b = np.frombuffer(head_view, dtype="<i2", count=n)
+
+    out = a.copy()
+    if n:
+        angle = np.linspace(0.0, np.pi / 2, n, endpoint=False, dtype=np.float32)
+        overlap = a[-n:] * np.cos(angle) + b * np.sin(angle)     # gains sum to up to 1.41
+        out[-n:] = np.clip(overlap, -FULL_SCALE, FULL_SCALE - 1)
+    return out, n * 2
+
+
+def trim_silence_and_fade(pcm, *, sr: int = 24_000, fade_ms: int = 30,
+                          threshold_dbfs: float = -45.0, trim_leading: bool = True,
+                          **bounds_kwargs) -> memoryview:
+    """
+    Drop leading/trailing silence and fade out the new tail (fade_ms=0: no
+    fade, for a player that crossfades the tail or fades it itself).
+    Returns a memoryview into `pcm` (or into one writable copy if `pcm` is read-only).
+    """
+    buf = _writable(pcm)
+    view = memoryview(buf).cast("B")
+    usable = len(view) - len(view) % 2
+    samples = np.frombuffer(view, dtype="<i2", count=usable // 2)
+
+    start, end = silence_bounds(samples, sr=sr, threshold_dbfs=threshold_dbfs,
+                                trim_leading=trim_leading, **bounds_kwargs)
+    fade_out(samples[start:end], fade_ms * sr // 1000)
+    return view[start * 2:end * 2]
+
+
+def leading_silence_bytes(pcm, *, sr: int = 24_000, threshold_dbfs: float = -45.0, **bounds_kwargs) -> int:
+    """Bytes of leading silence, for buffers whose tail has not arrived yet."""
+    view = memoryview(pcm).cast("B")
+    samples = np.frombuffer(view, dtype="<i2", count=len(view) // 2)
+    start, _ = silence_bounds(samples, sr=sr, threshold_dbfs=threshold_dbfs,
+                              max_tail_ms=0, **bounds_kwargs)
+    return start * 2
+
+
+def trim_fixed_and_fade(pcm_bytes: bytes, *, trim_ms: int = 195, fade_ms: int = 30,
+                        sr: int = 24_000) -> bytes:
+    """Previous behaviour: always cut `trim_ms` off the end (kept as benchmark baseline)."""
+    trim = trim_ms * sr // 1000
+    fade = fade_ms * sr // 1000
+
+    samples = np.frombuffer(pcm_bytes, dtype='<i2').copy()   # writable
+    if trim:
+        samples = samples[:-trim]
+
+    fade = min(fade, len(samples))
+    if fade:
+        ramp = np.linspace(1.0, 0.0, fade, endpoint=False, dtype=np.float32)
+        samples[-fade:] = (samples[-fade:] * ramp).astype(np.int16)
+
+    return samples.tobytes()
@@ -0,0 +1,153 @@
+"""
+pcm_stream.py
+Growing PCM buffer for one sentence: the network side feeds bytes as they
+arrive, the playback thread reads them while the download is still running.
+
+The network chunks are kept as they arrived and handed to the player as
+memoryviews, so audio is not copied on its way from the socket to the
+player's ring buffer. Only the held-back tail is gathered into one
+bytearray, where trim + fade work in place.
+"""
+from __future__ import annotations
+
+import threading
+from bisect import bisect_right
+from typing import Callable, Iterator
+
+BYTES_PER_SAMPLE = 2            # 16-bit mono
+
+
+class PcmStream:
+    """
+    Thread-safe, append-only PCM buffer for a single segment.
+
+    * `feed()` / `finish()` are called from the event loop (tts_request).
+    * `chunks()` is consumed from the playback thread and blocks until new
+      audio is available or the stream is finished.
+
+    The last `holdback_bytes` are never handed to the player before
+    `finish()`, so the tail trim + fade can still be applied to them.
+    """
+
+    def __init__(self, *, prebuffer_bytes: int = 0, holdback_bytes: int = 0):
+        self._parts: list[memoryview] = []   # fed chunks, not copied
+        self._offsets: list[int] = []        # stream offset of each part
+        self._carry = b""                    # odd trailing byte of the last chunk, waiting for its pair
+        self.nbytes = 0
+        self.prebuffer_bytes = prebuffer_bytes
+        self.holdback_bytes = holdback_bytes
+        self.finished = False
+        self.bytes_copied = 0                # tail gathering, head analysis, getvalue()
+        self._cond = threading.Condition()
+
+    # ── producer side ───────────────────────────────────────────────────
+    @property
+    def ready(self) -> bool:
+        """True once enough audio is buffered to start playback."""
+        return self.finished or self.nbytes >= self.prebuffer_bytes + self.holdback_bytes
+
+    def feed(self, data) -> None:
+        """Append a chunk (bytes-like). It is kept by reference; do not modify it afterwards."""
+        view = memoryview(data).cast("B")
+        if not view:
+            return
+        with self._cond:
+            # every part holds whole samples, so any view of it can go to the player as is
+            if self._carry:
+                self._append(memoryview(self._carry + bytes(view[:1])))
+                view, self._carry = view[1:], b""
+            if len(view) % BYTES_PER_SAMPLE:
+                view, self._carry = view[:-1], bytes(view[-1:])
+            if view:
+                self._append(view)
+            self._cond.notify_all()
+
+    def _append(self, view: memoryview) -> None:
+        self._offsets.append(self.nbytes)
+        self._parts.append(view)
+        self.nbytes += len(view)
+
+    def head(self, nbytes: int):
+        """The first `nbytes` (or fewer) as one bytes-like object, e.g. for leading-silence analysis."""
+        with self._cond:
+            views = self._slice(0, min(nbytes, self.nbytes))
+        if len(views) == 1:
+            return views[0]
+        self.bytes_copied += sum(len(v) for v in views)
+        return b"".join(views)
+
+    def drop_head(self, nbytes: int) -> None:
+        """Discard leading bytes (e.g. silence); only valid before a consumer has started."""
+        nbytes -= nbytes % BYTES_PER_SAMPLE
+        if nbytes <= 0:
+            return
+        with self._cond:
+            self._rebuild(self._slice(nbytes, self.nbytes))
+
+    def finish(self, tail_fn: Callable[[bytearray], bytes | memoryview] | None = None) -> None:
+        """
+        Mark the stream complete. `tail_fn` receives the held-back tail as a
+        writable bytearray and returns its processed replacement (e.g. `trim_and_fade`,
+        which returns a view into the same bytearray).
+        """
+        with self._cond:
+            if self.finished:
+                return
+            if tail_fn is not None:
+                # an odd last byte (self._carry) is dropped: it would shift every sample after it
+                start = max(0, self.nbytes - self.holdback_bytes)
+                tail = bytearray()
+                for view in self._slice(start, self.nbytes):
+                    tail += view
+                self.bytes_copied += len(tail)
+                processed = tail_fn(tail) if tail else b""
+                self._rebuild(self._slice(0, start) + [memoryview(processed).cast("B")])
+            self.finished = True
+            self._cond.notify_all()
+
+    def getvalue(self) -> bytes:
+        """The whole segment as bytes (one copy; used to store it in the TTS cache)."""
+        with self._cond:
+            views = self._slice(0, self.nbytes)
+        self.bytes_copied += self.nbytes
+        return b"".join(views)
+
+    # ── consumer side ───────────────────────────────────────────────────
+    def _playable_end(self) -> int:
+        return self.nbytes if self.finished else max(0, self.nbytes - self.holdback_bytes)
+
+    def _slice(self, start: int, end: int) -> list[memoryview]:
+        """Views covering stream bytes [start, end) (lock held)."""
+        offsets, parts = self._offsets, self._parts
+        i = max(0, bisect_right(offsets, start) - 1)
+        j = bisect_right(offsets, end - 1) if end > start else i
+        views = parts[i:j]
+        if views:
+            beyond_end = offsets[j - 1] + len(views[-1]) - end
+            if beyond_end:
+                views[-1] = views[-1][:len(views[-1]) - beyond_end]
+            if start > offsets[i]:
+                views[0] = views[0][start - offsets[i]:]
+        return views
+
+    def _rebuild(self, parts: list[memoryview]) -> None:
+        self._parts = [p for p in parts if len(p)]
+        self._offsets = []
+        self.nbytes = 0
+        for part in self._parts:
+            self._offsets.append(self.nbytes)
+            self.nbytes += len(part)
+
+    def chunks(self) -> Iterator[memoryview]:
+        """Yield playable PCM as it arrives; returns when the stream is finished and drained."""
+        position = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self.finished or self._playable_end() > position)
+                end = self._playable_end()
+                views = self._slice(position, end)
+                done = self.finished
+            position = max(position, end)
+            yield from views
+            if done:
+                return
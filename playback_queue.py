@@ -0,0 +1,58 @@
+"""
+playback_queue.py
+The segments of one ResponseSession as an awaitable mapping: order -> segment.
+
+TTS tasks assign `session.segments[order] = segment` (PCM, a PcmStream or
+a marker); AudioArbiter awaits `wait(session.play_order)` and is woken by
+exactly that assignment instead of polling. Every answer has a mapping of
+its own, so nothing is ever reset.
+"""
+from __future__ import annotations
+
+import asyncio
+
+
+class SegmentQueue(dict):
+    """dict with defaultdict(lambda: None) reads (without inserting) and per-order wake-ups."""
+
+    def __init__(self):
+        super().__init__()
+        self._waiters: dict[int, list[asyncio.Future]] = {}
+
+    def __missing__(self, order):
+        return None
+
+    def __setitem__(self, order, segment) -> None:
+        super().__setitem__(order, segment)
+        if segment is not None:
+            self._wake(self._waiters.pop(order, ()), segment)
+
+    async def wait(self, order):
+        """The segment for `order` once it is assigned."""
+        segment = self.get(order)
+        if segment is not None:
+            return segment
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(order, []).append(future)
+        try:
+            return await future
+        finally:
+            futures = self._waiters.get(order)
+            if futures and future in futures:
+                futures.remove(future)
+
+    @staticmethod
+    def _wake(futures, value) -> None:
+        for future in futures:
+            if future.done():
+                continue
+            loop = future.get_loop()
+            try:
+                on_loop = asyncio.get_running_loop() is loop
+            except RuntimeError:
+                on_loop = False
+            if on_loop:
+                future.set_result(value)
+            else:
+                # assigned from another thread
+                loop.call_soon_threadsafe(lambda f=future: f.done() or f.set_result(value))
@@ -3,19 +3,21 @@ from ctypes import (
     Structure, POINTER, byref,
     c_int, c_ulong, c_void_p, c_double
 )
+import threading
+import time
+from array import array
+from collections import deque
 from pathlib import Path
-# verbose: bool = False
 
-# ── PortAudio DLL ───────────────────────────────────────────────────────
-dll_path = Path.cwd() / "portaudio" / "portaudio.dll"
-if not dll_path.exists():
-    raise FileNotFoundError(f"PortAudio DLL not found: {dll_path}")
+import numpy as np
 
-pa = ctypes.cdll.LoadLibrary(str(dll_path))
+from pcm_dsp import crossfade, fade_out
 
 # ── PortAudio constants + helpers ──────────────────────────────────────
 PA_INT16 = 0x00000008
-CHUNK_FRAMES = 4096  # ≈93 ms @ 44.1 kHz mono
+PA_OUTPUT_UNDERFLOWED = -9980    # Pa_WriteStream: device ran dry since the last write
+PA_OUTPUT_UNDERFLOW = 0x00000004    # callback statusFlags: the device ran dry before this callback
+PA_CONTINUE = 0
 
 class PaStreamParameters(Structure):
     _fields_ = [
@@ -26,75 +28,569 @@ class PaStreamParameters(Structure):
         ("hostApiSpecificStreamInfo",  c_void_p),
     ]
 
+_PA_STREAM_CALLBACK = ctypes.CFUNCTYPE(
+    c_int, c_void_p, c_void_p, c_ulong, c_void_p, c_ulong, c_void_p
+)   # input, output, frameCount, timeInfo, statusFlags, userData
+
 def _pa_ok(code: int, ctx: str) -> None:
     if code != 0:
         pa.Pa_Terminate()
         raise RuntimeError(f"{ctx} (PaError={code})")
 
-# core PortAudio prototypes
-pa.Pa_Initialize.restype             = c_int
-pa.Pa_Terminate.restype              = c_int
-pa.Pa_StartStream.restype            = c_int
-pa.Pa_StopStream.restype             = c_int
-pa.Pa_CloseStream.restype            = c_int
-pa.Pa_IsStreamActive.restype         = c_int
-for fn in ("Pa_StartStream", "Pa_StopStream", "Pa_CloseStream", "Pa_IsStreamActive"):
-    getattr(pa, fn).argtypes = [c_void_p]
-
-# blocking-I/O specific prototypes
-pa.Pa_OpenDefaultStream.restype  = c_int
-pa.Pa_OpenDefaultStream.argtypes = [
-    POINTER(c_void_p),      # stream**
-    c_int,                  # numInputChannels
-    c_int,                  # numOutputChannels
-    c_ulong,                # sampleFormat
-    c_double,               # sampleRate
-    c_ulong,                # framesPerBuffer
-    c_void_p, c_void_p      # callback, userData (both NULL → blocking mode)
-]
-pa.Pa_WriteStream.restype  = c_int
-pa.Pa_WriteStream.argtypes = [c_void_p, c_void_p, c_ulong]  # stream*, buffer, frames
-
-def play(pcm_bytes: bytes, sample_rate: int, channels: int = 1) -> None:
-    """Play entire PCM buffer with one blocking write."""
-    samples  = len(pcm_bytes) // 2        # 16-bit
-    pcm_buf  = (ctypes.c_int16 * samples).from_buffer_copy(pcm_bytes)
-
-    # if verbose:
-    #     print("--- play() called ---")
-    #     print(f"pcm bytes: {len(pcm_bytes)}   samples: {len(pcm_bytes)//2}")
-    #     print(f"sample_rate={sample_rate}   channels={channels}")
-
-    _pa_ok(pa.Pa_Initialize(), "Pa_Initialize failed")
-    ret = pa.Pa_Initialize()
-    # if verbose:
-    #     print("Pa_Initialize →", ret)
-    _pa_ok(ret, "Pa_Initialize failed")
-
-    stream = c_void_p()
-    _pa_ok(
-        pa.Pa_OpenDefaultStream(
-            byref(stream),
-            0,                # no input
-            channels,
-            PA_INT16,
-            sample_rate,
-            0,                # let PortAudio pick optimal size
-            None, None), 
-        "Pa_OpenDefaultStream failed"
-    )
-    _pa_ok(pa.Pa_StartStream(stream), "Pa_StartStream failed")
-
-    total_frames   = samples // channels
-    frames_written = 0
-
-    while frames_written < total_frames:
-        todo_frames = min(CHUNK_FRAMES, total_frames - frames_written)
-        offset      = frames_written * channels * 2  # bytes
-        buf_ptr     = ctypes.c_void_p(ctypes.addressof(pcm_buf) + offset)
-        _pa_ok(pa.Pa_WriteStream(stream, buf_ptr, todo_frames), "Pa_WriteStream failed")
-        frames_written += todo_frames
-
-    pa.Pa_StopStream(stream)
-    pa.Pa_CloseStream(stream)
-    pa.Pa_Terminate() 
\ No newline at end of file
+# ── PortAudio DLL (loaded on first use) ────────────────────────────────
+dll_path = Path.cwd() / "portaudio" / "portaudio.dll"
+
+def _load_portaudio(path: Path):
+    if not path.exists():
+        raise FileNotFoundError(f"PortAudio DLL not found: {path}")
+    lib = ctypes.cdll.LoadLibrary(str(path))
+
+    # core PortAudio prototypes
+    lib.Pa_Initialize.restype             = c_int
+    lib.Pa_Terminate.restype              = c_int
+    lib.Pa_StartStream.restype            = c_int
+    lib.Pa_StopStream.restype             = c_int
+    lib.Pa_AbortStream.restype            = c_int
+    lib.Pa_CloseStream.restype            = c_int
+    lib.Pa_IsStreamActive.restype         = c_int
+    for fn in ("Pa_StartStream", "Pa_StopStream", "Pa_AbortStream", "Pa_CloseStream", "Pa_IsStreamActive"):
+        getattr(lib, fn).argtypes = [c_void_p]
+
+    # blocking-I/O specific prototypes
+    lib.Pa_OpenDefaultStream.restype  = c_int
+    lib.Pa_OpenDefaultStream.argtypes = [
+        POINTER(c_void_p),      # stream**
+        c_int,                  # numInputChannels
+        c_int,                  # numOutputChannels
+        c_ulong,                # sampleFormat
+        c_double,               # sampleRate
+        c_ulong,                # framesPerBuffer
+        c_void_p, c_void_p      # callback, userData (both NULL → blocking mode)
+    ]
+    lib.Pa_WriteStream.restype  = c_int
+    lib.Pa_WriteStream.argtypes = [c_void_p, c_void_p, c_ulong]  # stream*, buffer, frames
+
+    # callback-mode prototypes
+    lib.Pa_GetDefaultOutputDevice.restype = c_int
+    lib.Pa_OpenStream.restype  = c_int
+    lib.Pa_OpenStream.argtypes = [
+        POINTER(c_void_p), POINTER(PaStreamParameters), POINTER(PaStreamParameters),
+        c_double, c_ulong, c_ulong, _PA_STREAM_CALLBACK, c_void_p,
+    ]   # stream**, input, output, sampleRate, framesPerBuffer, streamFlags, callback, userData
+    return lib
+
+class _LazyLibrary:
+    """Loads the DLL at the first `pa.Pa_...` call, so the null/file sinks work without it."""
+
+    def __init__(self, loader):
+        self._loader = loader
+        self._lib = None
+
+    def __getattr__(self, name):
+        if self._lib is None:
+            self._lib = self._loader()
+        return getattr(self._lib, name)
+
+pa = _LazyLibrary(lambda: _load_portaudio(dll_path))
+
+
+class PortAudioSink:
+    """The default output device, fed with blocking writes (see audio_sinks for the interface)."""
+
+    def __init__(self):
+        self._stream = c_void_p()
+
+    def open(self, sample_rate: int, channels: int) -> None:
+        _pa_ok(pa.Pa_Initialize(), "Pa_Initialize failed")
+        _pa_ok(pa.Pa_OpenDefaultStream(byref(self._stream), 0, channels, PA_INT16,
+                                       sample_rate, 0, None, None),
+               "Pa_OpenDefaultStream failed")
+        _pa_ok(pa.Pa_StartStream(self._stream), "Pa_StartStream failed")
+
+    def write(self, view: memoryview, frames: int) -> bool:
+        # the device reads straight from the player's ring buffer
+        ret = pa.Pa_WriteStream(self._stream, (ctypes.c_char * len(view)).from_buffer(view), frames)
+        if ret == PA_OUTPUT_UNDERFLOWED:
+            return True
+        if ret != 0:
+            raise RuntimeError(f"Pa_WriteStream failed (PaError={ret})")
+        return False
+
+    def abort(self) -> None:
+        pa.Pa_AbortStream(self._stream)
+        pa.Pa_StartStream(self._stream)
+
+    def close(self) -> None:
+        pa.Pa_StopStream(self._stream)
+        pa.Pa_CloseStream(self._stream)
+        pa.Pa_Terminate()
+
+
+class PcmPlayer:
+    """
+    One PortAudio output stream for the whole session.
+
+    PCM is queued with `enqueue()` into a ring buffer; a writer thread moves
+    it to the device in `block_frames` blocks, so consecutive segments follow
+    each other without closing and reopening the device. All PortAudio calls
+    are made from the writer thread. `output` replaces the device with
+    another sink, e.g. audio_sinks.NullSink to run headless.
+
+      enqueue(pcm)   queue audio; blocks while the ring is full
+      end_segment()  mark a segment boundary (for the gap measurement)
+      play_cue(pcm)  queue a short status sound; never blocks
+      drain()        wait until at most `keep_bytes` are still queued
+      flush()        drop everything queued, including the device buffer
+      stop()         play what is queued and close the device
+
+    A gap is the time the ring stood empty between the end of one segment
+    and the first audio of the next; `stats()` reports them.
+
+    With `crossfade_ms`, end_segment() takes the last `crossfade_ms` of the
+    segment back out of the ring. If the next segment arrives before the
+    ring runs dry, that tail is mixed with its first samples (crossfade, so
+    the join is seamless and `crossfade_ms` shorter); otherwise the writer
+    plays the tail faded out. Segments for a crossfading player come without
+    a fade of their own (pcm_dsp.crossfade).
+
+    Cues (earcons) bypass the ring: they wait in a queue of their own and
+    the device side plays them while the ring is empty. They take no part
+    in crossfades and are not counted in frames_enqueued / frames_written,
+    so they do not move the segment positions barge-in measures against.
+
+    The ring positions are running byte counts: `_written` only moves
+    forward on the producer side, `_consumed` only on the device side, so a
+    consumer that does not take the lock (CallbackPcmPlayer) can share it.
+    """
+
+    def __init__(self, sample_rate: int = 24_000, channels: int = 1, *,
+                 buffer_ms: int = 2000, block_frames: int = 1024, crossfade_ms: int = 0,
+                 output=None):
+        self.output = output if output is not None else self._default_output()
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frame_bytes = 2 * channels
+        self.block_frames = block_frames
+        self.capacity = sample_rate * buffer_ms // 1000 * self.frame_bytes
+        self.crossfade_bytes = sample_rate * crossfade_ms // 1000 * self.frame_bytes
+
+        self._ring = bytearray(self.capacity)
+        self._ring_addr = ctypes.addressof((ctypes.c_char * self.capacity).from_buffer(self._ring))
+        self._written = 0            # bytes ever queued (producer side)
+        self._consumed = 0           # bytes ever handed to the device (device side)
+        self._flush_to = 0           # everything before this was dropped by flush()
+        self._pullback_margin = 0    # bytes the device side may still take without the lock
+        self._in_flight: int | None = None   # ring position the writer is handing to the device
+        self._in_flight_end = 0              # ... and where that block ends
+        self._cond = threading.Condition()
+        self._flush_requested = False
+        self._stopping = False
+        self._started = threading.Event()
+        self._error: Exception | None = None
+        self._thread: threading.Thread | None = None
+        self._cues: deque[tuple[memoryview, int]] = deque()   # queued (cue, its address); no lock
+        self._cue: memoryview | None = None        # the cue the device side plays (or played last)
+        self._cue_addr = 0                         # its address, taken once in play_cue
+        self._cue_pos = 0
+        self._cue_left = 0                         # bytes of it not played yet
+        self.cues_queued = 0
+
+        self.frames_enqueued = 0     # stream position of the next enqueued frame
+        self.bytes_copied = 0        # into the ring, plus held-back crossfade tails
+        self.frames_written = 0      # frames handed to the device
+        self.underflows = 0
+        self.gaps_s = deque(maxlen=500)
+        self._segment_ended = False
+        self._segment_open = False          # audio queued since the last end_segment()/flush()
+        self._drained_at: float | None = None
+        self._tail: bytearray | None = None  # end of the last segment, waiting for the next one
+        self.crossfades = 0
+        self.overlap_frames = 0
+
+    def _default_output(self):
+        return PortAudioSink()
+
+    @property
+    def _size(self) -> int:
+        return self._written - max(self._consumed, self._flush_to)
+
+    def _occupied(self) -> int:
+        """Ring bytes that must not be overwritten: queued audio plus a block still being written."""
+        if self._in_flight is None:
+            return self._size
+        return self._written - min(self._in_flight, max(self._consumed, self._flush_to))
+
+    def _unhanded(self) -> int:
+        """Queued bytes the writer has not handed to the device yet (a block in flight is excluded)."""
+        handed = max(self._consumed, self._flush_to)
+        if self._in_flight is not None:
+            handed = max(handed, self._in_flight_end)
+        return self._written - handed
+
+    # ── lifecycle ───────────────────────────────────────────────────────
+    def start(self) -> "PcmPlayer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pcm-player", daemon=True)
+            self._thread.start()
+            self._started.wait()
+            if self._error is not None:
+                raise self._error
+        return self
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # ── producer side ───────────────────────────────────────────────────
+    def _check_error(self) -> None:
+        """The writer thread died on a device error: raise it here instead of waiting forever (lock held)."""
+        if self._error is not None:
+            raise self._error
+
+    def enqueue(self, pcm, interrupt: threading.Event | None = None) -> None:
+        """Queue PCM (bytes-like); blocks while the ring is full. Gives up once `interrupt` is set."""
+        data = memoryview(pcm).cast("B")
+        data = data[:len(data) - len(data) % self.frame_bytes]
+        with self._cond:
+            self._check_error()
+            self._segment_open = self._segment_open or bool(data)
+            if data and self._segment_ended:
+                # first audio of a new segment: how long was the device starved?
+                self.gaps_s.append(time.perf_counter() - self._drained_at if self._drained_at else 0.0)
+                self._segment_ended = False
+                self._drained_at = None
+                tail, self._tail = self._tail, None
+                if tail is not None:
+                    mixed, used = crossfade(tail, data)
+                    self.crossfades += 1
+                    self.overlap_frames += used // self.frame_bytes
+                    if not self._write(memoryview(mixed).cast("B"), interrupt):
+                        return
+                    data = data[used:]
+            self._write(data, interrupt)
+
+    def _write(self, data: memoryview, interrupt: threading.Event | None) -> bool:
+        """Copy `data` into the ring, waiting for room (lock held). False when stopped or interrupted."""
+        position = 0
+        while position < len(data):
+            self._cond.wait_for(lambda: self._occupied() < self.capacity or self._stopping
+                                or (interrupt is not None and interrupt.is_set()))
+            self._check_error()
+            if self._stopping or (interrupt is not None and interrupt.is_set()):
+                return False
+            n = min(len(data) - position, self.capacity - self._occupied())
+            self._put(data[position:position + n])
+            position += n
+            self._cond.notify_all()
+        return True
+
+    def _put(self, data) -> None:
+        """Append to the ring (the one copy on the way to the device); the caller holds the lock and made sure it fits."""
+        n = len(data)
+        self.bytes_copied += n
+        write = self._written % self.capacity
+        first = min(n, self.capacity - write)
+        self._ring[write:write + first] = data[:first]
+        self._ring[:n - first] = data[first:]
+        self._written += n
+        self.frames_enqueued += n // self.frame_bytes
+
+    def play_cue(self, pcm) -> None:
+        """Queue a cue outside the ring; the device side plays it once no speech is queued."""
+        data = bytearray(pcm)       # writable, so the device can read it in place
+        data = data[:len(data) - len(data) % self.frame_bytes]
+        if data:
+            # the callback engine memmoves from this address; no ctypes object is made per callback
+            self._cues.append((memoryview(data), ctypes.addressof((ctypes.c_char * len(data)).from_buffer(data))))
+            self.cues_queued += 1
+            with self._cond:
+                self._cond.notify_all()
+
+    def _cue_take(self, n: int) -> int:
+        """
+        Take up to `n` bytes of the pending cues (device side only) and return
+        how many: `_cue[_cue_pos - taken:_cue_pos]`, at `_cue_addr + _cue_pos - taken`.
+        """
+        if not self._cue_left:
+            if not self._cues:
+                return 0
+            (self._cue, self._cue_addr), self._cue_pos = self._cues.popleft(), 0
+            self._cue_left = len(self._cue)
+        taken = n if n < self._cue_left else self._cue_left
+        self._cue_pos += taken
+        self._cue_left -= taken
+        return taken
+
+    def end_segment(self) -> None:
+        with self._cond:
+            self._segment_ended = True
+            self._segment_open = False
+            if (self.crossfade_bytes and self._tail is None
+                    and self._unhanded() >= self.crossfade_bytes + self._pullback_margin):
+                # hold back the last crossfade_bytes; the device side has not reached them
+                n = self.crossfade_bytes
+                start = (self._written - n) % self.capacity
+                first = min(n, self.capacity - start)
+                self._tail = bytearray(self._ring[start:start + first]) + self._ring[:n - first]
+                self.bytes_copied += n
+                self._written -= n
+                self.frames_enqueued -= n // self.frame_bytes
+            if not self._size and self._tail is None:
+                self._drained_at = time.perf_counter()
+
+    def drain(self, keep_bytes: int = 0, interrupt: threading.Event | None = None,
+              timeout: float | None = None) -> bool:
+        """Wait until at most `keep_bytes` are queued; False on timeout or interrupt."""
+        with self._cond:
+            done = self._cond.wait_for(
+                lambda: self._size <= keep_bytes or self._error is not None
+                or (interrupt is not None and interrupt.is_set()),
+                timeout)
+            self._check_error()
+            return done and not (interrupt is not None and interrupt.is_set())
+
+    def flush(self) -> None:
+        """Drop queued audio; the writer also discards what the device still holds."""
+        with self._cond:
+            self.frames_enqueued -= self._size // self.frame_bytes
+            self._flush_to = self._written
+            self._flush_requested = True
+            self._tail = None
+            self._segment_ended = False
+            self._segment_open = False
+            self._drained_at = None
+            self._cond.notify_all()
+
+    def _release_tail(self) -> None:
+        """The next segment is not here in time: play the held tail faded out (lock held, ring empty)."""
+        if not self._size and self._tail is not None:
+            tail, self._tail = self._tail, None
+            samples = np.frombuffer(tail, dtype="<i2")
+            fade_out(samples, len(samples))
+            self._put(tail)
+
+    def _note_drained(self) -> None:
+        if (not self._size and self._tail is None and self._segment_ended
+                and self._drained_at is None):
+            self._drained_at = time.perf_counter()
+
+    # ── writer thread ───────────────────────────────────────────────────
+    def _run(self) -> None:
+        try:
+            self.output.open(self.sample_rate, self.channels)
+        except Exception as e:
+            self._error = e
+            self._started.set()
+            return
+        self._started.set()
+
+        block_bytes = self.block_frames * self.frame_bytes
+        ring = memoryview(self._ring)
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._size or self._tail is not None or self._cues
+                                        or self._cue_left or self._stopping or self._flush_requested)
+                    flush, self._flush_requested = self._flush_requested, False
+                    self._release_tail()
+                    if self._stopping and not self._size:
+                        break
+                    start = max(self._consumed, self._flush_to)
+                    read = start % self.capacity
+                    # straight from the ring, up to its end; the next write continues at 0
+                    n = min(self._written - start, block_bytes, self.capacity - read)
+                    self._in_flight = start if n else None
+                    self._in_flight_end = start + n
+                    cue_n = 0 if n else self._cue_take(block_bytes)
+                    cue = self._cue[self._cue_pos - cue_n:self._cue_pos] if cue_n else None
+
+                try:
+                    if flush:
+                        self.output.abort()
+                    if cue is not None:
+                        self.output.write(cue, len(cue) // self.frame_bytes)
+                    if not n:
+                        continue
+                    if self.output.write(ring[read:read + n], n // self.frame_bytes):
+                        self.underflows += 1
+                except Exception as e:
+                    # the device is gone: producers get the error instead of waiting for room
+                    with self._cond:
+                        self._error = e
+                        self._stopping = True
+                        self._in_flight = None
+                        self._cond.notify_all()
+                    break
+
+                with self._cond:
+                    self._consumed = max(self._consumed, start + n)
+                    self._in_flight = None
+                    self.frames_written += n // self.frame_bytes
+                    self._note_drained()
+                    self._cond.notify_all()
+        finally:
+            self.output.close()
+
+    # ── metrics ─────────────────────────────────────────────────────────
+    @property
+    def queued_ms(self) -> float:
+        return self._size / self.frame_bytes / self.sample_rate * 1000
+
+    def stats(self) -> dict:
+        gaps = sorted(self.gaps_s)
+        return {
+            "engine": "blocking",
+            "output": type(self.output).__name__ if self.output is not None else "PortAudio callback",
+            "queued_ms": round(self.queued_ms, 1),
+            "frames_written": self.frames_written,
+            "bytes_copied": self.bytes_copied,
+            "underflows": self.underflows,
+            "crossfades": self.crossfades,
+            "cues": self.cues_queued,
+            "overlap_ms": round(self.overlap_frames / self.sample_rate * 1000, 1),
+            "segments": len(gaps),
+            "gap_ms_median": round(gaps[len(gaps) // 2] * 1000, 1) if gaps else None,
+            "gap_ms_p95": round(gaps[int(len(gaps) * 0.95) - 1] * 1000, 1) if gaps else None,
+            "gap_ms_max": round(gaps[-1] * 1000, 1) if gaps else None,
+        }
+
+
+class CallbackPcmPlayer(PcmPlayer):
+    """
+    PcmPlayer driven by a PortAudio callback instead of blocking writes.
+
+    The callback copies straight from the ring into PortAudio's buffer with
+    memmove and never takes the lock: it reads `_written`, advances
+    `_consumed` and writes silence when the ring is short. Nothing is
+    allocated per callback beyond the ints and floats ctypes hands it.
+    A housekeeping thread ticks once per callback period to wake producers,
+    release held crossfade tails and note drained segments.
+
+    `callback_frames` (frames per callback) and `latency_ms` (PortAudio's
+    suggested output latency) trade latency against robustness: smaller is
+    more responsive, larger survives GC pauses and a busy event loop.
+
+    flush() drops the ring at the next callback without aborting the stream;
+    what PortAudio already holds (about `latency_ms`) still plays.
+
+    An underrun is a callback that found less audio than it needed while a
+    segment was still being queued (silence between answers does not
+    count). Jitter is the deviation of the time between callbacks from the
+    nominal period.
+    """
+
+    JITTER_WINDOW = 4096     # callback intervals kept for the percentiles
+
+    def __init__(self, sample_rate: int = 24_000, channels: int = 1, *,
+                 buffer_ms: int = 2000, callback_frames: int = 256, latency_ms: float = 40.0,
+                 crossfade_ms: int = 0):
+        super().__init__(sample_rate, channels, buffer_ms=buffer_ms,
+                         block_frames=callback_frames, crossfade_ms=crossfade_ms)
+        self.callback_frames = callback_frames
+        self.latency_ms = latency_ms
+        self.period_s = callback_frames / sample_rate
+        # the callback may be copying one period while end_segment() pulls a tail back
+        self._pullback_margin = 2 * callback_frames * self.frame_bytes
+
+        self.callbacks = 0
+        self.underruns = 0
+        self.device_underflows = 0
+        self._intervals = array("d", bytes(8 * self.JITTER_WINDOW))
+        self._last_callback = 0.0
+        self._callback = _PA_STREAM_CALLBACK(self._fill)    # kept referenced while the stream lives
+
+    def _default_output(self):
+        return None     # the callback stream is opened in _run; there is no sink to write to
+
+    def _fill(self, _input, output, frames, _time_info, status_flags, _user_data):
+        now = time.perf_counter()
+        if self._last_callback:
+            self._intervals[(self.callbacks - 1) % self.JITTER_WINDOW] = now - self._last_callback
+        self._last_callback = now
+        self.callbacks += 1
+        if status_flags & PA_OUTPUT_UNDERFLOW:
+            self.device_underflows += 1
+
+        wanted = frames * self.frame_bytes
+        start = self._consumed if self._consumed > self._flush_to else self._flush_to
+        n = self._written - start
+        if n > wanted:
+            n = wanted
+        if n > 0:
+            read = start % self.capacity
+            first = self.capacity - read
+            if first >= n:
+                ctypes.memmove(output, self._ring_addr + read, n)
+            else:
+                ctypes.memmove(output, self._ring_addr + read, first)
+                ctypes.memmove(output + first, self._ring_addr, n - first)
+            self._consumed = start + n
+            self.frames_written += n // self.frame_bytes
+        else:
+            n = self._cue_take(wanted)
+            if n:
+                ctypes.memmove(output, self._cue_addr + self._cue_pos - n, n)
+        if n < wanted:
+            ctypes.memset(output + n, 0, wanted - n)
+            if self._segment_open:
+                self.underruns += 1
+        return PA_CONTINUE
+
+    def _run(self) -> None:
+        stream = c_void_p()
+        try:
+            _pa_ok(pa.Pa_Initialize(), "Pa_Initialize failed")
+            device = pa.Pa_GetDefaultOutputDevice()
+            if device < 0:
+                _pa_ok(device, "No default output device")
+            params = PaStreamParameters(device=device, channelCount=self.channels,
+                                        sampleFormat=PA_INT16,
+                                        suggestedLatency=self.latency_ms / 1000,
+                                        hostApiSpecificStreamInfo=None)
+            _pa_ok(pa.Pa_OpenStream(byref(stream), None, byref(params), self.sample_rate,
+                                    self.callback_frames, 0, self._callback, None),
+                   "Pa_OpenStream failed")
+            _pa_ok(pa.Pa_StartStream(stream), "Pa_StartStream failed")
+        except Exception as e:
+            self._error = e
+            self._started.set()
+            return
+        self._started.set()
+
+        try:
+            while True:
+                with self._cond:
+                    # producers wait on the condition; the callback cannot notify it
+                    self._cond.wait(self.period_s)
+                    self._flush_requested = False
+                    self._release_tail()
+                    self._note_drained()
+                    self._cond.notify_all()
+                    if self._stopping and not self._size:
+                        break
+            # let the device play out what the last callbacks handed it
+            time.sleep(self.latency_ms / 1000 + self.period_s)
+        finally:
+            pa.Pa_StopStream(stream)
+            pa.Pa_CloseStream(stream)
+            pa.Pa_Terminate()
+
+    def stats(self) -> dict:
+        count = min(max(self.callbacks - 1, 0), self.JITTER_WINDOW)
+        jitter = sorted(abs(self._intervals[i] - self.period_s) for i in range(count))
+        return {
+            **super().stats(),
+            "engine": "callback",
+            "callback_frames": self.callback_frames,
+            "latency_ms": self.latency_ms,
+            "callbacks": self.callbacks,
+            "underruns": self.underruns,
+            "device_underflows": self.device_underflows,
+            "jitter_ms_median": round(jitter[len(jitter) // 2] * 1000, 2) if jitter else None,
+            "jitter_ms_p99": round(jitter[int(len(jitter) * 0.99) - 1] * 1000, 2) if jitter else None,
+            "jitter_ms_max": round(jitter[-1] * 1000, 2) if jitter else None,
+        }
@@ -0,0 +1,70 @@
+"""
+recorded_corpus.py
+Recorded conversations from events/states/ as benchmark input: assistant
+answers, replayed as an LLM-like stream of small text deltas, and TTS audio
+from tts_cache/ as PCM segments.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+from typing import AsyncIterator, Iterator
+
+import numpy as np
+
+STATES_DIR = Path(__file__).resolve().parent / "events" / "states"
+TTS_CACHE_DIR = Path(__file__).resolve().parent / "tts_cache"
+
+
+def load_assistant_messages(limit: int | None = None, min_chars: int = 1) -> list[str]:
+    """All assistant answers from the recorded chats, oldest file first."""
+    messages: list[str] = []
+    for path in sorted(STATES_DIR.glob("chat_*.json")):
+        try:
+            chat = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        for message in chat:
+            content = message.get("content")
+            if message.get("role") == "assistant" and isinstance(content, str) and len(content) >= min_chars:
+                messages.append(content)
+                if limit is not None and len(messages) >= limit:
+                    return messages
+    return messages
+
+
+def iter_deltas(text: str, chars_per_delta: int = 4) -> Iterator[str]:
+    """Cut text into token-sized deltas (~4 characters, like GPT-4o streams)."""
+    for i in range(0, len(text), chars_per_delta):
+        yield text[i:i + chars_per_delta]
+
+
+async def replay_stream(text: str, chars_per_delta: int = 4,
+                        delta_interval_s: float = 0.015) -> AsyncIterator[str]:
+    """Replay text as an LLM stream: one delta every `delta_interval_s` seconds."""
+    for delta in iter_deltas(text, chars_per_delta):
+        await asyncio.sleep(delta_interval_s)
+        yield delta
+
+
+def load_pcm_segments(limit: int | None = None, sr: int = 24_000) -> list[bytes]:
+    """
+    Raw 16-bit mono PCM sentences from tts_cache/. Without a cache (fresh
+    checkout) speech-like stand-ins are generated: one per recorded answer,
+    about 60 ms per character, with quiet leading and trailing noise.
+    """
+    segments = [path.read_bytes() for path in sorted(TTS_CACHE_DIR.glob("*.pcm"))[:limit]]
+    if segments:
+        return segments
+
+    rng = np.random.default_rng(0)
+    for text in load_assistant_messages(limit=limit or 200, min_chars=10):
+        n_voiced = min(len(text), 300) * 60 * sr // 1000
+        syllables = np.abs(np.sin(np.arange(n_voiced) * (np.pi * 4 / sr)))      # ~4 syllables per second
+        voiced = rng.normal(0, 6000, n_voiced) * syllables
+        lead = rng.normal(0, 30, rng.integers(0, sr // 5))                      # 0-200 ms
+        tail = rng.normal(0, 30, rng.integers(sr // 20, sr * 2 // 5))           # 50-400 ms
+        pcm = np.concatenate([lead, voiced, tail]).clip(-32768, 32767).astype("<i2")
+        segments.append(pcm.tobytes())
+    return segments
@@ -0,0 +1,197 @@
+"""
+response_session.py
+One spoken answer per ResponseSession, and the arbiter that decides which
+session's audio goes to the single output.
+
+The main conversation, the Obsidian and tasks agents, web searches and the
+n8n crew each answer in a session of their own: its own sentence map,
+segment queue, MIDI events, transcript, text and tool queues and finalize
+signals, so the tool calls of two agents streaming at once never mix.
+Sessions can be filled at the same time; only the playback order is shared.
+
+AudioArbiter policies:
+
+  serial       sessions play one after the other, in the order they were
+               opened (an agent's answer waits until the current one ends)
+  interleave   whichever open session has its next segment ready plays it,
+               round robin at segment boundaries
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from collections import defaultdict, deque
+
+from chunk_queue import CoalescingChunkQueue
+from playback_queue import SegmentQueue
+from transcript import Transcript
+
+END_OF_ANSWER = "END"       # segment marker after the last order of a session
+_numbers = itertools.count(1)
+
+
+class ResponseSession:
+    def __init__(self, name: str, queue_bytes: int = 4096):
+        self.name = name
+        self.number = next(_numbers)                       # tells sessions of the same name apart in stats
+        self.segments = SegmentQueue()                     # order -> PCM / PcmStream / marker
+        self.sentences = defaultdict(lambda: None)         # order -> text printed with that segment
+        self.midi_events: dict = {}                        # order -> midi_tags.MidiEvent
+        self.transcript = Transcript()
+        self.text_queue = CoalescingChunkQueue(queue_bytes)   # LLM deltas, merged while the processor is behind
+        self.finalized = asyncio.Event()
+        self.tool_queue = CoalescingChunkQueue(queue_bytes)   # tool call deltas, for answers that use tools
+        self.tools_finalized = asyncio.Event()
+        self.play_order = 0                                # next order to play
+        self.interrupted = False                           # barge-in: nothing more is played or requested
+        self.heard_text: str | None = None                 # barge-in: the part of the answer that was heard
+        self.history_message: dict | None = None           # its chat history entry, for answers that write one
+        self.opened_at = time.perf_counter()
+        self.first_segment_at: float | None = None
+        self.processor: asyncio.Task | None = None         # its text_processor
+        self.tool_processor: asyncio.Task | None = None    # its tool_processor, if it was opened with tools
+
+    # ── producer side ───────────────────────────────────────────────────
+    async def put_text(self, text: str) -> None:
+        await self.text_queue.put({"type": "text", "content": text})
+
+    async def put_tool(self, tool_calls: list, is_complete: bool) -> None:
+        await self.tool_queue.put({"type": "tool", "tool_calls": tool_calls, "is_complete": is_complete})
+
+    async def put_finalize(self) -> None:
+        await self.text_queue.put({"type": "finalize"})
+        if self.tool_processor is not None:
+            await self.tool_queue.put({"type": "finalize"})
+
+    async def wait_finalized(self) -> str:
+        """The full answer, once its text processor (and tool processor) have finalized the turn."""
+        await self.finalized.wait()
+        if self.tool_processor is not None:
+            await self.tools_finalized.wait()
+        return self.transcript.text
+
+    def end(self, order: int) -> None:
+        """No segment follows `order - 1`; the arbiter closes the session when it gets here."""
+        self.segments[order] = END_OF_ANSWER
+
+    def has_queued_audio(self) -> bool:
+        return any(segment not in (None, END_OF_ANSWER)
+                   for order, segment in self.segments.items() if order >= self.play_order)
+
+
+class AudioArbiter:
+    """
+    Hands the playback loop one (session, order, segment) at a time.
+    Called on the event loop only.
+    """
+
+    def __init__(self, policy: str = "serial", queue_bytes: int = 4096):
+        if policy not in ("serial", "interleave"):
+            raise ValueError(f"Unknown arbiter policy: {policy}")
+        self.policy = policy
+        self.queue_bytes = queue_bytes
+        self.sessions: list[ResponseSession] = []   # open, in the order they were opened
+        self.current: ResponseSession | None = None  # the session that played last
+        self.latest: ResponseSession | None = None   # the session opened last
+        self._changed: asyncio.Future | None = None
+        self.opened = 0
+        self.interrupted = 0
+        self.max_open = 0
+        self.first_segment_s = deque(maxlen=100)     # session opened -> its first segment handed to playback
+
+    def open(self, name: str, *, interrupted: bool = False) -> ResponseSession:
+        """A new session; with `interrupted` (the user is talking) it is never played."""
+        session = ResponseSession(name, self.queue_bytes)
+        session.interrupted = interrupted
+        self.latest = session
+        self.opened += 1
+        if not interrupted:
+            self.sessions.append(session)
+            self.max_open = max(self.max_open, len(self.sessions))
+            self._wake()
+        return session
+
+    def close(self, session: ResponseSession) -> None:
+        if session in self.sessions:
+            self.sessions.remove(session)
+            self._wake()
+
+    def interrupt(self) -> None:
+        """Barge-in: drop every open session."""
+        for session in self.sessions:
+            session.interrupted = True
+            self.interrupted += 1
+        self.sessions.clear()
+        self._wake()
+
+    def playing(self) -> ResponseSession | None:
+        """The session whose audio plays now, or plays next."""
+        if self.current in self.sessions:
+            return self.current
+        return self.sessions[0] if self.sessions else None
+
+    def rank(self, session: ResponseSession | None) -> int:
+        """
+        Playback position: 0 plays now or next (every open session when
+        interleaved), then the order sessions were opened in. Sessions that
+        will not play (closed, dropped, None) come last.
+        """
+        if session not in self.sessions:
+            return len(self.sessions)
+        return self.sessions.index(session) if self.policy == "serial" else 0
+
+    def advance(self, session: ResponseSession) -> None:
+        session.play_order += 1
+
+    def has_queued_audio(self) -> bool:
+        return any(session.has_queued_audio() for session in self.sessions)
+
+    def _wake(self) -> None:
+        if self._changed is not None and not self._changed.done():
+            self._changed.set_result(None)
+
+    def _candidates(self) -> list[ResponseSession]:
+        if self.policy == "serial":
+            return self.sessions[:1]
+        # round robin: start after the session that played last
+        if self.current in self.sessions:
+            i = self.sessions.index(self.current) + 1
+            return self.sessions[i:] + self.sessions[:i]
+        return list(self.sessions)
+
+    async def next_segment(self) -> tuple[ResponseSession, int, object]:
+        """Wait for the next segment to play, or an END_OF_ANSWER marker to close its session."""
+        while True:
+            candidates = self._candidates()
+            for session in candidates:
+                segment = session.segments.get(session.play_order)
+                if segment is not None:
+                    self.current = session
+                    if session.first_segment_at is None and segment != END_OF_ANSWER:
+                        session.first_segment_at = time.perf_counter()
+                        self.first_segment_s.append(session.first_segment_at - session.opened_at)
+                    return session, session.play_order, segment
+
+            # woken by a segment of a candidate, or by a session being opened, closed or dropped
+            self._changed = asyncio.get_running_loop().create_future()
+            waits = [asyncio.ensure_future(s.segments.wait(s.play_order)) for s in candidates]
+            try:
+                await asyncio.wait([self._changed, *waits], return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for wait in waits:
+                    wait.cancel()
+                self._changed = None
+
+    def stats(self) -> dict:
+        waits = sorted(self.first_segment_s)
+        return {
+            "policy": self.policy,
+            "open": [{"name": s.name, "play_order": s.play_order,
+                      "segments": len(s.segments), "finalized": s.finalized.is_set()}
+                     for s in self.sessions],
+            "opened": self.opened,
+            "interrupted": self.interrupted,
+            "max_open": self.max_open,
+            "first_segment_s_median": round(waits[len(waits) // 2], 3) if waits else None,
+        }
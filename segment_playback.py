@@ -0,0 +1,108 @@
+"""
+segment_playback.py
+The playback loop of OAI_OAI_11LABS.manage_audio_playback: takes the
+segments the AudioArbiter hands out, prints each sentence as its audio
+starts and feeds the audio into one PcmPlayer.
+
+The player, the barge-in flag, the MIDI handler and the printing are
+parameters, so the loop runs the same against a sound card, a NullSink or
+a WavFileSink (bench_playback_headless.py).
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Awaitable, Callable
+
+from pcm_stream import PcmStream
+from response_session import END_OF_ANSWER, AudioArbiter, ResponseSession
+
+RECEIVING = ">>>>>>  Receiving...  <<<<<<<"     # status line the first sentence of an answer prints over
+
+
+class SegmentPlayback:
+    def __init__(self, player, arbiter: AudioArbiter, *, low_water_bytes: int,
+                 interrupt: threading.Event | None = None,
+                 on_midi: Callable[[object], Awaitable[None]] | None = None,
+                 echo: Callable[[str], None] = print):
+        self.player = player
+        self.arbiter = arbiter
+        self.low_water_bytes = low_water_bytes      # queue the next segment while this much is left
+        self.interrupt = interrupt or threading.Event()   # barge-in: the player stops at its next write
+        self.on_midi = on_midi                      # async handler of a session's midi_tags.MidiEvent
+        self.echo = echo
+        self.current = None     # (session, order, total frames of the segment, player future) while audio plays
+
+    def queue_segment(self, chunks) -> int:
+        """
+        Feed one segment into the player (playback thread) and return once only
+        `low_water_bytes` of it is left, so the next one follows without a gap
+        (and is crossfaded with the tail of this one).
+        Returns the frames of this segment handed to the device so far.
+        """
+        player = self.player
+        segment_start = player.frames_enqueued
+        for chunk in chunks:
+            if self.interrupt.is_set():
+                break
+            player.enqueue(chunk, interrupt=self.interrupt)
+        player.end_segment()
+        player.drain(self.low_water_bytes, interrupt=self.interrupt)
+        return max(0, player.frames_written - segment_start)
+
+    def print_coalesced(self, session: ResponseSession, order: int) -> None:
+        """Print the sentences merged into segment `order` (marked COALESCED)."""
+        covered = order + 1
+        while session.segments.get(covered) == "COALESCED":
+            sentence = session.sentences[covered]
+            self.echo(sentence.removeprefix(" ").removeprefix("\n"))
+            covered += 1
+
+    async def run(self, until: ResponseSession | None = None) -> None:
+        """Play forever, or until the session `until` has been closed (or dropped by a barge-in)."""
+        while until is None or until in self.arbiter.sessions:
+            await self.play_next()
+
+    async def play_next(self) -> None:
+        """Wait for one segment (or END_OF_ANSWER marker) and play it."""
+        # woken by the assignment of exactly the order a session plays next; a barge-in drops every session
+        session, order, content = await self.arbiter.next_segment()
+        if content == END_OF_ANSWER:
+            self.arbiter.close(session)
+            return
+
+        if content == "MIDI_COMMAND":
+            if self.on_midi is not None:
+                await self.on_midi(session.midi_events[order])
+        elif content == "EMPTYLINE":
+            printed = session.sentences[order].removeprefix("\n")   # a code / table row keeps its break in the map
+            self.echo(f"\r{printed}")
+            # a coalesced group whose TTS failed: its followers are printed here, or never
+            self.print_coalesced(session, order)
+        elif content == "COALESCED":
+            pass    # already printed and spoken with the segment before it
+        else:
+            if order == 0:
+                first = session.sentences[order].removeprefix("\n")
+                self.echo("\r" + " " * len(RECEIVING) + f"\r{first}")
+            else:
+                self.echo(session.sentences[order].removeprefix(" ").removeprefix("\n"))
+            # sentences merged into this segment's audio are printed along with it
+            self.print_coalesced(session, order)
+
+            if isinstance(content, PcmStream):
+                chunks = content.chunks()
+                total_frames = lambda stream=content: stream.nbytes // 2
+            else:
+                chunks = (content,)
+                total_frames = lambda pcm=content: len(pcm) // 2
+            playback = asyncio.ensure_future(asyncio.to_thread(self.queue_segment, chunks))
+            self.current = (session, order, total_frames, playback)
+            try:
+                await playback
+            finally:
+                self.current = None
+            if session.interrupted:
+                return   # dropped by barge_in(), which records how much of this order was heard
+
+        self.arbiter.advance(session)
@@ -0,0 +1,150 @@
+"""
+sentence_boundaries.py
+Sentence ends that know Dutch and English abbreviations.
+
+SENTENCE_END_PATTERN cuts after every "[.!?]" preceded by two non-digit,
+non-space characters, so "bijv.", "o.a.", "d.w.z." and "Dr." each became
+a sentence (an extra TTS request and a pause in the middle of a clause).
+SentenceBoundaryDetector keeps the pattern's rules:
+
+  after [.!?]   the two characters before it are no digit or space, and a
+                whitespace character (or "$") follows
+  before \\n     the two characters before it are no newline, or the one
+                before it is ":"
+
+and rejects a "." end when the word it closes is in the abbreviation
+lexicon of the language. The rules are checked in Python on candidates
+only: one `re` scan finds the [.!?] followed by whitespace and the line
+breaks, which is faster than trying the lookbehinds at every position.
+
+A detector can stand in for the compiled pattern: `search(text, pos)`
+returns an object with `end()` (SentenceSegmenter), `split(text)` returns
+the sentences with their boundaries (split_into_sentences).
+"""
+from __future__ import annotations
+
+import re
+
+LEXICONS = {
+    "nl": (
+        "a.u.b.", "bijv.", "blz.", "bv.", "ca.", "d.m.v.", "d.w.z.", "dhr.", "dr.", "drs.",
+        "evt.", "excl.", "i.p.v.", "i.s.m.", "incl.", "ing.", "ir.", "jr.", "m.a.w.", "m.b.t.",
+        "m.b.v.", "mevr.", "mr.", "n.a.v.", "nl.", "nr.", "o.a.", "o.b.v.", "ong.", "prof.", "resp.",
+        "sr.", "t.a.v.", "t.b.v.", "t.o.v.", "vs.", "z.g.", "z.s.m.",
+    ),
+    "en": (
+        "approx.", "dept.", "dr.", "e.g.", "est.", "fig.", "i.e.", "jr.", "mr.", "mrs.",
+        "ms.", "prof.", "sr.", "vol.", "vs.",
+    ),
+}
+# left out, because they end a sentence too often: "etc.", "enz.", "e.d.", "jl.", "inc.", "ltd.",
+# and the words "no." ("The answer is no. He left.") and "st." (street, or the end of "1st.")
+
+# a candidate end: one of .!? with whitespace or "$" after it, or a line break
+CANDIDATE = re.compile(r'[.!?](?=[\s$])|\n')
+_candidate = CANDIDATE.search
+
+
+class Boundary:
+    """A zero-width match at a sentence end, like the one SENTENCE_END_PATTERN returns."""
+    __slots__ = ("_pos",)
+
+    def __init__(self, pos: int):
+        self._pos = pos
+
+    def start(self) -> int:
+        return self._pos
+
+    def end(self) -> int:
+        return self._pos
+
+    def span(self) -> tuple[int, int]:
+        return self._pos, self._pos
+
+
+class SentenceBoundaryDetector:
+    """
+    `languages` is a "+"-separated choice of LEXICONS ("nl", "en", "nl+en").
+    `context_chars` is how far back a boundary is decided from (the longest
+    abbreviation plus the character before it); pass it to SentenceSegmenter.
+    """
+
+    def __init__(self, languages: str = "nl+en", extra: tuple[str, ...] = ()):
+        self.languages = languages
+        words = set(extra)
+        for language in languages.split("+"):
+            words.update(LEXICONS[language])
+        self.abbreviations = frozenset(word.lower() for word in words)
+        self._longest = max((len(word) for word in self.abbreviations), default=0)
+        self.context_chars = max(3, self._longest + 1)
+
+    def _is_boundary(self, text: str, j: int) -> int:
+        """Boundary position for the candidate character text[j], or -1."""
+        c = text[j]
+        if c == "\n":
+            if j >= 2 and text[j - 1] != "\n" and text[j - 2] != "\n":
+                return j
+            if j >= 1 and text[j - 1] == ":":
+                return j
+            return -1
+        if j < 2:
+            return -1
+        a, b = text[j - 2], text[j - 1]
+        if a.isspace() or b.isspace() or a.isdigit() or b.isdigit():
+            return -1
+        if c == "." and self._is_abbreviation(text, j):
+            return -1
+        return j + 1
+
+    def _is_abbreviation(self, text: str, j: int) -> bool:
+        # the word ending in text[j]; only the last `_longest` characters can make an abbreviation
+        start = max(0, j - self._longest)
+        for k in range(j - 1, start - 1, -1):
+            if text[k].isspace() or text[k] in "(\"'":
+                return text[k + 1:j + 1].lower() in self.abbreviations
+        # no word start in reach: the text starts here, or the word is longer than any abbreviation
+        return start == 0 and text[:j + 1].lower() in self.abbreviations
+
+    def search(self, text: str, pos: int = 0) -> Boundary | None:
+        """The first boundary at or after `pos` (the text before `pos` is only looked at)."""
+        j = pos - 1 if pos else 0
+        while True:
+            match = _candidate(text, j)
+            if match is None:
+                return None
+            j = match.start()
+            boundary = self._is_boundary(text, j)
+            if boundary >= pos:
+                return Boundary(boundary)
+            j += 1
+
+    def finditer(self, text: str):
+        last = -1
+        for match in CANDIDATE.finditer(text):
+            boundary = self._is_boundary(text, match.start())
+            if boundary > last:     # ".\n" ends a sentence once
+                last = boundary
+                yield Boundary(boundary)
+
+    def split(self, text: str) -> list[str]:
+        """Like pattern.split(text) with a zero-width pattern; also cuts after [.!?] at the end of the text."""
+        pieces, last = [], 0
+        for boundary in self.finditer(text):
+            pieces.append(text[last:boundary.end()])
+            last = boundary.end()
+        rest = text[last:]
+        if rest[-1:] in (".", "!", "?") and self._is_boundary(text + " ", len(text) - 1) == len(text):
+            pieces.append(rest)
+            rest = ""
+        pieces.append(rest)
+        return pieces
+
+
+_detectors: dict[str, SentenceBoundaryDetector] = {}
+
+
+def detector(languages: str = "nl+en") -> SentenceBoundaryDetector:
+    """One shared detector per language choice."""
+    if languages not in _detectors:
+        _detectors[languages] = SentenceBoundaryDetector(languages)
+    return _detectors[languages]
@@ -0,0 +1,81 @@
+"""
+sentence_coalescer.py
+Merge adjacent short sentences into one TTS request.
+
+Bullet lists and short replies produce many tiny sentences, each of which
+would cost a full TTS round trip. The coalescer holds a short sentence for
+at most `window_ms` and sends it together with the sentences that follow,
+up to `max_chars`. Sentence 0 is never held (time-to-first-audio), and a
+sentence of `short_chars` or more is sent at once, with whatever was
+already waiting in front of it.
+
+The group is sent under the order of its first sentence; the orders of the
+other members are passed along so the caller can mark them as covered.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+
+@dataclass
+class CoalescePolicy:
+    enabled: bool = True
+    max_chars: int = 160        # text budget of one merged request
+    short_chars: int = 60       # sentences shorter than this may wait for company
+    window_ms: float = 300.0    # longest a short sentence waits
+
+
+class SentenceCoalescer:
+    def __init__(self, send: Callable[[str, int, list[int]], Awaitable[None]],
+                 policy: CoalescePolicy | None = None):
+        """send(text, order, covered_orders) issues one TTS request."""
+        self.send = send
+        self.policy = policy or CoalescePolicy()
+        self.pending: list[tuple[str, int]] = []
+        self._timer: asyncio.Task | None = None
+        self.sentences = 0
+        self.requests = 0
+
+    def _pending_chars(self) -> int:
+        return sum(len(text) for text, _ in self.pending) + max(0, len(self.pending) - 1)
+
+    async def add(self, text: str, order: int) -> None:
+        self.sentences += 1
+        if not self.policy.enabled or order == 0:
+            await self.flush()
+            await self._send([(text, order)])
+            return
+
+        if self.pending and self._pending_chars() + 1 + len(text) > self.policy.max_chars:
+            await self.flush()
+        self.pending.append((text, order))
+
+        if len(text) >= self.policy.short_chars or self._pending_chars() >= self.policy.max_chars:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._expire())
+
+    async def flush(self) -> None:
+        """Send whatever is waiting; call before anything that must stay in order (empty lines, MIDI, end of turn)."""
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+        group, self.pending = self.pending, []
+        if group:
+            await self._send(group)
+
+    async def _expire(self) -> None:
+        await asyncio.sleep(self.policy.window_ms / 1000)
+        await self.flush()
+
+    async def _send(self, group: list[tuple[str, int]]) -> None:
+        self.requests += 1
+        await self.send(" ".join(text for text, _ in group), group[0][1], [order for _, order in group[1:]])
+
+    def reset_counts(self) -> tuple[int, int]:
+        """(sentences, requests) since the last call; used for the per-turn summary."""
+        counts = (self.sentences, self.requests)
+        self.sentences = self.requests = 0
+        return counts
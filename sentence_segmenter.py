@@ -0,0 +1,80 @@
+"""
+sentence_segmenter.py
+Streaming sentence segmentation for text_processor.
+
+Appending every LLM delta to one string and running the sentence pattern
+from its start again costs O(n) per delta, O(n²) over a paragraph without
+a sentence end (code, long list items). SentenceSegmenter only scans the
+characters that arrived since the last scan, plus the few characters
+before them that the pattern's lookbehinds can see, and keeps the text of
+the unfinished sentence as the deltas it arrived in.
+
+The sentences are exactly those of the search-and-cut loop it replaces:
+after a cut the pattern does not see text before it, as if that text had
+been sliced off.
+"""
+from __future__ import annotations
+
+from typing import Iterator
+
+
+class SentenceSegmenter:
+    """
+    `pattern` matches (zero-width) at a sentence end. `context_chars` is how
+    far its lookbehinds reach; a boundary must be decidable from those
+    characters and the one after it (SENTENCE_END_PATTERN: 3,
+    SentenceBoundaryDetector: its `context_chars`).
+
+      append(delta)   add text, without scanning it
+      sentences()     yield the sentences completed since the last call
+      text            the unfinished sentence (joined on demand)
+      reset(text)     replace the unfinished sentence, e.g. after cutting a clause or a tag off
+    """
+
+    def __init__(self, pattern, context_chars: int = 3):
+        self.pattern = pattern
+        self.context_chars = context_chars
+        self._scanned: list[str] = []   # text of the unfinished sentence without a boundary in it
+        self._pending: list[str] = []   # appended after the last scan
+        self._context = ""              # last context_chars of the scanned text
+        self.chars_scanned = 0          # characters the pattern was run over (work done)
+
+    def append(self, text: str) -> None:
+        if text:
+            self._pending.append(text)
+
+    def sentences(self) -> Iterator[str]:
+        """
+        Scan the new text. Each sentence is cut off before it is yielded, so
+        `text` already holds what follows it.
+        """
+        while self._pending:
+            window = self._context + "".join(self._pending)
+            offset = len(self._context)
+            match = self.pattern.search(window, offset)
+            if match is None:
+                self.chars_scanned += len(window) - offset
+                self._scanned.append(window[offset:])
+                self._context = window[-self.context_chars:]
+                self._pending = []
+                return
+            self.chars_scanned += match.end() - offset
+            sentence = "".join(self._scanned) + window[offset:match.end()]
+            rest = window[match.end():]
+            self._scanned, self._context = [], ""
+            self._pending = [rest] if rest else []
+            yield sentence
+
+    @property
+    def text(self) -> str:
+        scanned = "".join(self._scanned)
+        self._scanned = [scanned] if scanned else []
+        return scanned + "".join(self._pending)
+
+    def reset(self, text: str = "") -> None:
+        """Start over with `text` as the unfinished sentence (scanned again on the next call)."""
+        self._scanned, self._context = [], ""
+        self._pending = [text] if text else []
+
+    def __bool__(self) -> bool:
+        return bool(self._scanned or self._pending)
@@ -0,0 +1,90 @@
+"""
+test_midi_tags.py
+SystemTagTokenizer against a whole-text extraction, over random chunkings.
+
+Run:  python -m pytest -q test_midi_tags.py
+"""
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from midi_tags import MAX_TAG_CHARS, OPEN_TAG, MidiEvent, SystemTagTokenizer
+
+CLOSE_TAG = "[/SYSTEM]"
+PIECES = [
+    "Hier is een C. ", "Then more text follows. ", "Een [link] en [x]. ", "[SYS", "[", "\n",
+    "[SYSTEM] [MIDI] [note=C4] [/SYSTEM]", "[SYSTEM][MIDI][command=stop][/SYSTEM]  ",
+    "[SYSTEM] [MIDI] [note=E4] [ /SYSTEM ] ",
+    # unclosed: a mention of the tag, cut by a newline, or a tag that runs past MAX_TAG_CHARS
+    "Use the [SYSTEM] tag to play. ", "[SYSTEM] tag\n", "[SYSTEM] [MIDI] " + "x" * MAX_TAG_CHARS + " [/SYSTEM]",
+]
+
+
+def extract(text: str) -> list:
+    """Whole-text reference: the old find()-based cut, with a tag closing within MAX_TAG_CHARS on its line."""
+    out, plain, i = [], "", 0
+    while True:
+        start = text.find(OPEN_TAG, i)
+        if start == -1:
+            return out + [plain + text[i:]]
+        plain += text[i:start]
+        window = text[start:start + MAX_TAG_CHARS].split("\n")[0]
+        groups, k, end = [], len(OPEN_TAG), -1
+        while (opened := window.find("[", k)) != -1 and (closed := window.find("]", opened)) != -1:
+            group, k = window[opened + 1:closed].strip(), closed + 1
+            if group == "/SYSTEM":
+                end = start + k
+                break
+            groups.append(group)
+        if end == -1:
+            plain += OPEN_TAG
+            i = start + len(OPEN_TAG)
+            continue
+        out += [plain, MidiEvent.from_groups(groups, text[start:end])]
+        plain = ""
+        i = end
+        while i < len(text) and text[i].isspace():
+            i += 1
+
+
+def tokenize(text: str, cuts: list[int]) -> list:
+    tokenizer, out = SystemTagTokenizer(), []
+    for a, b in zip([0, *cuts], [*cuts, len(text)]):
+        out += tokenizer.feed(text[a:b])
+    return out + [tokenizer.flush()]
+
+
+def merged(items: list) -> list:
+    """Adjacent text joined, empty text dropped: chunking only changes where text is split."""
+    out: list = []
+    for item in items:
+        if isinstance(item, str) and out and isinstance(out[-1], str):
+            out[-1] += item
+        elif item != "":
+            out.append(item)
+    return out
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_chunkings_match_whole_text_extraction(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        text = "".join(rng.choice(PIECES) for _ in range(rng.randint(1, 8)))
+        cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(0, 12)))) if len(text) > 1 else []
+        assert merged(tokenize(text, cuts)) == merged(extract(text)), (text, cuts)
+
+
+def test_unclosed_tag_is_released_before_flush():
+    tokenizer = SystemTagTokenizer()
+    assert tokenizer.feed("Use the [SYSTEM] tag to play. Then more text follows. ") == ["Use the "]
+    released = tokenizer.feed("And so on. " * 10)
+    assert "".join(released).startswith("[SYSTEM] tag to play. Then more text follows. And so on.")
+
+
+def test_newline_releases_an_open_tag():
+    tokenizer = SystemTagTokenizer()
+    assert tokenizer.feed("Zie [SYSTEM] hierboven") == ["Zie "]
+    assert tokenizer.feed("\nVolgende regel.") == ["[SYSTEM] hierboven\nVolgende regel."]
+    assert tokenizer.flush() == ""
@@ -0,0 +1,116 @@
+"""
+test_pcm_player.py
+PcmPlayer against sinks that need no audio hardware.
+
+Run:  python -m pytest -q test_pcm_player.py
+"""
+from __future__ import annotations
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from audio_sinks import NullSink
+from portaudio_pcm_player import PcmPlayer
+
+
+class BlockingSink(NullSink):
+    """Holds the first write until `release` is set, like a device busy with that block."""
+
+    def __init__(self):
+        super().__init__(realtime=False)
+        self.writing = threading.Event()
+        self.release = threading.Event()
+        self.writes: list[int] = []
+
+    def write(self, view, frames):
+        self.writes.append(frames)
+        if len(self.writes) == 1:
+            self.writing.set()
+            self.release.wait(5)
+        return super().write(view, frames)
+
+
+def test_end_segment_does_not_pull_back_a_block_in_flight():
+    sink = BlockingSink()
+    player = PcmPlayer(24_000, block_frames=1024, crossfade_ms=30, output=sink).start()
+    try:
+        player.enqueue(bytes(2000))              # 1000 frames: one block, handed to the sink at once
+        assert sink.writing.wait(5)
+        player.end_segment()                     # the 30 ms tail is in that block: nothing to take back
+        sink.release.set()
+        assert player.drain(0, timeout=5)
+        assert player._size == 0
+        assert player._consumed == player._written == 2000
+        assert all(frames > 0 for frames in sink.writes)
+        assert sum(sink.writes) == 1000
+    finally:
+        sink.release.set()
+        player.stop()
+
+
+class FailingSink(NullSink):
+    def __init__(self):
+        super().__init__(realtime=False)
+
+    def write(self, view, frames):
+        raise RuntimeError("Pa_WriteStream failed (PaError=-9999)")
+
+
+def test_write_error_reaches_the_producer():
+    player = PcmPlayer(24_000, buffer_ms=100, output=FailingSink()).start()
+    try:
+        with pytest.raises(RuntimeError, match="Pa_WriteStream"):
+            for _ in range(20):                  # more than the ring holds: would block forever
+                player.enqueue(bytes(4800))
+        with pytest.raises(RuntimeError):
+            player.drain(0, timeout=5)
+    finally:
+        player.stop()
+
+
+def test_cues_bypass_the_ring_and_the_segment_counts():
+    sink = NullSink(realtime=False)
+    player = PcmPlayer(24_000, buffer_ms=100, crossfade_ms=30, output=sink)
+    player.play_cue(bytes(48_000))               # 1 s, ten times the ring, before the player runs: no wait
+    player.start()
+    try:
+        player.enqueue(bytes(4800))              # a 100 ms segment
+        player.end_segment()
+        assert player.frames_enqueued <= 2400    # the cue is not part of the stream positions
+        assert player.drain(0, timeout=5)
+        player.enqueue(bytes(4800))
+        player.end_segment()
+        assert player.drain(0, timeout=5)
+        assert player.frames_written == player.frames_enqueued
+        deadline = time.monotonic() + 5
+        while sink.frames < player.frames_written + 24_000 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert sink.frames == player.frames_written + 24_000
+    finally:
+        player.stop()
+
+
+class RecordingSink(NullSink):
+    def __init__(self):
+        super().__init__(realtime=False)
+        self.data = bytearray()
+
+    def write(self, view, frames):
+        self.data += view
+        return super().write(view, frames)
+
+
+def test_a_held_tail_nothing_follows_is_faded_out():
+    sink = RecordingSink()
+    player = PcmPlayer(24_000, crossfade_ms=30, output=sink)
+    player.enqueue(np.full(4800, 10_000, dtype="<i2").tobytes())    # 200 ms, unfaded
+    player.end_segment()                         # the last 30 ms are held for a crossfade
+    player.start()
+    player.stop()
+    played = np.frombuffer(bytes(sink.data), dtype="<i2")
+    assert len(played) == 4800
+    assert (played[:-720] == 10_000).all()
+    assert (np.diff(played[-720:]) <= 0).all() and played[-1] < 100
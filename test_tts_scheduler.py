@@ -0,0 +1,60 @@
+"""
+test_tts_scheduler.py
+TtsScheduler admission across response sessions (serial playback).
+
+Run:  python -m pytest -q test_tts_scheduler.py
+"""
+from __future__ import annotations
+
+import asyncio
+
+from response_session import AudioArbiter
+from tts_scheduler import TtsScheduler
+
+
+def test_queued_session_does_not_overtake_the_playing_one():
+    async def run():
+        arbiter = AudioArbiter("serial")
+        main, agent = arbiter.open("main"), arbiter.open("tasks")
+        scheduler = TtsScheduler(initial_limit=1, rank=arbiter.rank)
+        admitted = []
+
+        async def request(session, order):
+            async with scheduler.slot(order, session):
+                admitted.append((session.name, order))
+                await asyncio.sleep(0.01)
+
+        holder = asyncio.create_task(request(main, 1))    # takes the only slot
+        await asyncio.sleep(0)
+        waiting = [asyncio.create_task(request(agent, 0)), asyncio.create_task(request(agent, 1)),
+                   asyncio.create_task(request(main, 2)), asyncio.create_task(request(main, 3))]
+        await asyncio.gather(holder, *waiting)
+        return admitted, scheduler.stats()
+
+    admitted, stats = asyncio.run(run())
+    # the agent's order 0 neither bypasses the limit nor goes before main's later sentences
+    assert admitted == [("main", 1), ("main", 2), ("main", 3), ("tasks", 0), ("tasks", 1)]
+    assert [sorted(waits) for waits in stats["wait_ms_by_session"].values()] == [[1, 2, 3], [0, 1]]
+
+
+def test_ranks_follow_sessions_moving_up():
+    async def run():
+        arbiter = AudioArbiter("serial")
+        main, agent, search = arbiter.open("main"), arbiter.open("tasks"), arbiter.open("perplexity")
+        scheduler = TtsScheduler(initial_limit=1, rank=arbiter.rank)
+        admitted = []
+
+        async def request(session, order):
+            async with scheduler.slot(order, session):
+                admitted.append((session.name, order))
+                await asyncio.sleep(0.01)
+
+        holder = asyncio.create_task(request(main, 5))
+        await asyncio.sleep(0)
+        waiting = [asyncio.create_task(request(search, 0)), asyncio.create_task(request(agent, 3))]
+        await asyncio.sleep(0)
+        arbiter.close(main)     # the agent plays next now, the search after it
+        await asyncio.gather(holder, *waiting)
+        return admitted
+
+    assert asyncio.run(run()) == [("main", 5), ("tasks", 3), ("perplexity", 0)]
@@ -0,0 +1,40 @@
+"""
+transcript.py
+The text of the answer being spoken, filled in sentence order.
+
+text_processor appends every segment it emits (sentences, the text before
+and including a [SYSTEM] tag, the remainder at finalize) in the order it
+numbers them, so the answer never has to be put back together from
+the sentence map. It can be read at any time: mid-turn it is the part
+of the answer segmented so far. /transcript shows it, partial or
+finished; the finished text is what chat_with_llm stores in the history
+(ResponseSession.wait_finalized is the wait for it).
+"""
+from __future__ import annotations
+
+
+class Transcript:
+    def __init__(self):
+        self._parts: list[str] = []
+        self._text = ""
+        self._joined = 0            # parts already in _text
+        self.finished = False
+
+    def append(self, text: str) -> None:
+        self._parts.append(text)
+
+    def finish(self) -> str:
+        """End of the turn: the full answer (read again, it is not joined a second time)."""
+        self.finished = True
+        return self.text
+
+    @property
+    def text(self) -> str:
+        """Everything appended so far; only parts added since the last read are joined."""
+        if self._joined < len(self._parts):
+            self._text += "".join(self._parts[self._joined:])
+            self._joined = len(self._parts)
+        return self._text
+
+    def __len__(self) -> int:
+        return len(self._parts)
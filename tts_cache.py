@@ -0,0 +1,165 @@
+"""
+tts_cache.py
+Content-addressed cache for synthesized TTS audio.
+
+Two tiers, both LRU and size-bounded:
+  * memory: the most recently used clips as bytes
+  * disk:   one `<sha256>.pcm` file per clip, read back whole (a hit goes
+            into the memory tier, and an open mapping would keep the file
+            from being evicted on Windows)
+
+get() and put() do file I/O: call them off the event loop (asyncio.to_thread).
+
+Keys are derived from everything that changes the audio (voice, model, text,
+previous/next context and output format), so a hit is always the same audio
+the API would have returned.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import orjson
+
+
+class TtsAudioCache:
+    def __init__(self, directory: str | os.PathLike = "tts_cache", *,
+                 memory_limit_bytes: int = 32 * 1024 * 1024,
+                 disk_limit_bytes: int = 512 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.memory_limit_bytes = memory_limit_bytes
+        self.disk_limit_bytes = disk_limit_bytes
+
+        self._lock = threading.Lock()                     # put() may run in a worker thread
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: OrderedDict[str, int] = OrderedDict()  # key -> size, oldest first
+        self._disk_bytes = 0
+        self._load_disk_index()
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(voice_id: str, model_id: str, text: str,
+                 previous_text: str | None = None, next_text: str | None = None,
+                 output_format: str = "pcm_24000") -> str:
+        raw = orjson.dumps([voice_id, model_id, text, previous_text, next_text, output_format])
+        return hashlib.sha256(raw).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pcm"
+
+    def _load_disk_index(self) -> None:
+        # modification time doubles as "last used": get() touches the file on every disk hit
+        entries = []
+        for path in self.directory.glob("*.pcm"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    # ── lookup ──────────────────────────────────────────────────────────
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return data
+
+            if key in self._disk:
+                data = self._read_disk(key)
+                if data is not None:
+                    self._disk.move_to_end(key)
+                    self._remember(key, data)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return data
+
+            self.misses += 1
+            return None
+
+    def _read_disk(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+            return data
+        except OSError as e:
+            logging.warning(f"TTS cache: could not read {path.name}: {e}")
+            self._disk_bytes -= self._disk.pop(key, 0)
+            return None
+
+    # ── insert ──────────────────────────────────────────────────────────
+    def put(self, key: str, data: bytes) -> None:
+        if not data:
+            return
+        data = bytes(data)
+        with self._lock:
+            self._remember(key, data)
+            if key in self._disk:
+                self._disk.move_to_end(key)
+                return
+            path = self._path(key)
+            tmp_path = path.with_suffix(".tmp")
+            try:
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logging.warning(f"TTS cache: could not write {path.name}: {e}")
+                return
+            self._disk[key] = len(data)
+            self._disk_bytes += len(data)
+            self._evict_disk()
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.memory_limit_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_limit_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _evict_disk(self) -> None:
+        while self._disk_bytes > self.disk_limit_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.evictions += 1
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    # ── metrics ─────────────────────────────────────────────────────────
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_entries": len(self._disk),
+            "disk_bytes": self._disk_bytes,
+        }
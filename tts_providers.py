@@ -0,0 +1,211 @@
+"""
+tts_providers.py
+Sentence TTS from more than one provider, with hedged requests.
+
+Every provider streams raw 24 kHz 16-bit mono PCM:
+  * ElevenLabsProvider  - POST /v1/text-to-speech/{voice}/stream?output_format=pcm_24000 (aiohttp)
+  * OpenAITtsProvider   - audio.speech with response_format="pcm" (AsyncOpenAI)
+
+HedgedTts starts the primary; if its first audio byte has not arrived
+within the primary's p95 first-byte latency (rolling window), the same
+sentence is also requested from the alternate and whichever delivers audio
+first is played. A failing primary falls over to the alternate at once.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable
+
+import aiohttp
+import openai
+import orjson
+
+
+class TtsProviderError(Exception):
+    def __init__(self, provider: str, status: int | None, detail: str = ""):
+        super().__init__(f"{provider} TTS failed (status {status}): {detail[:200]}")
+        self.provider = provider
+        self.status = status
+
+
+@dataclass
+class TtsRequest:
+    text: str
+    voice_id: str                   # ElevenLabs voice; other providers use their own
+    previous_text: str | None = None
+    next_text: str | None = None
+
+
+class ElevenLabsProvider:
+    name = "elevenlabs"
+
+    def __init__(self, session: Callable[[], aiohttp.ClientSession], *, api_key: str,
+                 model_id: str, base_url: str = "https://api.elevenlabs.io"):
+        self.session = session          # called per request: the shared session is created at startup
+        self.api_key = api_key
+        self.model_id = model_id
+        self.base_url = base_url
+
+    async def stream(self, request: TtsRequest) -> AsyncIterator[bytes]:
+        url = f"{self.base_url}/v1/text-to-speech/{request.voice_id}/stream?output_format=pcm_24000"
+        data = {"text": request.text, "model_id": self.model_id}
+        if request.previous_text:
+            data["previous_text"] = request.previous_text
+        if request.next_text:
+            data["next_text"] = request.next_text
+        try:
+            async with self.session().post(
+                url,
+                headers={"xi-api-key": self.api_key, "Content-Type": "application/json"},
+                data=orjson.dumps(data),
+                timeout=aiohttp.ClientTimeout(total=30),
+            ) as response:
+                if response.status != 200:
+                    raise TtsProviderError(self.name, response.status, await response.text())
+                async for chunk in response.content.iter_any():
+                    yield chunk
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise TtsProviderError(self.name, None, str(e)) from e
+
+
+class OpenAITtsProvider:
+    name = "openai"
+
+    def __init__(self, client: openai.AsyncOpenAI, *, model: str = "gpt-4o-mini-tts",
+                 voice: str = "alloy"):
+        self.client = client
+        self.model = model
+        self.voice = voice
+
+    async def stream(self, request: TtsRequest) -> AsyncIterator[bytes]:
+        try:
+            async with self.client.audio.speech.with_streaming_response.create(
+                model=self.model, voice=self.voice, input=request.text, response_format="pcm",
+            ) as response:
+                async for chunk in response.iter_bytes():
+                    yield chunk
+        except openai.APIStatusError as e:
+            raise TtsProviderError(self.name, e.status_code, str(e)) from e
+        except openai.APIConnectionError as e:
+            raise TtsProviderError(self.name, None, str(e)) from e
+
+
+@dataclass
+class HedgedAudio:
+    provider: str
+    chunks: AsyncIterator[bytes]    # remaining audio, starting with the first chunk
+    first_byte_s: float             # from the first request to the winner's first chunk
+    hedged: bool
+    primary_error: Exception | None = None    # set when the alternate took over after a primary failure
+
+
+class HedgedTts:
+    def __init__(self, primary, alternate=None, *, window: int = 200, min_samples: int = 20,
+                 default_threshold_s: float = 1.0, min_threshold_s: float = 0.3,
+                 max_threshold_s: float = 3.0):
+        """
+        window: first-byte latencies kept per provider for the p95
+        default_threshold_s: hedge delay until `min_samples` latencies are known
+        """
+        self.primary = primary
+        self.alternate = alternate
+        self.min_samples = min_samples
+        self.default_threshold_s = default_threshold_s
+        self.min_threshold_s = min_threshold_s
+        self.max_threshold_s = max_threshold_s
+
+        self.first_byte_s: dict[str, deque] = {
+            p.name: deque(maxlen=window) for p in (primary, alternate) if p is not None}
+        self.requests = 0
+        self.hedged = 0
+        self.failovers = 0
+        self.wins = Counter()
+        self.errors = Counter()
+
+    def hedge_threshold_s(self) -> float:
+        samples = self.first_byte_s[self.primary.name]
+        if len(samples) < self.min_samples:
+            return self.default_threshold_s
+        p95 = sorted(samples)[int(len(samples) * 0.95) - 1]
+        return min(self.max_threshold_s, max(self.min_threshold_s, p95))
+
+    async def _first_chunk(self, provider, request: TtsRequest):
+        started = time.perf_counter()
+        chunks = provider.stream(request)
+        try:
+            first = await chunks.__anext__()
+        except StopAsyncIteration:
+            raise TtsProviderError(provider.name, 200, "empty audio stream") from None
+        except BaseException:
+            await chunks.aclose()
+            raise
+        self.first_byte_s[provider.name].append(time.perf_counter() - started)
+        return provider, first, chunks
+
+    async def fetch(self, request: TtsRequest) -> HedgedAudio:
+        """Audio for one sentence from whichever provider starts first; raises the primary's error if all fail."""
+        self.requests += 1
+        started = time.perf_counter()
+        primary = asyncio.create_task(self._first_chunk(self.primary, request))
+        tasks = {primary}
+        hedged = False
+        errors: dict[asyncio.Task, BaseException] = {}
+        winner = None
+        try:
+            if self.alternate is not None:
+                done, _ = await asyncio.wait(tasks, timeout=self.hedge_threshold_s())
+                if not done or primary.exception() is not None:
+                    hedged = not done
+                    self.hedged += hedged
+                    self.failovers += not hedged
+                    tasks.add(asyncio.create_task(self._first_chunk(self.alternate, request)))
+
+            while tasks and winner is None:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        errors[task] = task.exception()
+                    elif winner is None:
+                        winner = task.result()
+                    else:
+                        # both answered in the same tick: drop the second stream
+                        await task.result()[2].aclose()
+        finally:
+            for task in tasks:                  # the loser, or everything on cancellation
+                task.cancel()
+            for error in errors.values():
+                self.errors[getattr(error, "provider", "unknown")] += 1
+
+        if winner is None:
+            raise errors.get(primary) or next(iter(errors.values()))
+        provider, first, chunks = winner
+        self.wins[provider.name] += 1
+        return HedgedAudio(provider.name, _prepend(first, chunks), time.perf_counter() - started,
+                           hedged, errors.get(primary))
+
+    def stats(self) -> dict:
+        def p95_ms(samples):
+            return round(sorted(samples)[int(len(samples) * 0.95) - 1] * 1000, 1) if samples else None
+
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_rate": round(self.hedged / self.requests, 3) if self.requests else None,
+            "failovers": self.failovers,
+            "hedge_threshold_ms": round(self.hedge_threshold_s() * 1000, 1),
+            "wins": dict(self.wins),
+            "errors": dict(self.errors),
+            "first_byte_p95_ms": {name: p95_ms(samples) for name, samples in self.first_byte_s.items()},
+        }
+
+
+async def _prepend(first: bytes, rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    try:
+        yield first
+        async for chunk in rest:
+            yield chunk
+    finally:
+        await rest.aclose()
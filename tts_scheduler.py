@@ -0,0 +1,139 @@
+"""
+tts_scheduler.py
+Admission control for TTS requests, ordered by playback position.
+
+Replaces a flat asyncio.Semaphore: waiting requests are admitted by
+(rank of their session, order), the sentence playback needs next first.
+Orders restart at 0 in every response session, so the rank, the session's
+playback position from `rank(session)` (AudioArbiter.rank), comes first:
+a queued agent answer cannot overtake the one that is playing. It is
+asked again at every admission, as sessions close and move up. Order 0 of
+the session that plays now or next (rank 0) never waits. The number of
+concurrent requests follows the API's behaviour (AIMD):
+  * 429 Too Many Requests   -> halve the limit
+  * slow first byte          -> limit - 1
+  * fast first byte          -> limit + 1 after `limit` fast responses in a row
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+BACKGROUND_ORDER = 10_000        # priority for audio nobody is waiting for (model names)
+SESSIONS_IN_STATS = 8            # wait times are kept for this many recent sessions
+
+
+class TtsScheduler:
+    def __init__(self, *, initial_limit: int = 6, min_limit: int = 1, max_limit: int = 18,
+                 target_latency_s: float = 1.0, rank=None):
+        self.rank = rank                 # session (or None) -> playback position; None: one session
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency_s = target_latency_s
+
+        self.active = 0
+        self._waiting: list[tuple[object, int, int, asyncio.Future]] = []   # session, order, seq, future
+        self._seq = itertools.count()
+        self._fast_streak = 0
+
+        self.latency_ewma_s: float | None = None
+        self.throttled = 0
+        self.max_queue_depth = 0
+        self.wait_s_by_session: OrderedDict[str, dict[int, float]] = OrderedDict()
+
+    # ── admission ───────────────────────────────────────────────────────
+    @asynccontextmanager
+    async def slot(self, order: int, session=None):
+        await self.acquire(order, session)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _rank(self, session) -> int:
+        return 0 if self.rank is None else self.rank(session)
+
+    async def acquire(self, order: int, session=None) -> None:
+        queued_at = time.perf_counter()
+        # order 0 of the answer that plays next decides time-to-first-audio: admitted even when all slots are taken
+        if (order == 0 and self._rank(session) == 0) or (self.active < self.limit and not self._waiting):
+            self.active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._waiting.append((session, order, next(self._seq), future))
+            self.max_queue_depth = max(self.max_queue_depth, len(self._waiting))
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # the slot was granted just before the cancel arrived
+                    self.release()
+                raise
+        self._record_wait(session, order, time.perf_counter() - queued_at)
+
+    def release(self) -> None:
+        self.active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        self._waiting = [entry for entry in self._waiting if not entry[3].cancelled()]
+        while self._waiting and self.active < self.limit:
+            # ranks change as sessions close, so they are asked now rather than when the request queued
+            ranks = {id(session): self._rank(session) for session, *_ in self._waiting}
+            entry = min(self._waiting, key=lambda e: (ranks[id(e[0])], e[1], e[2]))
+            self._waiting.remove(entry)
+            self.active += 1
+            entry[3].set_result(None)
+
+    def _record_wait(self, session, order: int, wait_s: float) -> None:
+        key = "background" if session is None else f"{session.name}#{session.number}"
+        waits = self.wait_s_by_session.get(key)
+        if waits is None:
+            waits = self.wait_s_by_session[key] = {}
+            while len(self.wait_s_by_session) > SESSIONS_IN_STATS:
+                self.wait_s_by_session.popitem(last=False)
+        waits[order] = wait_s
+
+    # ── feedback ────────────────────────────────────────────────────────
+    def report(self, latency_s: float | None = None, status: int | None = None) -> None:
+        """Feed back the time to response headers and the HTTP status of one request."""
+        if status == 429:
+            self.throttled += 1
+            self._fast_streak = 0
+            self.limit = max(self.min_limit, self.limit // 2)
+            return
+
+        if latency_s is None:
+            return
+        self.latency_ewma_s = (latency_s if self.latency_ewma_s is None
+                               else 0.8 * self.latency_ewma_s + 0.2 * latency_s)
+        if latency_s > self.target_latency_s:
+            self._fast_streak = 0
+            self.limit = max(self.min_limit, self.limit - 1)
+        else:
+            self._fast_streak += 1
+            if self._fast_streak >= self.limit:
+                self._fast_streak = 0
+                self.limit = min(self.max_limit, self.limit + 1)
+                self._dispatch()
+
+    # ── metrics ─────────────────────────────────────────────────────────
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for *_, future in self._waiting if not future.done())
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "throttled": self.throttled,
+            "latency_ewma_ms": round(self.latency_ewma_s * 1000, 1) if self.latency_ewma_s is not None else None,
+            "wait_ms_by_session": {key: {order: round(wait_s * 1000, 1) for order, wait_s in sorted(waits.items())}
+                                   for key, waits in self.wait_s_by_session.items()},
+        }
@@ -0,0 +1,173 @@
+"""
+tts_standin_server.py
+Local stand-in for the ElevenLabs endpoints the app uses, so TTS latency and
+request counts can be measured offline:
+
+  POST /v1/text-to-speech/{voice_id}/stream          per-sentence engine (HTTP)
+  POST /v1/audio/speech                              OpenAI TTS, response_format=pcm (hedge provider)
+  GET  /v1/text-to-speech/{voice_id}/stream-input    input-streaming engine (WebSocket)
+  GET  /stats                                        request counters as JSON
+
+The "speech" is a quiet tone whose length follows the text length (24 kHz,
+16-bit mono, like output_format=pcm_24000). Every synthesis waits --latency
+ms before the first byte and then delivers audio faster than real time;
+with --stall-rate a fraction of the requests waits --stall ms instead.
+
+Run:   python tts_standin_server.py --port 8765
+Use:   set ELEVENLABS_BASE_URL=http://127.0.0.1:8765 before starting OAI_OAI_11LABS.py
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import random
+from collections import Counter
+
+import numpy as np
+import orjson
+from aiohttp import web, WSMsgType
+
+SAMPLE_RATE = 24_000
+MS_PER_CHAR = 60                  # ~16 characters of speech per second
+FRAME_CHARS = 24                  # characters covered by one WebSocket audio frame
+HTTP_CHUNK_BYTES = 4096
+CHUNK_LENGTH_SCHEDULE = (120, 160, 250, 290)   # ElevenLabs default buffering before synthesis
+
+
+def synth_pcm(text: str) -> bytes:
+    samples = max(1, len(text)) * MS_PER_CHAR * SAMPLE_RATE // 1000
+    t = np.arange(samples, dtype=np.float32) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * 220.0 * t) * 3000).astype("<i2").tobytes()
+
+
+class StandInTTS:
+    def __init__(self, latency_ms: float = 250.0, speedup: float = 8.0,
+                 stall_rate: float = 0.0, stall_ms: float = 2000.0, seed: int | None = None):
+        self.latency_s = latency_ms / 1000
+        self.speedup = speedup            # synthesis speed relative to real time
+        self.stall_rate = stall_rate
+        self.stall_s = stall_ms / 1000
+        self.random = random.Random(seed)
+        self.stats = Counter()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/text-to-speech/{voice_id}/stream", self.http_stream)
+        app.router.add_get("/v1/text-to-speech/{voice_id}/stream-input", self.ws_stream_input)
+        app.router.add_post("/v1/audio/speech", self.openai_speech)
+        app.router.add_get("/stats", self.get_stats)
+        return app
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.stats))
+
+    def _realtime_delay(self, pcm_bytes: int) -> float:
+        return pcm_bytes / 2 / SAMPLE_RATE / self.speedup
+
+    def _first_byte_delay(self) -> float:
+        if self.stall_rate and self.random.random() < self.stall_rate:
+            self.stats["stalls"] += 1
+            return self.stall_s
+        return self.latency_s
+
+    # ── per-sentence HTTP ───────────────────────────────────────────────
+    async def http_stream(self, request: web.Request) -> web.StreamResponse:
+        body = orjson.loads(await request.read())
+        self.stats["http_requests"] += 1
+        return await self._stream_pcm(request, body.get("text", ""))
+
+    async def openai_speech(self, request: web.Request) -> web.StreamResponse:
+        body = orjson.loads(await request.read())
+        self.stats["openai_requests"] += 1
+        return await self._stream_pcm(request, body.get("input", ""))
+
+    async def _stream_pcm(self, request: web.Request, text: str) -> web.StreamResponse:
+        self.stats["characters"] += len(text)
+        await asyncio.sleep(self._first_byte_delay())
+        response = web.StreamResponse(headers={"Content-Type": "audio/pcm"})
+        try:
+            await response.prepare(request)
+            pcm = synth_pcm(text)
+            for i in range(0, len(pcm), HTTP_CHUNK_BYTES):
+                chunk = pcm[i:i + HTTP_CHUNK_BYTES]
+                await response.write(chunk)
+                await asyncio.sleep(self._realtime_delay(len(chunk)))
+            await response.write_eof()
+        except ConnectionResetError:
+            # the client gave up, e.g. the losing request of a hedged pair
+            self.stats["client_disconnects"] += 1
+        return response
+
+    # ── input-streaming WebSocket ───────────────────────────────────────
+    async def ws_stream_input(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.stats["ws_connections"] += 1
+
+        pieces: asyncio.Queue[str | None] = asyncio.Queue()
+        generator = asyncio.create_task(self._generate(ws, pieces))
+        buffered = ""
+        schedule = list(CHUNK_LENGTH_SCHEDULE)
+
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            self.stats["ws_messages"] += 1
+            data = orjson.loads(msg.data)
+            text = data.get("text", "")
+            if text == "":                         # end of input
+                if buffered.strip():
+                    pieces.put_nowait(buffered)
+                pieces.put_nowait(None)
+                break
+            if text == " " and not buffered:       # begin-of-stream message
+                continue
+            self.stats["characters"] += len(text)
+            buffered += text
+            threshold = schedule[0] if schedule else CHUNK_LENGTH_SCHEDULE[-1]
+            if data.get("flush") or len(buffered) >= threshold:
+                pieces.put_nowait(buffered)
+                buffered = ""
+                if schedule:
+                    schedule.pop(0)
+
+        await generator
+        await ws.close()
+        return ws
+
+    async def _generate(self, ws: web.WebSocketResponse, pieces: asyncio.Queue) -> None:
+        while (text := await pieces.get()) is not None:
+            await asyncio.sleep(self.latency_s)
+            for i in range(0, len(text), FRAME_CHARS):
+                frame_text = text[i:i + FRAME_CHARS]
+                pcm = synth_pcm(frame_text)
+                await ws.send_str(orjson.dumps({
+                    "audio": base64.b64encode(pcm).decode(),
+                    "isFinal": None,
+                    "alignment": {"chars": list(frame_text)},
+                }).decode())
+                self.stats["ws_frames"] += 1
+                await asyncio.sleep(self._realtime_delay(len(pcm)))
+        await ws.send_str(orjson.dumps({"audio": None, "isFinal": True}).decode())
+
+
+async def start_standin(port: int = 8765, **kwargs) -> tuple[StandInTTS, web.AppRunner]:
+    """Start the stand-in inside an existing event loop (used by the benchmarks)."""
+    standin = StandInTTS(**kwargs)
+    runner = web.AppRunner(standin.app())
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return standin, runner
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline ElevenLabs stand-in")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=250.0, help="ms before the first audio byte")
+    parser.add_argument("--speedup", type=float, default=8.0, help="synthesis speed vs real time")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="fraction of requests that stall")
+    parser.add_argument("--stall", type=float, default=2000.0, help="ms before the first byte of a stalled request")
+    args = parser.parse_args()
+    web.run_app(StandInTTS(args.latency, args.speedup, args.stall_rate, args.stall).app(),
+                host="127.0.0.1", port=args.port)
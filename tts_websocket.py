@@ -0,0 +1,188 @@
+"""
+tts_websocket.py
+Input-streaming TTS over one ElevenLabs WebSocket per assistant turn.
+
+Sentences are pushed on the socket as soon as the segmenter cuts them; the
+audio comes back in order on the same connection and is routed into the
+PcmStream of the sentence it belongs to, using the character alignment that
+ElevenLabs sends with every frame.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import logging
+import time
+from collections import deque
+
+import aiohttp
+import orjson
+
+from pcm_stream import PcmStream
+
+
+def _spoken_chars(text: str) -> int:
+    # whitespace is not reliably echoed in the alignment, so it is not counted
+    return sum(1 for c in text if not c.isspace())
+
+
+class ElevenLabsWebSocketSession:
+    """
+    One `stream-input` connection. Usage per turn:
+
+        session = ElevenLabsWebSocketSession(http, voice_id=..., model_id=..., api_key=...)
+        session.open()                                   # connect in the background
+        await session.send_text("Eerste zin.", stream_0, flush=True)
+        await session.send_text("Tweede zin.", stream_1)
+        await session.close_input()                      # remaining audio still arrives
+    """
+
+    def __init__(self, http_session: aiohttp.ClientSession, *, voice_id: str, model_id: str,
+                 api_key: str, base_url: str = "https://api.elevenlabs.io",
+                 output_format: str = "pcm_24000"):
+        ws_base = base_url.replace("https://", "wss://", 1).replace("http://", "ws://", 1)
+        self.url = (f"{ws_base}/v1/text-to-speech/{voice_id}/stream-input"
+                    f"?model_id={model_id}&output_format={output_format}")
+        self.http_session = http_session
+        self.api_key = api_key
+
+        self._ws: aiohttp.ClientWebSocketResponse | None = None
+        self._connected: asyncio.Task | None = None
+        self._receiver: asyncio.Task | None = None
+        self._pending: deque[list] = deque()      # [PcmStream, spoken chars still expected]
+        self._input_closed = False
+
+        self.started_at: float | None = None
+        self.first_audio_at: float | None = None
+        self.messages_sent = 0
+        self.frames_received = 0
+        self.bytes_received = 0
+
+    # ── connection ──────────────────────────────────────────────────────
+    def open(self) -> asyncio.Task:
+        """Start connecting in the background; calling it again returns the same task."""
+        if self._connected is None:
+            self.started_at = time.perf_counter()
+            self._connected = asyncio.create_task(self._connect())
+        return self._connected
+
+    async def _connect(self) -> None:
+        self._ws = await self.http_session.ws_connect(self.url, headers={"xi-api-key": self.api_key})
+        # the first message opens the input stream; a single space is the documented "begin" text
+        await self._send({"text": " "})
+        self._receiver = asyncio.create_task(self._receive())
+
+    async def _send(self, message: dict) -> None:
+        await self._ws.send_str(orjson.dumps(message).decode())
+        self.messages_sent += 1
+
+    # ── input side ──────────────────────────────────────────────────────
+    async def send_text(self, text: str, stream: PcmStream, *, flush: bool = False) -> None:
+        """
+        Push one sentence. Its audio is fed into `stream`, which is finished
+        when the alignment shows the sentence has been spoken completely.
+        `flush=True` makes the server synthesize right away instead of
+        waiting for more text (used for the first sentence of a turn).
+        """
+        self._pending.append([stream, _spoken_chars(text)])
+        try:
+            await self.open()
+            # ElevenLabs expects every text chunk to end with a space
+            await self._send({"text": text if text.endswith(" ") else text + " ", "flush": flush})
+        except Exception as e:
+            logging.error(f"TTS websocket send failed: {e}")
+            self._finish_pending()
+
+    async def close_input(self) -> None:
+        """Signal end of text; the socket closes itself after the final audio frame."""
+        if self._input_closed or self._connected is None:
+            self._input_closed = True
+            self._finish_pending()
+            return
+        self._input_closed = True
+        try:
+            await self._connected
+            await self._send({"text": ""})
+        except Exception as e:
+            logging.error(f"TTS websocket close failed: {e}")
+            self._finish_pending()
+
+    async def aclose(self) -> None:
+        """Drop the connection immediately (pending streams are finished as they are)."""
+        self._input_closed = True
+        if self._receiver:
+            self._receiver.cancel()
+        if self._connected and not self._connected.done():
+            self._connected.cancel()
+        if self._ws is not None and not self._ws.closed:
+            await self._ws.close()
+        self._finish_pending()
+
+    async def wait_closed(self) -> None:
+        if self._connected is not None:
+            await asyncio.gather(self._connected, return_exceptions=True)
+        if self._receiver is not None:
+            await asyncio.gather(self._receiver, return_exceptions=True)
+
+    # ── output side ─────────────────────────────────────────────────────
+    async def _receive(self) -> None:
+        try:
+            async for msg in self._ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    if msg.type == aiohttp.WSMsgType.ERROR:
+                        logging.error(f"TTS websocket error: {self._ws.exception()}")
+                        break
+                    continue
+
+                data = orjson.loads(msg.data)
+                if data.get("error"):
+                    print(f"ElevenLabs websocket error: {data.get('message') or data['error']}")
+                    break
+
+                if data.get("audio"):
+                    pcm = base64.b64decode(data["audio"])
+                    if self.first_audio_at is None:
+                        self.first_audio_at = time.perf_counter()
+                    self.frames_received += 1
+                    self.bytes_received += len(pcm)
+                    self._route(pcm, data.get("alignment"))
+
+                if data.get("isFinal"):
+                    break
+        finally:
+            self._finish_pending()
+            if not self._ws.closed:
+                await self._ws.close()
+
+    def _route(self, pcm: bytes, alignment: dict | None) -> None:
+        if not self._pending:
+            return
+        self._pending[0][0].feed(pcm)
+
+        chars = alignment.get("chars") if alignment else None
+        if not chars:
+            return
+        self._pending[0][1] -= _spoken_chars("".join(chars))
+        while self._pending and self._pending[0][1] <= 0:
+            overshoot = self._pending[0][1]
+            stream, _ = self._pending.popleft()
+            stream.finish()
+            if self._pending:
+                self._pending[0][1] += overshoot
+
+    def _finish_pending(self) -> None:
+        while self._pending:
+            stream, _ = self._pending.popleft()
+            stream.finish()
+
+    # ── metrics ─────────────────────────────────────────────────────────
+    def stats(self) -> dict:
+        first_audio_ms = None
+        if self.first_audio_at is not None and self.started_at is not None:
+            first_audio_ms = round((self.first_audio_at - self.started_at) * 1000, 1)
+        return {
+            "messages_sent": self.messages_sent,
+            "frames_received": self.frames_received,
+            "bytes_received": self.bytes_received,
+            "first_audio_ms": first_audio_ms,
+        }
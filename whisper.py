@@ -14,12 +14,15 @@ from io import BytesIO
 dotenv.load_dotenv()
 
 class WhisperTranscriber:
-    def __init__(self):
+    def __init__(self, openai_client=None, groq_client=None):
         # print("---- [DEBUG] WhisperTranscriber __init__ called ----") # Add this line
         self.api_key = os.getenv('GROQ_API_KEY')
         self.openai_api_key = os.getenv('OPENAI_API_KEY')
-        self.client = AsyncGroq(api_key=self.api_key)
-        self.openai_client = AsyncOpenAI(api_key=self.openai_api_key)
+        # optional SDK clients shared with the rest of the app (llm_clients), else our own
+        self.client = groq_client or AsyncGroq(api_key=self.api_key)
+        self.openai_client = openai_client or AsyncOpenAI(api_key=self.openai_api_key)
+        self.on_recording_start = None  # optional coroutine function(key), called when a record key goes down
+        self.on_transcribing = None     # optional coroutine function(), called when the recording goes to Whisper
 
         self.dtype   = 'int16'                # 16-bit is what Whisper expects
         self.channels = 1
@@ -67,6 +70,8 @@ class WhisperTranscriber:
     async def start_recording(self, key):
         """Start de audio-opname."""
         print(f"\n>>>>>>  Listening... <<<<<<", end='')
+        if self.on_recording_start:
+            asyncio.create_task(self.on_recording_start(key))
         self.frames = []  # Reset frames
         stream = sd.InputStream(
             channels     = self.channels,
@@ -89,6 +94,8 @@ class WhisperTranscriber:
             return None
 
         print("\r" + " " * len(f">>>>>>  Listening...  <<<<<<<") + "\r<<<<<<  Transcribing  >>>>>>", end='')
+        if self.on_transcribing:
+            asyncio.create_task(self.on_transcribing())
 
         try:
             # print("\n[DEBUG] About to call Groq for transcription.")